@@ -9,17 +9,19 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
+import clickhouse_connect
+
 # Добавляем корень проекта в путь для импортов
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from loader.sheets_to_ch import SheetsToClickHouseLoader
 from loader.build_dm_sales import DmSalesBuilder
 from loader.build_dm_vk_ads import DmVkAdsBuilder
 from loader.qtickets_cdc import QTicketsCDCLoader
 from loader.vk_ads_cdc import VKAdsCDCLoader
 from loader.build_dm_sales_incr import DmSalesIncrementalBuilder
 from loader.build_dm_vk_incr import DmVkIncrementalBuilder
+from loader.orchestrator import DagOrchestrator, default_jobs
 
 # Настройка логирования
 logging.basicConfig(
@@ -185,6 +187,27 @@ def main():
         help='Рассчитать и обновить SLI свежести данных'
     )
     
+    # Команда orchestrate (DAG NRT-задач вместо отдельных таймеров)
+    orchestrate_parser = subparsers.add_parser('orchestrate', help='Прогон DAG NRT-задач (CDC, витрины, QTickets API, Gmail)')
+    
+    # Параметры для orchestrate
+    orchestrate_parser.add_argument(
+        '--jobs',
+        type=str,
+        help='Список задач через запятую (по умолчанию: все задачи DAG)'
+    )
+    orchestrate_parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=int(os.getenv('ORCH_MAX_WORKERS', '4')),
+        help='Число параллельно выполняемых задач (по умолчанию: 4)'
+    )
+    orchestrate_parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Показать порядок задач без запуска'
+    )
+    
     # Общие параметры для всех команд
     parser.add_argument(
         '--verbose',
@@ -208,7 +231,7 @@ def main():
         os.environ['CLICKHOUSE_HOST'] = args.ch_host
         os.environ['CLICKHOUSE_PORT'] = str(args.ch_port)
         os.environ['CLICKHOUSE_USER'] = args.ch_user
-        os.environ['CLICKHOUSE_PASSWORD'] = args.ch_pass
+        os.environ['CLICKHOUSE_PASSWORD'] = args.ch_pass or ''
         os.environ['CLICKHOUSE_DATABASE'] = args.ch_database
         
         if args.command == 'load-sheets':
@@ -225,6 +248,8 @@ def main():
             return _handle_build_dm_sales_incr(args)
         elif args.command == 'build-dm-vk-incr':
             return _handle_build_dm_vk_incr(args)
+        elif args.command == 'orchestrate':
+            return _handle_orchestrate(args)
         else:
             logger.error(f"Неизвестная команда: {args.command}")
             return 1
@@ -252,6 +277,9 @@ def _handle_load_sheets(args):
     os.environ['GOOGLE_SHEETS_SPREADSHEET_ID'] = args.sheet_id
     os.environ['GOOGLE_SHEETS_QTICKETS_RANGE'] = args.range
     
+    # Лоадер Google Sheets не входит в NRT-контур, импортируем только для этой команды
+    from loader.sheets_to_ch import SheetsToClickHouseLoader
+    
     # Создание и запуск лоадера
     logger.info(f"Запуск загрузки данных за последние {args.days} дней")
     loader = SheetsToClickHouseLoader()
@@ -387,5 +415,37 @@ def _handle_build_dm_vk_incr(args):
     return 0
 
 
+
+def _handle_orchestrate(args):
+    """Обработка команды orchestrate."""
+    # Проверка обязательных параметров (dry-run не обращается к ClickHouse)
+    if not args.ch_pass and not args.dry_run:
+        logger.error("Не указан пароль ClickHouse (--ch-pass или CLICKHOUSE_PASSWORD)")
+        return 1
+    
+    ch_client = None
+    if not args.dry_run:
+        ch_client = clickhouse_connect.get_client(
+            host=args.ch_host,
+            port=args.ch_port,
+            username=args.ch_user,
+            password=args.ch_pass,
+            database=args.ch_database
+        )
+    
+    # Создание и запуск оркестратора
+    orchestrator = DagOrchestrator(ch_client, default_jobs(ch_client), max_workers=args.max_workers)
+    only = [name.strip() for name in args.jobs.split(',')] if args.jobs else None
+    results = orchestrator.run(only=only, dry_run=args.dry_run)
+    
+    failed = [name for name, result in results.items() if result.status == 'error']
+    if failed:
+        logger.error(f"Прогон DAG завершён с ошибками: {', '.join(failed)}")
+        return 1
+    
+    logger.info("Прогон DAG завершён успешно")
+    return 0
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
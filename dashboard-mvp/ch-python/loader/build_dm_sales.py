@@ -2,6 +2,7 @@
 Скрипт для построения материализованной витрины продаж dm_sales_daily.
 """
 import os
+import sys
 import logging
 import argparse
 from datetime import datetime, date, timedelta
@@ -10,6 +11,10 @@ from typing import Optional
 import clickhouse_connect
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from loader.partition_swap import PartitionSwapRebuilder  # noqa: E402
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -17,6 +22,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DM_SALES_COLUMNS = (
+    'event_date', 'sale_date', 'city', 'event_name', 'tickets_sold',
+    'revenue', 'refunds_amount', 'net_revenue', '_ver',
+)
+
 
 class DmSalesBuilder:
     """Класс для построения витрины продаж."""
@@ -34,6 +44,9 @@ class DmSalesBuilder:
         
         # Инициализация клиента
         self._init_clickhouse_client()
+        self.rebuilder = PartitionSwapRebuilder(
+            self.ch_client, self.ch_database, 'dm_sales_daily', 'event_date'
+        )
     
     def _init_clickhouse_client(self):
         """Инициализация ClickHouse клиента."""
@@ -58,37 +71,12 @@ class DmSalesBuilder:
             logger.error(f"Неверный формат даты: {date_str}")
             raise
     
-    def delete_range(self, from_date: date, to_date: date):
-        """Удаление целевого диапазона из витрины."""
-        logger.info(f"Удаление данных из витрины за период {from_date} - {to_date}")
-        
-        try:
-            alter_sql = """
-            ALTER TABLE zakaz.dm_sales_daily DELETE 
-            WHERE event_date BETWEEN %(from_date)s AND %(to_date)s
-            """
-            
-            self.ch_client.command(
-                alter_sql,
-                parameters={
-                    'from_date': from_date,
-                    'to_date': to_date
-                }
-            )
-            
-            logger.info(f"Данные за период {from_date} - {to_date} удалены из витрины")
-            
-        except Exception as e:
-            logger.error(f"Ошибка при удалении данных из витрины: {e}")
-            raise
-    
     def build_materialized_view(self, from_date: date, to_date: date):
-        """Построение материализованной витрины."""
+        """Построение материализованной витрины с атомарной заменой партиций."""
         logger.info(f"Построение витрины за период {from_date} - {to_date}")
         
         try:
-            insert_sql = """
-            INSERT INTO zakaz.dm_sales_daily
+            select_sql = """
             SELECT
                 toDate(event_date)        AS event_date,
                 toDate(report_date)       AS sale_date,
@@ -104,15 +92,13 @@ class DmSalesBuilder:
             GROUP BY event_date, sale_date, city, event_name
             """
             
-            result = self.ch_client.command(
-                insert_sql,
-                parameters={
-                    'from_date': from_date,
-                    'to_date': to_date
-                }
-            )
+            result = self.rebuilder.rebuild(from_date, to_date, DM_SALES_COLUMNS, select_sql)
             
-            logger.info(f"Витрина построена успешно. Обработано строк: {result}")
+            logger.info(
+                f"Витрина построена успешно. Заменено партиций: {result['partitions']}, "
+                f"строк: {result['rows']}, байт: {result['bytes']}"
+            )
+            return result
             
         except Exception as e:
             logger.error(f"Ошибка при построении витрины: {e}")
@@ -133,10 +119,8 @@ class DmSalesBuilder:
         logger.info(f"Запуск построения витрины dm_sales_daily за период {from_date} - {to_date}")
         
         try:
-            # Шаг 1: Удаление целевого диапазона из витрины
-            self.delete_range(from_date, to_date)
-            
-            # Шаг 2: Вставка "с нуля" с учетом dedup на источнике
+            # Сборка диапазона "с нуля" с учетом dedup на источнике
+            # в теневой таблице и замена затронутых партиций
             self.build_materialized_view(from_date, to_date)
             
             logger.info("Построение витрины dm_sales_daily завершено успешно")
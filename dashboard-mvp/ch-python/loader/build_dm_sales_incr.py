@@ -3,14 +3,22 @@
 Инкрементальный билдер витрины продаж dm_sales_daily.
 """
 import os
+import sys
 import logging
 import argparse
 from datetime import datetime, date, timedelta
-from typing import Optional, List, Set
+from typing import Any, Dict, List, Optional, Tuple
 
 import clickhouse_connect
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from loader.build_dm_sales import DM_SALES_COLUMNS  # noqa: E402
+from loader.changed_partitions import ChangedPartitionsLog  # noqa: E402
+from loader.etl_runs import EtlRunRecorder  # noqa: E402
+from loader.partition_swap import PartitionSwapRebuilder  # noqa: E402
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -33,155 +41,133 @@ class DmSalesIncrementalBuilder:
         self.ch_password = os.getenv('CLICKHOUSE_PASSWORD')
         self.ch_database = os.getenv('CLICKHOUSE_DATABASE', 'zakaz')
         
-        # NRT настройки
-        self.cdc_window_days = int(os.getenv('CDC_WINDOW_DAYS', '3'))
+        # Число партиций, пересобираемых параллельно
+        self.build_workers = int(os.getenv('DM_BUILD_WORKERS', '2'))
         
         # Инициализация клиента
         self._init_clickhouse_client()
+        self.rebuilder = PartitionSwapRebuilder(
+            self.ch_client, self.ch_database, 'dm_sales_daily', 'event_date',
+            client_factory=self._new_clickhouse_client
+        )
+        self.change_log = ChangedPartitionsLog(self.ch_client, 'zakaz.stg_sales_events')
+    
+    def _new_clickhouse_client(self):
+        """Новый ClickHouse клиент (отдельный для каждого потока пересборки)."""
+        return clickhouse_connect.get_client(
+            host=self.ch_host,
+            port=self.ch_port,
+            username=self.ch_user,
+            password=self.ch_password,
+            database=self.ch_database
+        )
     
     def _init_clickhouse_client(self):
         """Инициализация ClickHouse клиента."""
         try:
-            self.ch_client = clickhouse_connect.get_client(
-                host=self.ch_host,
-                port=self.ch_port,
-                username=self.ch_user,
-                password=self.ch_password,
-                database=self.ch_database
-            )
+            self.ch_client = self._new_clickhouse_client()
             logger.info("ClickHouse клиент инициализирован")
         except Exception as e:
             logger.error(f"Ошибка инициализации ClickHouse клиента: {e}")
             raise
     
-    def get_affected_dates(self) -> List[date]:
-        """Определение затронутых дат на основе данных в стейджинге."""
+    def get_affected_dates(self) -> Tuple[List[date], int]:
+        """Даты, изменённые CDC после последней пересборки, и ``_ver`` для сдвига маркера."""
         try:
-            query = """
-            SELECT DISTINCT event_date
-            FROM zakaz.stg_sales_events
-            WHERE event_date >= today() - %(days)s
-            ORDER BY event_date
-            """
-            
-            result = self.ch_client.query(
-                query,
-                parameters={
-                    'days': self.cdc_window_days
-                }
-            )
-            
-            dates = [row[0] for row in result.result_rows]
+            dates, pending_ver = self.change_log.pending('build_dm_sales_incr')
             logger.info(f"Найдено {len(dates)} затронутых дат: {dates}")
-            return dates
+            return dates, pending_ver
             
         except Exception as e:
             logger.error(f"Ошибка определения затронутых дат: {e}")
             raise
     
-    def rebuild_date_partition(self, target_date: date):
-        """Пересборка партиции за конкретную дату."""
-        logger.info(f"Пересборка партиции за дату {target_date}")
+    def rebuild_dates(self, dates: List[date]) -> Dict[str, Any]:
+        """Пересборка затронутых дат: по одному запросу на партицию, партиции параллельно."""
+        logger.info(f"Пересборка витрины за даты {dates}")
         
         try:
-            # Шаг 1: Определение активных ключей (последний оп - UPSERT)
-            active_keys_sql = """
-            WITH last_ops AS (
-              SELECT event_date, city, event_id, order_id,
-                     argMax(_op, _ver) AS last_op
-              FROM zakaz.stg_sales_events
-              WHERE event_date = %(target_date)s
-              GROUP BY event_date, city, event_id, order_id
+            # Активные ключи всех дат партиции и агрегаты считаются одним
+            # запросом прямо в теневую таблицу, партиция заменяется атомарно
+            select_sql = """
+            SELECT
+                event_date,
+                toDate(now()) AS sale_date,
+                city,
+                event_id AS event_name,
+                sum(tickets)                   AS tickets_sold,
+                toUInt64(sum(revenue) * 100)   AS revenue,
+                toUInt64(0)                    AS refunds_amount,
+                toInt64(sum(revenue) * 100)    AS net_revenue,
+                max(ver)                       AS _ver
+            FROM
+            (
+                -- Активные ключи: последняя версия ключа — UPSERT
+                SELECT
+                    event_date, city, event_id, order_id,
+                    argMax(tickets_sold, _ver) AS tickets,
+                    argMax(net_revenue, _ver)  AS revenue,
+                    argMax(_op, _ver)          AS last_op,
+                    max(_ver)                  AS ver
+                FROM zakaz.stg_sales_events
+                WHERE event_date IN %(dates)s
+                GROUP BY event_date, city, event_id, order_id
             )
-            SELECT event_date, city, event_id, order_id
-            FROM last_ops 
             WHERE last_op = 'UPSERT'
+            GROUP BY event_date, city, event_id
             """
             
-            # Временная таблица с активными ключами
-            temp_table = f"temp_active_keys_{int(target_date.strftime('%Y%m%d'))}"
-            
-            self.ch_client.command(f"""
-                CREATE TEMPORARY TABLE {temp_table} (
-                    event_date Date,
-                    city String,
-                    event_id String,
-                    order_id String
-                ) ENGINE = Memory
-            """)
-            
-            self.ch_client.command(f"""
-                INSERT INTO {temp_table}
-                {active_keys_sql}
-            """, parameters={'target_date': target_date})
-            
-            # Шаг 2: Удаление существующих данных за дату
-            delete_sql = """
-            ALTER TABLE zakaz.dm_sales_daily DELETE 
-            WHERE event_date = %(target_date)s
-            """
-            
-            self.ch_client.command(
-                delete_sql,
-                parameters={'target_date': target_date}
+            result = self.rebuilder.rebuild_dates(
+                dates, DM_SALES_COLUMNS, select_sql, max_workers=self.build_workers
             )
             
-            # Шаг 3: Вставка новых данных с учетом только активных ключей
-            insert_sql = f"""
-            INSERT INTO zakaz.dm_sales_daily
-            SELECT
-                s.event_date,
-                toDate(now()) AS sale_date,
-                s.city,
-                s.event_id AS event_name,
-                sum(s.tickets_sold)                AS tickets_sold,
-                toUInt64(sum(s.net_revenue) * 100) AS revenue,
-                toUInt64(0)                       AS refunds_amount,
-                toInt64(sum(s.net_revenue) * 100)  AS net_revenue,
-                max(s._ver)                       AS _ver
-            FROM zakaz.stg_sales_events AS s
-            INNER JOIN {temp_table} AS k
-              ON s.event_date = k.event_date 
-             AND s.city = k.city
-             AND s.event_id = k.event_id
-             AND s.order_id = k.order_id
-            WHERE s.event_date = %(target_date)s
-              AND s._op = 'UPSERT'
-            GROUP BY s.event_date, s.city, s.event_id
-            """
-            
-            result = self.ch_client.command(
-                insert_sql,
-                parameters={'target_date': target_date}
+            logger.info(
+                f"Пересборка витрины завершена. Партиций: {result['partitions']}, "
+                f"строк: {result['rows']}, байт: {result['bytes']}"
             )
-            
-            logger.info(f"Пересборка партиции за {target_date} завершена. Обработано строк: {result}")
+            return result
             
         except Exception as e:
-            logger.error(f"Ошибка пересборки партиции за {target_date}: {e}")
+            logger.error(f"Ошибка пересборки витрины за даты {dates}: {e}")
             raise
     
     def build_dm_sales_incremental(self):
         """Основной метод инкрементального построения витрины."""
         logger.info("Запуск инкрементального построения витрины dm_sales_daily")
+        recorder = EtlRunRecorder(self.ch_client, 'build_dm_sales_incr')
         
         try:
             # Шаг 1: Определение затронутых дат
-            affected_dates = self.get_affected_dates()
+            with recorder.stage('affected_dates') as counters:
+                affected_dates, pending_ver = self.get_affected_dates()
+                counters['rows_read'] = len(affected_dates)
             
             if not affected_dates:
                 logger.info("Нет затронутых дат для обработки")
                 return
+            recorder.from_date, recorder.to_date = min(affected_dates), max(affected_dates)
+            
+            # Шаг 2: Пересборка затронутых партиций
+            with recorder.stage('rebuild') as counters:
+                result = self.rebuild_dates(affected_dates)
+                counters['rows_written'] = result['rows']
+            for item in result['details']:
+                for name, seconds in item['seconds'].items():
+                    recorder.record(
+                        f"{name}:{item['partition']}", item['started_at'][name], seconds,
+                        rows_written=item['built'] if name == 'build' else 0
+                    )
             
-            # Шаг 2: Пересборка партиций для каждой даты
-            for target_date in affected_dates:
-                self.rebuild_date_partition(target_date)
+            # Шаг 3: Сдвиг маркера журнала изменений только после успешной замены
+            self.change_log.commit('build_dm_sales_incr', pending_ver)
             
             logger.info(f"Инкрементальное построение витрины завершено. Обработано дат: {len(affected_dates)}")
             
         except Exception as e:
             logger.error(f"Ошибка при инкрементальном построении витрины: {e}")
             raise
+        finally:
+            recorder.flush()
     
     def calculate_sli_freshness(self):
         """Расчет SLI для свежести данных."""
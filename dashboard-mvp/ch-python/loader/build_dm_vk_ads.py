@@ -2,6 +2,7 @@
 Скрипт для построения материализованной витрины VK Ads dm_vk_ads_daily.
 """
 import os
+import sys
 import logging
 import argparse
 from datetime import datetime, date, timedelta
@@ -10,6 +11,10 @@ from typing import Optional
 import clickhouse_connect
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from loader.partition_swap import PartitionSwapRebuilder  # noqa: E402
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -17,6 +22,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DM_VK_ADS_COLUMNS = ('stat_date', 'city', 'impressions', 'clicks', 'spend', '_ver')
+
 
 class DmVkAdsBuilder:
     """Класс для построения витрины VK Ads."""
@@ -34,6 +41,9 @@ class DmVkAdsBuilder:
         
         # Инициализация клиента
         self._init_clickhouse_client()
+        self.rebuilder = PartitionSwapRebuilder(
+            self.ch_client, self.ch_database, 'dm_vk_ads_daily', 'stat_date'
+        )
     
     def _init_clickhouse_client(self):
         """Инициализация ClickHouse клиента."""
@@ -58,37 +68,12 @@ class DmVkAdsBuilder:
             logger.error(f"Неверный формат даты: {date_str}")
             raise
     
-    def delete_range(self, from_date: date, to_date: date):
-        """Удаление целевого диапазона из витрины."""
-        logger.info(f"Удаление данных из витрины VK Ads за период {from_date} - {to_date}")
-        
-        try:
-            alter_sql = """
-            ALTER TABLE zakaz.dm_vk_ads_daily DELETE 
-            WHERE stat_date BETWEEN %(from_date)s AND %(to_date)s
-            """
-            
-            self.ch_client.command(
-                alter_sql,
-                parameters={
-                    'from_date': from_date,
-                    'to_date': to_date
-                }
-            )
-            
-            logger.info(f"Данные за период {from_date} - {to_date} удалены из витрины VK Ads")
-            
-        except Exception as e:
-            logger.error(f"Ошибка при удалении данных из витрины VK Ads: {e}")
-            raise
-    
     def build_materialized_view(self, from_date: date, to_date: date):
-        """Построение материализованной витрины VK Ads."""
+        """Построение материализованной витрины VK Ads с атомарной заменой партиций."""
         logger.info(f"Построение витрины VK Ads за период {from_date} - {to_date}")
         
         try:
-            insert_sql = """
-            INSERT INTO zakaz.dm_vk_ads_daily
+            select_sql = """
             SELECT
               stat_date,
               coalesce(a.city, lowerUTF8(trim(BOTH ' ' FROM r.city_raw))) AS city,
@@ -103,15 +88,13 @@ class DmVkAdsBuilder:
             GROUP BY stat_date, city
             """
             
-            result = self.ch_client.command(
-                insert_sql,
-                parameters={
-                    'from_date': from_date,
-                    'to_date': to_date
-                }
-            )
+            result = self.rebuilder.rebuild(from_date, to_date, DM_VK_ADS_COLUMNS, select_sql)
             
-            logger.info(f"Витрина VK Ads построена успешно. Обработано строк: {result}")
+            logger.info(
+                f"Витрина VK Ads построена успешно. Заменено партиций: {result['partitions']}, "
+                f"строк: {result['rows']}, байт: {result['bytes']}"
+            )
+            return result
             
         except Exception as e:
             logger.error(f"Ошибка при построении витрины VK Ads: {e}")
@@ -132,10 +115,8 @@ class DmVkAdsBuilder:
         logger.info(f"Запуск построения витрины dm_vk_ads_daily за период {from_date} - {to_date}")
         
         try:
-            # Шаг 1: Удаление целевого диапазона из витрины
-            self.delete_range(from_date, to_date)
-            
-            # Шаг 2: Вставка "с нуля" с учетом алиасов городов
+            # Сборка диапазона "с нуля" с учетом алиасов городов
+            # в теневой таблице и замена затронутых партиций
             self.build_materialized_view(from_date, to_date)
             
             logger.info("Построение витрины dm_vk_ads_daily завершено успешно")
@@ -3,14 +3,22 @@
 Инкрементальный билдер витрины VK Ads dm_vk_ads_daily.
 """
 import os
+import sys
 import logging
 import argparse
 from datetime import datetime, date, timedelta
-from typing import Optional, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import clickhouse_connect
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from loader.build_dm_vk_ads import DM_VK_ADS_COLUMNS  # noqa: E402
+from loader.changed_partitions import ChangedPartitionsLog  # noqa: E402
+from loader.etl_runs import EtlRunRecorder  # noqa: E402
+from loader.partition_swap import PartitionSwapRebuilder  # noqa: E402
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -33,154 +41,133 @@ class DmVkIncrementalBuilder:
         self.ch_password = os.getenv('CLICKHOUSE_PASSWORD')
         self.ch_database = os.getenv('CLICKHOUSE_DATABASE', 'zakaz')
         
-        # NRT настройки
-        self.cdc_window_days = int(os.getenv('CDC_WINDOW_DAYS', '3'))
+        # Число партиций, пересобираемых параллельно
+        self.build_workers = int(os.getenv('DM_BUILD_WORKERS', '2'))
         
         # Инициализация клиента
         self._init_clickhouse_client()
+        self.rebuilder = PartitionSwapRebuilder(
+            self.ch_client, self.ch_database, 'dm_vk_ads_daily', 'stat_date',
+            client_factory=self._new_clickhouse_client
+        )
+        self.change_log = ChangedPartitionsLog(self.ch_client, 'zakaz.stg_vk_ads_daily')
+    
+    def _new_clickhouse_client(self):
+        """Новый ClickHouse клиент (отдельный для каждого потока пересборки)."""
+        return clickhouse_connect.get_client(
+            host=self.ch_host,
+            port=self.ch_port,
+            username=self.ch_user,
+            password=self.ch_password,
+            database=self.ch_database
+        )
     
     def _init_clickhouse_client(self):
         """Инициализация ClickHouse клиента."""
         try:
-            self.ch_client = clickhouse_connect.get_client(
-                host=self.ch_host,
-                port=self.ch_port,
-                username=self.ch_user,
-                password=self.ch_password,
-                database=self.ch_database
-            )
+            self.ch_client = self._new_clickhouse_client()
             logger.info("ClickHouse клиент инициализирован")
         except Exception as e:
             logger.error(f"Ошибка инициализации ClickHouse клиента: {e}")
             raise
     
-    def get_affected_dates(self) -> List[date]:
-        """Определение затронутых дат на основе данных в стейджинге."""
+    def get_affected_dates(self) -> Tuple[List[date], int]:
+        """Даты, изменённые CDC после последней пересборки, и ``_ver`` для сдвига маркера."""
         try:
-            query = """
-            SELECT DISTINCT stat_date
-            FROM zakaz.stg_vk_ads_daily
-            WHERE stat_date >= today() - %(days)s
-            ORDER BY stat_date
-            """
-            
-            result = self.ch_client.query(
-                query,
-                parameters={
-                    'days': self.cdc_window_days
-                }
-            )
-            
-            dates = [row[0] for row in result.result_rows]
+            dates, pending_ver = self.change_log.pending('build_dm_vk_incr')
             logger.info(f"Найдено {len(dates)} затронутых дат: {dates}")
-            return dates
+            return dates, pending_ver
             
         except Exception as e:
             logger.error(f"Ошибка определения затронутых дат: {e}")
             raise
     
-    def rebuild_date_partition(self, target_date: date):
-        """Пересборка партиции за конкретную дату."""
-        logger.info(f"Пересборка партиции VK Ads за дату {target_date}")
+    def rebuild_dates(self, dates: List[date]) -> Dict[str, Any]:
+        """Пересборка затронутых дат: по одному запросу на партицию, партиции параллельно."""
+        logger.info(f"Пересборка витрины VK Ads за даты {dates}")
         
         try:
-            # Шаг 1: Определение активных ключей (последний оп - UPSERT)
-            active_keys_sql = """
-            WITH last_ops AS (
-              SELECT stat_date, city, campaign_id, ad_id,
-                     argMax(_op, _ver) AS last_op
-              FROM zakaz.stg_vk_ads_daily
-              WHERE stat_date = %(target_date)s
-              GROUP BY stat_date, city, campaign_id, ad_id
-            )
-            SELECT stat_date, city, campaign_id, ad_id
-            FROM last_ops 
-            WHERE last_op = 'UPSERT'
-            """
-            
-            # Временная таблица с активными ключами
-            temp_table = f"temp_vk_active_keys_{int(target_date.strftime('%Y%m%d'))}"
-            
-            self.ch_client.command(f"""
-                CREATE TEMPORARY TABLE {temp_table} (
-                    stat_date Date,
-                    city String,
-                    campaign_id String,
-                    ad_id String
-                ) ENGINE = Memory
-            """)
-            
-            self.ch_client.command(f"""
-                INSERT INTO {temp_table}
-                {active_keys_sql}
-            """, parameters={'target_date': target_date})
-            
-            # Шаг 2: Удаление существующих данных за дату
-            delete_sql = """
-            ALTER TABLE zakaz.dm_vk_ads_daily DELETE 
-            WHERE stat_date = %(target_date)s
-            """
-            
-            self.ch_client.command(
-                delete_sql,
-                parameters={'target_date': target_date}
-            )
-            
-            # Шаг 3: Вставка новых данных с учетом только активных ключей
-            insert_sql = f"""
-            INSERT INTO zakaz.dm_vk_ads_daily
+            # Активные ключи всех дат партиции и агрегаты считаются одним
+            # запросом прямо в теневую таблицу, партиция заменяется атомарно
+            select_sql = """
             SELECT
-                s.stat_date,
-                coalesce(a.city, lowerUTF8(trim(BOTH ' ' FROM s.city))) AS city,
-                sum(s.impressions) AS impressions,
-                sum(s.clicks)      AS clicks,
-                toUInt64(sum(s.spend) * 100) AS spend,
-                max(s._ver)        AS _ver
-            FROM zakaz.stg_vk_ads_daily AS s
-            INNER JOIN {temp_table} AS k
-              ON s.stat_date = k.stat_date
-             AND s.city = k.city
-             AND s.campaign_id = k.campaign_id
-             AND s.ad_id = k.ad_id
+                k.stat_date,
+                coalesce(a.city, lowerUTF8(trim(BOTH ' ' FROM k.city))) AS city,
+                sum(k.impr)                    AS impressions,
+                sum(k.clk)                     AS clicks,
+                toUInt64(sum(k.cost) * 100)    AS spend,
+                max(k.ver)                     AS _ver
+            FROM
+            (
+                -- Активные ключи: последняя версия ключа — UPSERT
+                SELECT
+                    stat_date, city, campaign_id, ad_id,
+                    argMax(impressions, _ver) AS impr,
+                    argMax(clicks, _ver)      AS clk,
+                    argMax(spend, _ver)       AS cost,
+                    argMax(_op, _ver)         AS last_op,
+                    max(_ver)                 AS ver
+                FROM zakaz.stg_vk_ads_daily
+                WHERE stat_date IN %(dates)s
+                GROUP BY stat_date, city, campaign_id, ad_id
+            ) AS k
             LEFT JOIN zakaz.dim_city_alias AS a
-              ON lowerUTF8(a.alias) = lowerUTF8(s.city)
-            WHERE s.stat_date = %(target_date)s
-              AND s._op = 'UPSERT'
-            GROUP BY s.stat_date, city
+              ON lowerUTF8(a.alias) = lowerUTF8(k.city)
+            WHERE k.last_op = 'UPSERT'
+            GROUP BY k.stat_date, city
             """
             
-            result = self.ch_client.command(
-                insert_sql,
-                parameters={'target_date': target_date}
+            result = self.rebuilder.rebuild_dates(
+                dates, DM_VK_ADS_COLUMNS, select_sql, max_workers=self.build_workers
             )
             
-            logger.info(f"Пересборка партиции VK Ads за {target_date} завершена. Обработано строк: {result}")
+            logger.info(
+                f"Пересборка витрины VK Ads завершена. Партиций: {result['partitions']}, "
+                f"строк: {result['rows']}, байт: {result['bytes']}"
+            )
+            return result
             
         except Exception as e:
-            logger.error(f"Ошибка пересборки партиции VK Ads за {target_date}: {e}")
+            logger.error(f"Ошибка пересборки витрины VK Ads за даты {dates}: {e}")
             raise
     
     def build_dm_vk_incremental(self):
         """Основной метод инкрементального построения витрины."""
         logger.info("Запуск инкрементального построения витрины dm_vk_ads_daily")
+        recorder = EtlRunRecorder(self.ch_client, 'build_dm_vk_incr')
         
         try:
             # Шаг 1: Определение затронутых дат
-            affected_dates = self.get_affected_dates()
+            with recorder.stage('affected_dates') as counters:
+                affected_dates, pending_ver = self.get_affected_dates()
+                counters['rows_read'] = len(affected_dates)
             
             if not affected_dates:
                 logger.info("Нет затронутых дат для обработки")
                 return
+            recorder.from_date, recorder.to_date = min(affected_dates), max(affected_dates)
+            
+            # Шаг 2: Пересборка затронутых партиций
+            with recorder.stage('rebuild') as counters:
+                result = self.rebuild_dates(affected_dates)
+                counters['rows_written'] = result['rows']
+            for item in result['details']:
+                for name, seconds in item['seconds'].items():
+                    recorder.record(
+                        f"{name}:{item['partition']}", item['started_at'][name], seconds,
+                        rows_written=item['built'] if name == 'build' else 0
+                    )
             
-            # Шаг 2: Пересборка партиций для каждой даты
-            for target_date in affected_dates:
-                self.rebuild_date_partition(target_date)
+            # Шаг 3: Сдвиг маркера журнала изменений только после успешной замены
+            self.change_log.commit('build_dm_vk_incr', pending_ver)
             
             logger.info(f"Инкрементальное построение витрины VK Ads завершено. Обработано дат: {len(affected_dates)}")
             
         except Exception as e:
             logger.error(f"Ошибка при инкрементальном построении витрины VK Ads: {e}")
             raise
+        finally:
+            recorder.flush()
     
     def calculate_sli_freshness(self):
         """Расчет SLI для свежести данных."""
@@ -0,0 +1,160 @@
+"""
+Конвейерная CDC-загрузка: fetch -> transform -> insert.
+
+Каждый этап работает в своём потоке, этапы связаны ограниченными очередями,
+поэтому в памяти одновременно не больше ``queue_size`` страниц и батчей, а
+вставка начинается сразу после первой страницы. Батч отправляется на вставку,
+как только набрано ``batch_size`` строк или следующая страница ещё не готова,
+т.е. при медленном API батчи мельче, при быстром — укрупняются.
+
+После каждого вставленного батча вызывается ``on_commit`` с максимальным
+значением ``watermark_of`` по исходным записям батча и всех предыдущих, так что
+падение посреди прогона переигрывает только невставленный хвост. Ошибка любого
+этапа останавливает остальные и пробрасывается из :meth:`CdcPipeline.run`.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class _Stopped(Exception):
+    """Конвейер остановлен из-за ошибки другого этапа."""
+
+
+class CdcPipeline:
+    """Потоковая загрузка страниц источника в стейджинг с ограниченными очередями."""
+
+    def __init__(
+        self,
+        pages: Iterable[List[Dict[str, Any]]],
+        transform: Callable[[Dict[str, Any]], Dict[str, Any]],
+        insert_batch: Callable[[List[Dict[str, Any]]], None],
+        batch_size: int = 5000,
+        queue_size: int = 4,
+        watermark_of: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        on_commit: Optional[Callable[[Any], None]] = None,
+    ):
+        self.pages = pages
+        self.transform = transform
+        self.insert_batch = insert_batch
+        self.batch_size = max(1, int(batch_size))
+        self.watermark_of = watermark_of
+        self.on_commit = on_commit
+        self._pages: queue.Queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._batches: queue.Queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self.stats: Dict[str, Any] = {
+            'pages': 0, 'rows_read': 0, 'rows_written': 0, 'batches': 0,
+            'first_insert_s': None, 'busy_s': {'fetch': 0.0, 'transform': 0.0, 'insert': 0.0},
+        }
+
+    def _put(self, target: queue.Queue, item: Any):
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise _Stopped()
+
+    def _get(self, source: queue.Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        raise _Stopped()
+
+    def _stage(self, name: str, body: Callable[[], None]):
+        def target():
+            try:
+                body()
+            except _Stopped:
+                pass
+            except Exception as e:
+                logger.error(f"Ошибка этапа {name} CDC-конвейера: {e}")
+                self._errors.append(e)
+                self._stop.set()
+        return threading.Thread(target=target, name=f"cdc-{name}", daemon=True)
+
+    def _fetch(self):
+        busy = self.stats['busy_s']
+        started = time.monotonic()
+        for page in self.pages:
+            busy['fetch'] += time.monotonic() - started
+            if page:
+                self.stats['pages'] += 1
+                self.stats['rows_read'] += len(page)
+                self._put(self._pages, page)
+            started = time.monotonic()
+        self._put(self._pages, _DONE)
+
+    def _transform(self):
+        busy = self.stats['busy_s']
+        rows: List[Dict[str, Any]] = []
+        # mark — по всем преобразованным записям, flushed_mark — по уже отправленным
+        mark = flushed_mark = None
+        while True:
+            page = self._get(self._pages)
+            if page is _DONE:
+                break
+            started = time.monotonic()
+            for record in page:
+                rows.append(self.transform(record))
+                if self.watermark_of is not None:
+                    value = self.watermark_of(record)
+                    if value is not None and (mark is None or value > mark):
+                        mark = value
+            busy['transform'] += time.monotonic() - started
+            if len(rows) >= self.batch_size or self._pages.empty():
+                # Отметку всех страниц несёт только последний батч сброса
+                for i in range(0, len(rows), self.batch_size):
+                    last = i + self.batch_size >= len(rows)
+                    self._put(self._batches, (rows[i:i + self.batch_size], mark if last else flushed_mark))
+                rows = []
+                flushed_mark = mark
+        if rows:
+            self._put(self._batches, (rows, mark))
+        self._put(self._batches, _DONE)
+
+    def _insert(self, run_started: float):
+        busy = self.stats['busy_s']
+        while True:
+            item = self._get(self._batches)
+            if item is _DONE:
+                break
+            batch, mark = item
+            started = time.monotonic()
+            self.insert_batch(batch)
+            if self.stats['first_insert_s'] is None:
+                self.stats['first_insert_s'] = round(time.monotonic() - run_started, 3)
+            self.stats['batches'] += 1
+            self.stats['rows_written'] += len(batch)
+            if self.on_commit is not None and mark is not None:
+                self.on_commit(mark)
+            busy['insert'] += time.monotonic() - started
+
+    def run(self) -> Dict[str, Any]:
+        """Прогон конвейера; возвращает число страниц, строк, батчей и занятость этапов."""
+        run_started = time.monotonic()
+        threads = [
+            self._stage('fetch', self._fetch),
+            self._stage('transform', self._transform),
+            self._stage('insert', lambda: self._insert(run_started)),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+        self.stats['busy_s'] = {name: round(value, 3) for name, value in self.stats['busy_s'].items()}
+        self.stats['total_s'] = round(time.monotonic() - run_started, 3)
+        return self.stats
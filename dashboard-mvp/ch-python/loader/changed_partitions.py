@@ -0,0 +1,90 @@
+"""
+Журнал изменённых партиций стейджинга (meta.changed_partitions).
+
+CDC-загрузчики после каждого вставленного батча записывают затронутые даты
+стейджинговой таблицы вместе с ``_ver`` батча. Инкрементальные билдеры витрин
+берут только записи с ``_ver`` больше своего маркера и после успешной
+пересборки сдвигают маркер (``meta.watermarks``, ``stream='changed_partitions'``),
+поэтому объём пересборки пропорционален объёму изменений, а не окну CDC.
+
+Маркер корректен при одном последовательном писателе на стейджинговую таблицу
+(таймер CDC не перекрывается сам с собой): ``_ver`` записей журнала такой
+таблицы возрастает в порядке их вставки.
+"""
+import logging
+from collections import Counter
+from datetime import date
+from typing import Any, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHANGED_PARTITIONS_TABLE = 'meta.changed_partitions'
+CHANGED_PARTITIONS_COLUMNS = ['table_name', 'partition_date', '_ver', 'rows']
+
+
+class ChangedPartitionsLog:
+    """Запись и потребление журнала изменений одной стейджинговой таблицы."""
+
+    def __init__(self, ch_client, table_name: str):
+        self.ch_client = ch_client
+        self.table_name = table_name
+
+    def record(self, dates: Iterable[date], ver: int):
+        """Запись дат батча (по строке на дату с числом строк) с ``_ver`` батча."""
+        counts = Counter(dates)
+        if not counts:
+            return
+        rows = [
+            [self.table_name, partition_date, int(ver), count]
+            for partition_date, count in sorted(counts.items())
+        ]
+        self.ch_client.insert(CHANGED_PARTITIONS_TABLE, rows, column_names=CHANGED_PARTITIONS_COLUMNS)
+        logger.debug(f"Журнал изменений {self.table_name}: даты {sorted(counts)}, _ver={ver}")
+
+    def get_marker(self, consumer: str) -> int:
+        """Последний обработанный потребителем ``_ver`` (0, если маркера нет)."""
+        result = self.ch_client.query(
+            """
+            SELECT wm_value_s
+            FROM meta.watermarks FINAL
+            WHERE source = %(source)s AND stream = 'changed_partitions'
+            """,
+            parameters={'source': consumer}
+        )
+        if not result.result_rows:
+            return 0
+        try:
+            return int(result.result_rows[0][0])
+        except ValueError:
+            logger.warning(f"Неверный формат маркера {consumer}: {result.result_rows[0][0]}, начинаем с 0")
+            return 0
+
+    def pending(self, consumer: str) -> Tuple[List[date], int]:
+        """Даты, изменённые после маркера потребителя, и максимальный ``_ver`` среди них."""
+        marker = self.get_marker(consumer)
+        result = self.ch_client.query(
+            f"""
+            SELECT partition_date, max(_ver)
+            FROM {CHANGED_PARTITIONS_TABLE}
+            WHERE table_name = %(table_name)s AND _ver > %(marker)s
+            GROUP BY partition_date
+            ORDER BY partition_date
+            """,
+            parameters={'table_name': self.table_name, 'marker': marker}
+        )
+        rows: List[Any] = result.result_rows
+        dates = [row[0] for row in rows]
+        max_ver = max((int(row[1]) for row in rows), default=marker)
+        return dates, max_ver
+
+    def commit(self, consumer: str, ver: int):
+        """Сдвиг маркера потребителя после успешной обработки."""
+        self.ch_client.command(
+            """
+            INSERT INTO meta.watermarks (source, stream, wm_type, wm_value_s, updated_at)
+            VALUES (%(source)s, 'changed_partitions', '_ver', %(ver)s, now())
+            """,
+            parameters={'source': consumer, 'ver': str(int(ver))}
+        )
+        logger.debug(f"Маркер журнала изменений {consumer} = {ver}")
+
@@ -0,0 +1,72 @@
+"""
+Запись этапов прогона в meta.etl_runs.
+
+Каждый этап — отдельная строка с общим ``run_id`` прогона, именем этапа в
+``stage`` и длительностью в ``duration_ms``
+(``infra/clickhouse/migrations/2025-etl-runs-stages.sql``). Строка всего
+прогона, которую пишет ``ops/run_job.sh``, имеет пустой ``stage``.
+"""
+import logging
+import os
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ETL_RUNS_COLUMNS = [
+    'job', 'stage', 'run_id', 'started_at', 'finished_at', 'duration_ms', 'status',
+    'rows_written', 'rows_read', 'err_msg', 'from_date', 'to_date', 'host', 'version_tag',
+]
+
+
+class EtlRunRecorder:
+    """Накопление строк этапов одного прогона и их запись в meta.etl_runs."""
+
+    def __init__(self, ch_client, job: str, from_date: Optional[date] = None,
+                 to_date: Optional[date] = None):
+        self.ch_client = ch_client
+        self.job = job
+        self.run_id = uuid.uuid4()
+        self.from_date = from_date or date(1970, 1, 1)
+        self.to_date = to_date or date(1970, 1, 1)
+        self.host = socket.gethostname()
+        self.version_tag = os.getenv('GIT_COMMIT', 'local')
+        self.rows: List[List[Any]] = []
+
+    def record(self, stage: str, started_at: datetime, seconds: float, status: str = 'ok',
+               rows_written: int = 0, rows_read: int = 0, err_msg: str = ''):
+        """Добавление строки этапа длительностью ``seconds``."""
+        finished_at = datetime.fromtimestamp(started_at.timestamp() + seconds)
+        self.rows.append([
+            self.job, stage, self.run_id, started_at, finished_at, int(seconds * 1000), status,
+            int(rows_written), int(rows_read), err_msg, self.from_date, self.to_date,
+            self.host, self.version_tag,
+        ])
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, int]]:
+        """Замер этапа; в отдаваемый словарь можно записать rows_written/rows_read."""
+        counters: Dict[str, int] = {}
+        started_at = datetime.now()
+        started = time.monotonic()
+        try:
+            yield counters
+        except Exception as e:
+            self.record(name, started_at, time.monotonic() - started, status='error',
+                        err_msg=str(e), **counters)
+            raise
+        self.record(name, started_at, time.monotonic() - started, **counters)
+
+    def flush(self):
+        """Запись накопленных строк; ошибка записи не роняет прогон."""
+        if not self.rows:
+            return
+        try:
+            self.ch_client.insert('meta.etl_runs', self.rows, column_names=ETL_RUNS_COLUMNS)
+            self.rows = []
+        except Exception as e:
+            logger.warning(f"Не удалось записать этапы прогона {self.job} в meta.etl_runs: {e}")
@@ -0,0 +1,262 @@
+"""
+Оркестратор NRT-задач: DAG вместо независимых systemd таймеров.
+
+Задачи запускаются отдельными процессами (``ops/run_job.sh`` для ch-python
+задач, загрузчик QTickets API, Gmail ingest). Корни DAG с ``min_interval_min``
+пропускаются, если их последний успешный запуск оркестратором был недавно
+(по ``meta.etl_runs``). Инкрементальные билдеры запускаются только после
+успешной CDC-загрузки и только если водяной знак источника ушёл вперёд —
+в журнале ``meta.changed_partitions`` есть записи новее маркера билдера.
+Независимые ветки выполняются параллельно.
+
+Каждый прогон пишет в ``meta.etl_runs`` (``job='orchestrate'``) строку на
+задачу (``stage='job:<задача>'``, для задач критического пути —
+``'critical:<задача>'``) и строку ``critical_path`` с длиной критического пути.
+"""
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from loader.changed_partitions import ChangedPartitionsLog
+from loader.etl_runs import EtlRunRecorder
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+ORCHESTRATOR_JOB = 'orchestrate'
+
+
+class DagJob:
+    """Узел DAG: команда, зависимости и условия запуска."""
+
+    def __init__(
+        self,
+        name: str,
+        command: Sequence[str],
+        upstream: Sequence[str] = (),
+        cwd: Optional[Path] = None,
+        has_work: Optional[Callable[[], bool]] = None,
+        min_interval_min: int = 0,
+        timeout: int = 900,
+    ):
+        self.name = name
+        self.command = list(command)
+        self.upstream = list(upstream)
+        self.cwd = cwd or PROJECT_ROOT
+        self.has_work = has_work
+        self.min_interval_min = min_interval_min
+        self.timeout = timeout
+
+
+class JobResult:
+    """Итог задачи в прогоне: статус ok|error|skipped и время относительно старта."""
+
+    def __init__(self, name: str, status: str, started_at: datetime, start_offset: float,
+                 seconds: float, reason: str = ''):
+        self.name = name
+        self.status = status
+        self.started_at = started_at
+        self.start_offset = start_offset
+        self.seconds = seconds
+        self.reason = reason
+
+    @property
+    def finish_offset(self) -> float:
+        return self.start_offset + self.seconds
+
+
+def default_jobs(ch_client) -> List[DagJob]:
+    """DAG NRT-контура: CDC -> инкрементальные витрины, QTickets API и Gmail независимо."""
+    run_job = ['bash', 'ops/run_job.sh']
+    sales_log = ChangedPartitionsLog(ch_client, 'zakaz.stg_sales_events')
+    vk_log = ChangedPartitionsLog(ch_client, 'zakaz.stg_vk_ads_daily')
+    return [
+        DagJob('cdc_qtickets', run_job + ['cdc_qtickets']),
+        DagJob('cdc_vk', run_job + ['cdc_vk']),
+        DagJob(
+            'build_dm_sales_incr', run_job + ['build_dm_sales_incr', '--calculate-sli'],
+            upstream=['cdc_qtickets'],
+            has_work=lambda: bool(sales_log.pending('build_dm_sales_incr')[0]),
+        ),
+        DagJob(
+            'build_dm_vk_incr', run_job + ['build_dm_vk_incr', '--calculate-sli'],
+            upstream=['cdc_vk'],
+            has_work=lambda: bool(vk_log.pending('build_dm_vk_incr')[0]),
+        ),
+        DagJob(
+            'qtickets_api',
+            [sys.executable, '-m', 'integrations.qtickets_api.loader', '--envfile',
+             os.getenv('QTICKETS_API_ENVFILE', '/opt/zakaz_dashboard/secrets/.env.qtickets_api')],
+            min_interval_min=int(os.getenv('ORCH_QTICKETS_API_INTERVAL_MIN', '30')),
+        ),
+        DagJob(
+            'gmail-ingest',
+            [os.getenv('GMAIL_INGEST_PYTHON', str(PROJECT_ROOT / 'mail-python' / '.venv' / 'bin' / 'python')),
+             'gmail_ingest.py'],
+            cwd=PROJECT_ROOT / 'mail-python',
+            min_interval_min=int(os.getenv('ORCH_GMAIL_INTERVAL_MIN', '15')),
+        ),
+    ]
+
+
+class DagOrchestrator:
+    """Выполнение DAG задач с параллельными ветками и записью критического пути."""
+
+    def __init__(self, ch_client, jobs: Iterable[DagJob], max_workers: int = 4):
+        self.ch_client = ch_client
+        self.jobs: Dict[str, DagJob] = {job.name: job for job in jobs}
+        self.max_workers = max_workers
+        for job in self.jobs.values():
+            unknown = [name for name in job.upstream if name not in self.jobs]
+            if unknown:
+                raise ValueError(f"Задача {job.name}: неизвестные зависимости {unknown}")
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        state: Dict[str, int] = {}
+
+        def visit(name: str):
+            if state.get(name) == 1:
+                raise ValueError(f"Цикл в DAG через задачу {name}")
+            if state.get(name) == 2:
+                return
+            state[name] = 1
+            for upstream in self.jobs[name].upstream:
+                visit(upstream)
+            state[name] = 2
+
+        for name in self.jobs:
+            visit(name)
+
+    def _recently_ok(self, job: DagJob) -> bool:
+        """Был ли успешный запуск задачи оркестратором за последние ``min_interval_min``."""
+        if not job.min_interval_min:
+            return False
+        try:
+            result = self.ch_client.query(
+                """
+                SELECT count()
+                FROM meta.etl_runs
+                WHERE job = %(job)s AND stage IN (%(plain)s, %(critical)s) AND status = 'ok'
+                  AND started_at >= now() - toIntervalMinute(%(minutes)s)
+                """,
+                parameters={
+                    'job': ORCHESTRATOR_JOB,
+                    'plain': f"job:{job.name}",
+                    'critical': f"critical:{job.name}",
+                    'minutes': job.min_interval_min,
+                }
+            )
+            return bool(result.result_rows[0][0])
+        except Exception as e:
+            logger.warning(f"Не удалось проверить последний запуск {job.name}: {e}")
+            return False
+
+    def _skip_reason(self, job: DagJob, results: Dict[str, JobResult]) -> str:
+        failed = [
+            name for name in job.upstream
+            if name in results and results[name].status == 'error'
+        ]
+        if failed:
+            return f"ошибка зависимостей: {', '.join(failed)}"
+        if self._recently_ok(job):
+            return f"успешный запуск менее {job.min_interval_min} мин назад"
+        if job.has_work is not None:
+            try:
+                if not job.has_work():
+                    return "водяной знак источника не сдвинулся"
+            except Exception as e:
+                logger.warning(f"Не удалось проверить водяной знак для {job.name}, запускаем: {e}")
+        return ''
+
+    def _execute(self, job: DagJob):
+        logger.info(f"Запуск задачи {job.name}: {' '.join(job.command)}")
+        completed = subprocess.run(job.command, cwd=str(job.cwd), timeout=job.timeout)
+        if completed.returncode != 0:
+            raise RuntimeError(f"код завершения {completed.returncode}")
+
+    def run(self, only: Optional[Sequence[str]] = None, dry_run: bool = False) -> Dict[str, JobResult]:
+        """Один прогон DAG; ``only`` ограничивает набор задач (зависимости не добавляются)."""
+        names = [name for name in self.jobs if not only or name in only]
+        pending = {
+            name: [upstream for upstream in self.jobs[name].upstream if upstream in names]
+            for name in names
+        }
+        results: Dict[str, JobResult] = {}
+        run_started_at = datetime.now()
+        run_started = time.monotonic()
+        recorder = EtlRunRecorder(self.ch_client, ORCHESTRATOR_JOB)
+
+        def run_job(job: DagJob) -> JobResult:
+            started_at = datetime.now()
+            offset = time.monotonic() - run_started
+            status, reason = 'ok', ''
+            if dry_run:
+                status, reason = 'skipped', 'dry-run'
+            else:
+                try:
+                    self._execute(job)
+                except Exception as e:
+                    status, reason = 'error', str(e)
+                    logger.error(f"Задача {job.name} завершилась с ошибкой: {e}")
+            return JobResult(job.name, status, started_at, offset,
+                             time.monotonic() - run_started - offset, reason)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='dag') as pool:
+            running = {}
+            while pending or running:
+                ready = [name for name, deps in pending.items() if all(dep in results for dep in deps)]
+                for name in ready:
+                    del pending[name]
+                    job = self.jobs[name]
+                    reason = self._skip_reason(job, results) if not dry_run else ''
+                    if reason:
+                        logger.info(f"Задача {name} пропущена: {reason}")
+                        offset = time.monotonic() - run_started
+                        results[name] = JobResult(name, 'skipped', datetime.now(), offset, 0.0, reason)
+                        continue
+                    running[pool.submit(run_job, job)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    results[running.pop(future)] = result
+                    logger.info(f"Задача {result.name}: {result.status} за {result.seconds:.1f} с")
+
+        critical = self.critical_path(results)
+        critical_seconds = max((results[name].finish_offset for name in critical), default=0.0)
+        for result in results.values():
+            prefix = 'critical' if result.name in critical else 'job'
+            recorder.record(f"{prefix}:{result.name}", result.started_at, result.seconds,
+                            status=result.status, err_msg=result.reason)
+        failed = any(result.status == 'error' for result in results.values())
+        recorder.record('critical_path', run_started_at, critical_seconds,
+                        status='error' if failed else 'ok')
+        if not dry_run:
+            recorder.flush()
+        logger.info(f"Критический путь: {' -> '.join(critical) or '-'} ({critical_seconds:.1f} с)")
+        return results
+
+    def critical_path(self, results: Dict[str, JobResult]) -> List[str]:
+        """Цепочка, определившая длительность прогона: от позже всех завершившейся задачи вверх."""
+        executed = {name: result for name, result in results.items() if result.status != 'skipped'}
+        if not executed:
+            return []
+        name = max(executed, key=lambda item: executed[item].finish_offset)
+        path = [name]
+        while True:
+            upstream = [dep for dep in self.jobs[name].upstream if dep in executed]
+            if not upstream:
+                break
+            name = max(upstream, key=lambda item: executed[item].finish_offset)
+            path.append(name)
+        return list(reversed(path))
+
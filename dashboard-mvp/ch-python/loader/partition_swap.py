@@ -0,0 +1,345 @@
+"""
+Пересборка витрин через замену партиций вместо ALTER ... DELETE.
+
+Витрины ``dm_*`` партиционированы по ``toYYYYMM(<дата>)``. Вместо мутации
+(асинхронной, переписывающей месячные парты и гоняющейся со следующим INSERT)
+каждая затронутая партиция собирается в теневой таблице прогона
+``<table>_shadow_<run_id>`` в отдельной базе ``SHADOW_DATABASE``
+(``CREATE TABLE ... AS <table>``, та же структура и ключ партиционирования).
+Права на DDL выдаются ETL-пользователю только в этой базе, а ``REPLACE
+PARTITION ... FROM`` работает между базами:
+
+1. строки партиции вне пересобираемого диапазона копируются из витрины;
+2. пересобранные строки диапазона вставляются запросом билдера;
+3. ``ALTER TABLE <table> REPLACE PARTITION ID ... FROM <shadow>``
+   атомарно подменяет партицию — читатели видят либо старые, либо новые данные.
+
+Перед заменой проверяется, что в партиции теневой таблицы не меньше строк,
+чем записано копированием и билдером (по сводкам INSERT); слияния теневой
+таблицы остановлены, чтобы ReplacingMergeTree не схлопнул строки до проверки.
+Также ожидается завершение незавершённых мутаций витрины (например, от старых
+запусков с ALTER DELETE).
+
+Одновременные билдеры одной витрины недопустимы: каждый копирует
+непересобираемые даты из живой партиции, и последний ``REPLACE PARTITION``
+молча откатил бы даты, пересобранные другим. Поэтому теневая таблица служит
+блокировкой витрины: создав свою, прогон проверяет, нет ли в базе другой
+теневой таблицы той же витрины, и если есть — удаляет свою и завершается
+ошибкой, ничего не заменив (при одновременном старте могут отказаться оба,
+но не заменят партиции оба). Теневая таблица удаляется в конце прогона;
+оставшиеся от упавших процессов старше ``STALE_SHADOW_HOURS`` удаляются при
+следующем, до этого они блокируют пересборку витрины.
+Партиции могут обрабатываться параллельно (``max_workers``), если передан
+``client_factory`` для отдельных клиентов потоков.
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SHADOW_DATABASE = 'zakaz_shadow'
+STALE_SHADOW_HOURS = 2
+
+
+def month_partitions(from_date: date, to_date: date) -> Iterator[Tuple[str, date, date]]:
+    """Партиции ``toYYYYMM`` диапазона: (partition_id, начало, конец) с обрезкой по диапазону."""
+    current = from_date.replace(day=1)
+    while current <= to_date:
+        next_month = (current + timedelta(days=32)).replace(day=1)
+        yield (
+            current.strftime('%Y%m'),
+            max(current, from_date),
+            min(next_month - timedelta(days=1), to_date),
+        )
+        current = next_month
+
+
+def _written_rows(summary: Any) -> int:
+    """Число записанных строк из сводки INSERT (QuerySummary clickhouse_connect)."""
+    return int(getattr(summary, 'written_rows', 0) or 0)
+
+
+class PartitionSwapRebuilder:
+    """Атомарная пересборка диапазона дат витрины через теневую таблицу."""
+
+    def __init__(
+        self,
+        ch_client,
+        database: str,
+        table: str,
+        date_column: str,
+        mutation_timeout: float = 600.0,
+        poll_interval: float = 1.0,
+        client_factory: Optional[Callable[[], Any]] = None,
+        shadow_database: str = SHADOW_DATABASE,
+    ):
+        self.ch_client = ch_client
+        self.client_factory = client_factory
+        self._local = threading.local()
+        self._clients: List[Any] = []
+        self._clients_lock = threading.Lock()
+        self.database = database
+        self.shadow_database = shadow_database
+        self.table = table
+        self.date_column = date_column
+        self.mutation_timeout = mutation_timeout
+        self.poll_interval = poll_interval
+
+    @property
+    def target(self) -> str:
+        return f"{self.database}.{self.table}"
+
+    def shadow_name(self, run_id: str) -> str:
+        """Имя теневой таблицы прогона (без базы)."""
+        return f"{self.table}_shadow_{run_id}"
+
+    def _shadows(self, older_than_hours: int = 0) -> List[str]:
+        """Теневые таблицы витрины в ``shadow_database`` (все или старше ``older_than_hours``)."""
+        return [
+            name for (name,) in self.ch_client.query(
+                """
+                SELECT name
+                FROM system.tables
+                WHERE database = %(database)s AND name LIKE %(pattern)s
+                  AND metadata_modification_time <= now() - toIntervalHour(%(hours)s)
+                """,
+                parameters={
+                    'database': self.shadow_database,
+                    'pattern': f"{self.table}\\_shadow\\_%",
+                    'hours': older_than_hours,
+                }
+            ).result_rows
+        ]
+
+    def drop_stale_shadows(self):
+        """Удаление теневых таблиц, оставшихся от упавших прогонов."""
+        try:
+            for name in self._shadows(older_than_hours=STALE_SHADOW_HOURS):
+                logger.warning(f"Удаление теневой таблицы упавшего прогона {self.shadow_database}.{name}")
+                self.ch_client.command(f"DROP TABLE IF EXISTS {self.shadow_database}.{name}")
+        except Exception as e:
+            logger.warning(f"Не удалось очистить старые теневые таблицы {self.target}: {e}")
+
+    def wait_for_mutations(self, client=None):
+        """Ожидание завершения мутаций витрины, чтобы замена не гонялась с ними."""
+        client = client or self.ch_client
+        deadline = time.monotonic() + self.mutation_timeout
+        while True:
+            pending = client.query(
+                """
+                SELECT count()
+                FROM system.mutations
+                WHERE database = %(database)s AND table = %(table)s AND is_done = 0
+                """,
+                parameters={'database': self.database, 'table': self.table}
+            ).result_rows[0][0]
+            if not pending:
+                return
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Мутации {self.target} не завершились за {self.mutation_timeout} с ({pending} в очереди)"
+                )
+            logger.info(f"Ожидание завершения мутаций {self.target}: {pending}")
+            time.sleep(self.poll_interval)
+
+    def _shadow_part_stats(self, client, shadow_name: str, partition_id: str) -> Tuple[int, int]:
+        row = client.query(
+            """
+            SELECT sum(rows), sum(bytes_on_disk)
+            FROM system.parts
+            WHERE database = %(database)s AND table = %(table)s
+              AND partition_id = %(partition_id)s AND active
+            """,
+            parameters={
+                'database': self.shadow_database,
+                'table': shadow_name,
+                'partition_id': partition_id,
+            }
+        ).result_rows[0]
+        return int(row[0] or 0), int(row[1] or 0)
+
+    def rebuild(
+        self,
+        from_date: date,
+        to_date: date,
+        columns: Sequence[str],
+        select_sql: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        max_workers: int = 1,
+    ) -> Dict[str, Any]:
+        """
+        Пересборка непрерывного диапазона ``[from_date, to_date]``.
+
+        ``select_sql`` возвращает строки для ``columns`` за
+        ``%(from_date)s``..``%(to_date)s``; он выполняется отдельно для каждой
+        партиции с датами, обрезанными по её границам. Возвращает число
+        заменённых партиций, строк и байт (по ``system.parts`` теневой таблицы)
+        и время начала и длительности этапов copy/build/swap каждой партиции.
+        """
+        tasks = [
+            (
+                partition_id,
+                f"{self.date_column} NOT BETWEEN %(from_date)s AND %(to_date)s",
+                {'from_date': part_from, 'to_date': part_to},
+            )
+            for partition_id, part_from, part_to in month_partitions(from_date, to_date)
+        ]
+        return self._run(tasks, columns, select_sql, parameters, max_workers)
+
+    def rebuild_dates(
+        self,
+        dates: Iterable[date],
+        columns: Sequence[str],
+        select_sql: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        max_workers: int = 1,
+    ) -> Dict[str, Any]:
+        """
+        Пересборка набора (не обязательно подряд идущих) дат.
+
+        ``select_sql`` получает ``%(dates)s`` — даты одной партиции — и
+        ``%(from_date)s``/``%(to_date)s`` — их минимум и максимум. Остальные
+        даты партиции переносятся из витрины без изменений.
+        """
+        by_partition: Dict[str, List[date]] = {}
+        for value in sorted(set(dates)):
+            by_partition.setdefault(value.strftime('%Y%m'), []).append(value)
+        tasks = [
+            (
+                partition_id,
+                f"{self.date_column} NOT IN %(dates)s",
+                {'dates': part_dates, 'from_date': part_dates[0], 'to_date': part_dates[-1]},
+            )
+            for partition_id, part_dates in by_partition.items()
+        ]
+        return self._run(tasks, columns, select_sql, parameters, max_workers)
+
+    def _client(self):
+        # Параллельные партиции идут через собственные клиенты: одна HTTP-сессия
+        # ClickHouse не допускает одновременных запросов.
+        if self.client_factory is None:
+            return self.ch_client
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.client_factory()
+            with self._clients_lock:
+                self._clients.append(client)
+        return client
+
+    def _close_clients(self):
+        """Закрытие клиентов потоков, открытых через ``client_factory``."""
+        with self._clients_lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            try:
+                client.close()
+            except Exception as e:
+                logger.warning(f"Не удалось закрыть клиент ClickHouse потока пересборки: {e}")
+        # Потоки пула завершены, их thread-local клиенты больше не нужны
+        self._local = threading.local()
+
+    def _run(
+        self,
+        tasks: List[Tuple[str, str, Dict[str, Any]]],
+        columns: Sequence[str],
+        select_sql: str,
+        parameters: Optional[Dict[str, Any]],
+        max_workers: int,
+    ) -> Dict[str, Any]:
+        column_list = ', '.join(columns)
+        details: List[Dict[str, Any]] = []
+        if not tasks:
+            return {'partitions': 0, 'rows': 0, 'bytes': 0, 'details': details}
+        workers = max(1, min(int(max_workers or 1), len(tasks)))
+        parallel = workers > 1 and self.client_factory is not None
+        shadow_name = self.shadow_name(uuid.uuid4().hex[:12])
+        shadow = f"{self.shadow_database}.{shadow_name}"
+
+        def run_partition(task: Tuple[str, str, Dict[str, Any]]) -> Dict[str, Any]:
+            partition_id, keep_filter, bounds = task
+            client = self._client() if parallel else self.ch_client
+            params = {**bounds, 'partition_id': int(partition_id)}
+            timings: Dict[str, float] = {}
+            started_at: Dict[str, datetime] = {}
+
+            started_at['copy'], started = datetime.now(), time.monotonic()
+            # Строки партиции вне пересобираемых дат переносятся без изменений
+            copied = _written_rows(client.command(
+                f"""
+                INSERT INTO {shadow}
+                SELECT * FROM {self.target}
+                WHERE toYYYYMM({self.date_column}) = %(partition_id)s
+                  AND {keep_filter}
+                """,
+                parameters=params
+            ))
+            timings['copy'] = time.monotonic() - started
+
+            started_at['build'], started = datetime.now(), time.monotonic()
+            built = _written_rows(client.command(
+                f"INSERT INTO {shadow} ({column_list}) {select_sql}",
+                parameters={**(parameters or {}), **params}
+            ))
+            timings['build'] = time.monotonic() - started
+
+            started_at['swap'], started = datetime.now(), time.monotonic()
+            rows, bytes_on_disk = self._shadow_part_stats(client, shadow_name, partition_id)
+            if rows < copied + built:
+                raise RuntimeError(
+                    f"Партиция {partition_id} теневой таблицы {shadow} неполная: "
+                    f"строк={rows}, скопировано={copied}, собрано={built}; замена отменена"
+                )
+            self.wait_for_mutations(client)
+            client.command(
+                f"ALTER TABLE {self.target} REPLACE PARTITION ID '{partition_id}' FROM {shadow}"
+            )
+            client.command(f"ALTER TABLE {shadow} DROP PARTITION ID '{partition_id}'")
+            timings['swap'] = time.monotonic() - started
+
+            logger.info(
+                f"Партиция {self.target} {partition_id} заменена: строк={rows} "
+                f"(скопировано={copied}, собрано={built}), байт={bytes_on_disk}"
+            )
+            return {
+                'partition': partition_id,
+                'rows': rows,
+                'copied': copied,
+                'built': built,
+                'bytes': bytes_on_disk,
+                'started_at': started_at,
+                'seconds': {name: round(value, 3) for name, value in timings.items()},
+            }
+
+        self.drop_stale_shadows()
+        self.wait_for_mutations(self.ch_client)
+        self.ch_client.command(f"CREATE TABLE {shadow} AS {self.target}")
+        try:
+            # Теневая таблица — блокировка витрины: другой живой прогон откатил бы наши даты
+            others = [name for name in self._shadows() if name != shadow_name]
+            if others:
+                raise RuntimeError(
+                    f"Витрина {self.target} уже пересобирается другим прогоном "
+                    f"({self.shadow_database}.{others[0]}); пересборка отменена"
+                )
+            # Слияния ReplacingMergeTree могли бы схлопнуть строки до проверки
+            self.ch_client.command(f"SYSTEM STOP MERGES {shadow}")
+            if not parallel:
+                details = [run_partition(task) for task in tasks]
+            else:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='partition-swap') as pool:
+                    details = list(pool.map(run_partition, tasks))
+        finally:
+            self.ch_client.command(f"DROP TABLE IF EXISTS {shadow}")
+            self._close_clients()
+
+        return {
+            'partitions': len(details),
+            'rows': sum(item['rows'] for item in details),
+            'bytes': sum(item['bytes'] for item in details),
+            'details': details,
+        }
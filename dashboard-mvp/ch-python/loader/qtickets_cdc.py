@@ -3,17 +3,24 @@
 Инкрементальный загрузчик для QTickets CDC.
 """
 import os
+import sys
 import logging
 import argparse
 from datetime import datetime, date, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List
 import time
 import json
 
 import clickhouse_connect
-import requests
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from integrations.common.http import build_session  # noqa: E402
+from loader.cdc_pipeline import CdcPipeline  # noqa: E402
+from loader.changed_partitions import ChangedPartitionsLog  # noqa: E402
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -44,10 +51,13 @@ class QTicketsCDCLoader:
         self.nrt_interval_min = int(os.getenv('NRT_INTERVAL_MIN', '10'))
         self.safety_lag_min = int(os.getenv('SAFETY_LAG_MIN', '45'))
         self.cdc_window_days = int(os.getenv('CDC_WINDOW_DAYS', '3'))
+        self.cdc_batch_size = int(os.getenv('CDC_BATCH_SIZE', '5000'))
+        self.cdc_queue_size = int(os.getenv('CDC_QUEUE_SIZE', '4'))
         
         # Инициализация клиентов
         self._init_clickhouse_client()
         self._init_session()
+        self.change_log = ChangedPartitionsLog(self.ch_client, 'zakaz.stg_sales_events')
     
     def _init_clickhouse_client(self):
         """Инициализация ClickHouse клиента."""
@@ -66,7 +76,7 @@ class QTicketsCDCLoader:
     
     def _init_session(self):
         """Инициализация HTTP сессии."""
-        self.session = requests.Session()
+        self.session = build_session(retries=3)
         if self.qtickets_api_token:
             self.session.headers.update({
                 'Authorization': f'Bearer {self.qtickets_api_token}',
@@ -126,11 +136,11 @@ class QTicketsCDCLoader:
             logger.error(f"Ошибка обновления водяного знака: {e}")
             raise
     
-    def fetch_orders(self, from_date: datetime, to_date: datetime) -> List[Dict[str, Any]]:
-        """Получение заказов из QTickets API за период."""
+    def iter_order_pages(self, from_date: datetime, to_date: datetime) -> Iterator[List[Dict[str, Any]]]:
+        """Постраничная загрузка заказов из QTickets API за период (по возрастанию updated_at)."""
         logger.info(f"Загрузка заказов за период {from_date} - {to_date}")
         
-        orders = []
+        loaded = 0
         page = 1
         page_size = 1000
         
@@ -157,14 +167,15 @@ class QTicketsCDCLoader:
                 if not data.get('data'):
                     break
                 
-                orders.extend(data['data'])
+                loaded += len(data['data'])
+                yield data['data']
                 
                 # Проверяем, есть ли еще страницы
                 if len(data['data']) < page_size:
                     break
                 
                 page += 1
-                logger.debug(f"Загружена страница {page}, всего заказов: {len(orders)}")
+                logger.debug(f"Загружена страница {page}, всего заказов: {loaded}")
                 
                 # Небольшая задержка между запросами
                 time.sleep(0.1)
@@ -173,8 +184,11 @@ class QTicketsCDCLoader:
                 logger.error(f"Ошибка загрузки страницы {page}: {e}")
                 raise
         
-        logger.info(f"Загружено {len(orders)} заказов за период {from_date} - {to_date}")
-        return orders
+        logger.info(f"Загружено {loaded} заказов за период {from_date} - {to_date}")
+    
+    def fetch_orders(self, from_date: datetime, to_date: datetime) -> List[Dict[str, Any]]:
+        """Получение заказов из QTickets API за период."""
+        return [order for page in self.iter_order_pages(from_date, to_date) for order in page]
     
     def transform_order(self, order: Dict[str, Any]) -> Dict[str, Any]:
         """Трансформация заказа в формат стейджинга."""
@@ -214,6 +228,23 @@ class QTicketsCDCLoader:
             logger.error(f"Ошибка трансформации заказа {order.get('id', 'unknown')}: {e}")
             raise
     
+    def insert_batch(self, batch: List[Dict[str, Any]]):
+        """Вставка батча заказов в стейджинг и запись его дат в журнал изменений."""
+        self.ch_client.insert(
+            'zakaz.stg_sales_events',
+            batch,
+            column_names=[
+                'event_date', 'event_id', 'city', 'order_id', 
+                'tickets_sold', 'net_revenue', 'currency',
+                '_src', '_op', '_ver', '_loaded_at'
+            ]
+        )
+        
+        # Затронутые даты батча — в журнал изменений для билдеров витрин
+        self.change_log.record(
+            [row['event_date'] for row in batch], max(row['_ver'] for row in batch)
+        )
+    
     def insert_to_staging(self, orders: List[Dict[str, Any]], batch_size: int = 5000):
         """Вставка заказов в стейджинг таблицу."""
         if not orders:
@@ -227,16 +258,7 @@ class QTicketsCDCLoader:
             batch = orders[i:i + batch_size]
             
             try:
-                self.ch_client.insert(
-                    'zakaz.stg_sales_events',
-                    batch,
-                    column_names=[
-                        'event_date', 'event_id', 'city', 'order_id', 
-                        'tickets_sold', 'net_revenue', 'currency',
-                        '_src', '_op', '_ver', '_loaded_at'
-                    ]
-                )
-                
+                self.insert_batch(batch)
                 logger.debug(f"Вставлен батч {i//batch_size + 1}, размер: {len(batch)}")
                 
             except Exception as e:
@@ -245,6 +267,23 @@ class QTicketsCDCLoader:
         
         logger.info(f"Успешно вставлено {len(orders)} заказов в стейджинг")
     
+    def _order_updated_at(self, order: Dict[str, Any]) -> Optional[datetime]:
+        """updated_at заказа как наивное локальное время (для водяного знака)."""
+        try:
+            updated_at = datetime.fromisoformat(str(order['updated_at']))
+        except (KeyError, ValueError):
+            return None
+        if updated_at.tzinfo is not None:
+            updated_at = updated_at.astimezone().replace(tzinfo=None)
+        return updated_at
+    
+    def _commit_watermark(self, updated_at: datetime, floor: datetime):
+        """Сдвиг водяного знака после вставленного батча (с тем же перекрытием, что и в конце)."""
+        new_watermark = updated_at - timedelta(minutes=self.safety_lag_min)
+        # Не откатываем знак назад начала текущего окна
+        if new_watermark > floor:
+            self.update_watermark('qtickets', 'orders', 'updated_at', new_watermark.isoformat())
+    
     def run_cdc(self, minutes: Optional[int] = None):
         """Основной метод выполнения CDC загрузки."""
         if minutes is None:
@@ -267,21 +306,27 @@ class QTicketsCDCLoader:
         logger.info(f"Окно загрузки: {from_date} - {to_date}")
         
         try:
-            # Шаг 1: Загрузка данных из источника
-            orders = self.fetch_orders(from_date, to_date)
-            
-            # Шаг 2: Трансформация данных
-            transformed_orders = [self.transform_order(order) for order in orders]
-            
-            # Шаг 3: Вставка в стейджинг
-            self.insert_to_staging(transformed_orders)
+            # Шаги 1-3: загрузка, трансформация и вставка конвейером. Вставка
+            # начинается после первой страницы, водяной знак сдвигается после
+            # каждого вставленного батча (заказы отсортированы по updated_at)
+            stats = CdcPipeline(
+                self.iter_order_pages(from_date, to_date),
+                self.transform_order,
+                self.insert_batch,
+                batch_size=self.cdc_batch_size,
+                queue_size=self.cdc_queue_size,
+                watermark_of=self._order_updated_at,
+                on_commit=lambda updated_at: self._commit_watermark(updated_at, from_date),
+            ).run()
+            logger.info(f"CDC-конвейер: {stats}")
             
             # Шаг 4: Обновление водяного знака
             # Используем to_date - safety_lag_min чтобы оставить перекрытие
             new_watermark = (to_date - timedelta(minutes=self.safety_lag_min)).isoformat()
             self.update_watermark('qtickets', 'orders', 'updated_at', new_watermark)
             
-            logger.info(f"CDC загрузка завершена успешно. Обработано заказов: {len(transformed_orders)}")
+            logger.info(f"CDC загрузка завершена успешно. Обработано заказов: {stats['rows_written']}")
+            logger.info(f"HTTP-транспорт: {self.session.http_stats()}")
             
         except Exception as e:
             logger.error(f"Ошибка при выполнении CDC загрузки: {e}")
@@ -3,17 +3,24 @@
 Инкрементальный загрузчик для VK Ads CDC.
 """
 import os
+import sys
 import logging
 import argparse
 from datetime import datetime, date, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List
 import time
 import json
 
 import clickhouse_connect
-import requests
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from integrations.common.http import build_session  # noqa: E402
+from loader.cdc_pipeline import CdcPipeline  # noqa: E402
+from loader.changed_partitions import ChangedPartitionsLog  # noqa: E402
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -45,10 +52,13 @@ class VKAdsCDCLoader:
         self.nrt_interval_min = int(os.getenv('NRT_INTERVAL_MIN', '10'))
         self.safety_lag_min = int(os.getenv('SAFETY_LAG_MIN', '45'))
         self.cdc_window_days = int(os.getenv('CDC_WINDOW_DAYS', '3'))
+        self.cdc_batch_size = int(os.getenv('CDC_BATCH_SIZE', '5000'))
+        self.cdc_queue_size = int(os.getenv('CDC_QUEUE_SIZE', '4'))
         
         # Инициализация клиентов
         self._init_clickhouse_client()
         self._init_session()
+        self.change_log = ChangedPartitionsLog(self.ch_client, 'zakaz.stg_vk_ads_daily')
     
     def _init_clickhouse_client(self):
         """Инициализация ClickHouse клиента."""
@@ -67,7 +77,7 @@ class VKAdsCDCLoader:
     
     def _init_session(self):
         """Инициализация HTTP сессии."""
-        self.session = requests.Session()
+        self.session = build_session(retries=3)
         logger.info("HTTP сессия инициализирована")
     
     def get_watermark(self, source: str, stream: str, wm_type: str) -> Optional[str]:
@@ -194,8 +204,8 @@ class VKAdsCDCLoader:
         logger.info(f"Загружено всего {len(all_ads)} объявлений")
         return all_ads
     
-    def fetch_statistics(self, from_date: date, to_date: date) -> List[Dict[str, Any]]:
-        """Получение статистики из VK Ads API за период."""
+    def iter_statistics_pages(self, from_date: date, to_date: date) -> Iterator[List[Dict[str, Any]]]:
+        """Загрузка статистики из VK Ads API за период, по ответу на пачку объявлений."""
         logger.info(f"Загрузка статистики за период {from_date} - {to_date}")
         
         # Сначала получаем кампании и объявления
@@ -211,7 +221,7 @@ class VKAdsCDCLoader:
                 ads_by_campaign[campaign_id] = []
             ads_by_campaign[campaign_id].append(ad)
         
-        all_stats = []
+        loaded = 0
         
         # Получаем статистику по каждой кампании
         for campaign_id, campaign_ads in ads_by_campaign.items():
@@ -248,7 +258,8 @@ class VKAdsCDCLoader:
                         continue
                     
                     stats = data.get('response', [])
-                    all_stats.extend(stats)
+                    loaded += len(stats)
+                    yield stats
                     
                     # Небольшая задержка между запросами
                     time.sleep(0.2)
@@ -257,8 +268,11 @@ class VKAdsCDCLoader:
                 logger.error(f"Ошибка загрузки статистики для кампании {campaign_id}: {e}")
                 continue
         
-        logger.info(f"Загружено всего {len(all_stats)} записей статистики")
-        return all_stats
+        logger.info(f"Загружено всего {loaded} записей статистики")
+    
+    def fetch_statistics(self, from_date: date, to_date: date) -> List[Dict[str, Any]]:
+        """Получение статистики из VK Ads API за период."""
+        return [stat for page in self.iter_statistics_pages(from_date, to_date) for stat in page]
     
     def transform_stat(self, stat: Dict[str, Any]) -> Dict[str, Any]:
         """Трансформация записи статистики в формат стейджинга."""
@@ -305,6 +319,23 @@ class VKAdsCDCLoader:
             logger.error(f"Ошибка трансформации статистики: {e}")
             raise
     
+    def insert_batch(self, batch: List[Dict[str, Any]]):
+        """Вставка батча статистики в стейджинг и запись его дат в журнал изменений."""
+        self.ch_client.insert(
+            'zakaz.stg_vk_ads_daily',
+            batch,
+            column_names=[
+                'stat_date', 'city', 'campaign_id', 'ad_id',
+                'impressions', 'clicks', 'spend',
+                '_src', '_op', '_ver', '_loaded_at'
+            ]
+        )
+        
+        # Затронутые даты батча — в журнал изменений для билдеров витрин
+        self.change_log.record(
+            [row['stat_date'] for row in batch], max(row['_ver'] for row in batch)
+        )
+    
     def insert_to_staging(self, stats: List[Dict[str, Any]], batch_size: int = 5000):
         """Вставка статистики в стейджинг таблицу."""
         if not stats:
@@ -318,16 +349,7 @@ class VKAdsCDCLoader:
             batch = stats[i:i + batch_size]
             
             try:
-                self.ch_client.insert(
-                    'zakaz.stg_vk_ads_daily',
-                    batch,
-                    column_names=[
-                        'stat_date', 'city', 'campaign_id', 'ad_id',
-                        'impressions', 'clicks', 'spend',
-                        '_src', '_op', '_ver', '_loaded_at'
-                    ]
-                )
-                
+                self.insert_batch(batch)
                 logger.debug(f"Вставлен батч {i//batch_size + 1}, размер: {len(batch)}")
                 
             except Exception as e:
@@ -358,21 +380,26 @@ class VKAdsCDCLoader:
         logger.info(f"Окно загрузки: {from_date} - {to_date}")
         
         try:
-            # Шаг 1: Загрузка данных из источника
-            stats = self.fetch_statistics(from_date, to_date)
-            
-            # Шаг 2: Трансформация данных
-            transformed_stats = [self.transform_stat(stat) for stat in stats]
-            
-            # Шаг 3: Вставка в стейджинг
-            self.insert_to_staging(transformed_stats)
+            # Шаги 1-3: загрузка, трансформация и вставка конвейером, вставка
+            # начинается после первого ответа API. Водяной знак (дата) сдвигается
+            # только в конце: каждый запрос покрывает всё окно дат, поэтому
+            # вставленные батчи не закрывают ни одной даты целиком
+            pipeline_stats = CdcPipeline(
+                self.iter_statistics_pages(from_date, to_date),
+                self.transform_stat,
+                self.insert_batch,
+                batch_size=self.cdc_batch_size,
+                queue_size=self.cdc_queue_size,
+            ).run()
+            logger.info(f"CDC-конвейер: {pipeline_stats}")
             
             # Шаг 4: Обновление водяного знака
             # Используем to_date - 1 день чтобы оставить перекрытие
             new_watermark = (to_date - timedelta(days=1)).isoformat()
             self.update_watermark('vk_ads', 'ads_daily', 'date', new_watermark)
             
-            logger.info(f"CDC загрузка завершена успешно. Обработано записей: {len(transformed_stats)}")
+            logger.info(f"CDC загрузка завершена успешно. Обработано записей: {pipeline_stats['rows_written']}")
+            logger.info(f"HTTP-транспорт: {self.session.http_stats()}")
             
         except Exception as e:
             logger.error(f"Ошибка при выполнении CDC загрузки: {e}")
@@ -0,0 +1 @@
+# Tests for ch-python loaders
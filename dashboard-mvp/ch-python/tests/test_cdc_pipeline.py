@@ -0,0 +1,104 @@
+import itertools
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from loader.cdc_pipeline import CdcPipeline  # noqa: E402
+
+
+def _run(pipeline, timeout=10):
+    """Прогон в отдельном потоке: зависание конвейера — падение теста, а не CI."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome['stats'] = pipeline.run()
+        except BaseException as e:  # noqa: BLE001
+            outcome['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "конвейер завис"
+    return outcome
+
+
+def _pages(count, size):
+    ts = itertools.count(1)
+    return [[{'ts': next(ts)} for _ in range(size)] for _ in range(count)]
+
+
+def test_commit_marks_cover_only_inserted_rows_and_end_at_max():
+    inserted, marks = [], []
+
+    def on_commit(mark):
+        # Отметка не должна опережать вставленные строки
+        assert all(ts in inserted for ts in range(1, mark + 1))
+        marks.append(mark)
+
+    pipeline = CdcPipeline(
+        _pages(5, 7), transform=lambda record: record['ts'],
+        insert_batch=inserted.extend, batch_size=3, queue_size=1,
+        watermark_of=lambda record: record['ts'], on_commit=on_commit,
+    )
+    outcome = _run(pipeline)
+
+    assert 'error' not in outcome
+    assert sorted(inserted) == list(range(1, 36))
+    assert marks == sorted(marks) and marks[-1] == 35
+    assert outcome['stats']['rows_written'] == 35
+
+
+def test_insert_failure_stops_fetch_and_is_raised():
+    fetched = []
+
+    def endless_pages():
+        for page in itertools.count():
+            fetched.append(page)
+            yield [{'ts': page}]
+
+    def insert_batch(batch):
+        raise RuntimeError('insert failed')
+
+    marks = []
+    pipeline = CdcPipeline(
+        endless_pages(), transform=dict, insert_batch=insert_batch,
+        batch_size=1, queue_size=2, watermark_of=lambda record: record['ts'],
+        on_commit=marks.append,
+    )
+    outcome = _run(pipeline)
+
+    assert isinstance(outcome['error'], RuntimeError)
+    assert str(outcome['error']) == 'insert failed'
+    assert marks == []
+    # Загрузка остановилась, а не выкачала источник до конца
+    assert len(fetched) < 20
+
+
+@pytest.mark.parametrize('queue_size', [1, 3])
+def test_transform_failure_releases_fetch_blocked_on_full_queue(queue_size):
+    def endless_pages():
+        for page in itertools.count():
+            yield [{'ts': page}]
+
+    def transform(record):
+        if record['ts'] == 2:
+            raise ValueError('bad record')
+        return record
+
+    def slow_insert(batch):
+        # Медленная вставка держит очереди заполненными
+        time.sleep(0.05)
+
+    pipeline = CdcPipeline(
+        endless_pages(), transform=transform, insert_batch=slow_insert,
+        batch_size=1, queue_size=queue_size,
+    )
+    outcome = _run(pipeline)
+
+    assert isinstance(outcome['error'], ValueError)
@@ -28,6 +28,15 @@ GRANT SELECT ON system.databases TO role_bi_reader;
 -- ---------------------------------------------------------------------------
 GRANT SELECT, INSERT ON zakaz.* TO role_etl_writer;
 GRANT SELECT ON meta.* TO role_etl_writer;
+-- Run log, CDC/builder watermarks and the changed-partitions log
+GRANT INSERT ON meta.etl_runs TO role_etl_writer;
+GRANT INSERT ON meta.watermarks TO role_etl_writer;
+GRANT INSERT ON meta.changed_partitions TO role_etl_writer;
+-- Partition-swap rebuilds of the dm_* marts use per-run
+-- zakaz_shadow.<mart>_shadow_<run_id> tables (migrations/2025-dm-partition-swap.sql)
+GRANT CREATE TABLE, DROP TABLE, SELECT, INSERT, ALTER DELETE, SYSTEM MERGES ON zakaz_shadow.* TO role_etl_writer;
+GRANT ALTER DELETE ON zakaz.dm_sales_daily TO role_etl_writer;
+GRANT ALTER DELETE ON zakaz.dm_vk_ads_daily TO role_etl_writer;
 
 -- ---------------------------------------------------------------------------
 -- Privileges for backup automation
@@ -10,6 +10,10 @@
 -- РЎРѕР·РґР°РЅРёРµ Р‘Р” zakaz (РµСЃР»Рё РЅРµ СЃСѓС‰РµСЃС‚РІСѓРµС‚)
 CREATE DATABASE IF NOT EXISTS zakaz;
 
+-- Per-run shadow tables of dm_* partition-swap rebuilds
+-- Source: migrations/2025-dm-partition-swap.sql
+CREATE DATABASE IF NOT EXISTS zakaz_shadow;
+
 -- РЎС‚РµР№РґР¶РёРЅРі вЂ” Р·Р°РєР°Р·С‹ QTickets
 CREATE TABLE IF NOT EXISTS zakaz.stg_qtickets_sales
 (
@@ -195,9 +199,11 @@ CREATE DATABASE IF NOT EXISTS meta;
 CREATE TABLE IF NOT EXISTS meta.etl_runs
 (
     job            LowCardinality(String),
+    stage          LowCardinality(String) DEFAULT '',  -- '' for the whole run, else the stage name
     run_id         UUID,
     started_at     DateTime,
     finished_at    DateTime,
+    duration_ms    UInt64 DEFAULT 0,
     status         LowCardinality(String),  -- 'ok' | 'error'
     rows_written   UInt64,
     rows_read      UInt64,
@@ -211,6 +217,10 @@ ENGINE = MergeTree
 ORDER BY (started_at, job)
 PARTITION BY toYYYYMM(started_at);
 
+-- Per-stage rows (migrations/2025-etl-runs-stages.sql) for tables created earlier
+ALTER TABLE meta.etl_runs ADD COLUMN IF NOT EXISTS stage LowCardinality(String) DEFAULT '' AFTER job;
+ALTER TABLE meta.etl_runs ADD COLUMN IF NOT EXISTS duration_ms UInt64 DEFAULT 0 AFTER finished_at;
+
 -- 1.2 СЂРµРµСЃС‚СЂ Р°Р»РµСЂС‚РѕРІ
 CREATE TABLE IF NOT EXISTS meta.etl_alerts
 (
@@ -252,6 +262,21 @@ CREATE TABLE IF NOT EXISTS meta.watermarks
 ENGINE = ReplacingMergeTree(updated_at)
 ORDER BY (source, stream);
 
+-- Change log of staging partitions touched by CDC
+-- Source: migrations/2025-changed-partitions.sql
+CREATE TABLE IF NOT EXISTS meta.changed_partitions
+(
+    table_name      LowCardinality(String),  -- 'zakaz.stg_sales_events' | 'zakaz.stg_vk_ads_daily'
+    partition_date  Date,
+    _ver            UInt64,
+    rows            UInt64,
+    logged_at       DateTime DEFAULT now()
+)
+ENGINE = MergeTree
+PARTITION BY toYYYYMM(logged_at)
+ORDER BY (table_name, _ver, partition_date)
+TTL logged_at + INTERVAL 30 DAY;
+
 -- 2. РЎС‚РµР№РґР¶РёРЅРі РґР»СЏ СЃРѕР±С‹С‚РёР№ РїСЂРѕРґР°Р¶ (CDC СЃР»РѕР№)
 CREATE TABLE IF NOT EXISTS zakaz.stg_sales_events
 (
@@ -1228,6 +1253,24 @@ LEFT JOIN latest_14d l14 ON ed.event_id = l14.event_id AND ed.city = l14.city
 LEFT JOIN latest_inventory li ON ed.event_id = li.event_id
 ORDER BY ls.revenue_today DESC, l14.revenue_14d DESC;
 
+-- Checkpoints for the time-sliced initial backfill
+-- Source: migrations/2025-qtickets-api-backfill-slices.sql
+CREATE TABLE IF NOT EXISTS zakaz.meta_qtickets_backfill_slices
+(
+    job          LowCardinality(String),  -- Loader job name (JOB_NAME)
+    backfill_id  LowCardinality(String),  -- Backfill the slice belongs to
+    slice_start  DateTime,                -- Inclusive payed_at bound (MSK)
+    slice_end    DateTime,                -- Exclusive payed_at bound (MSK)
+    status       LowCardinality(String),  -- ok / error
+    orders       UInt64 DEFAULT 0,        -- Orders fetched for the slice
+    sales_rows   UInt64 DEFAULT 0,        -- Staging rows written for the slice
+    error        String DEFAULT '',       -- Error message for failed slices
+    updated_at   DateTime                 -- Version for ReplacingMergeTree
+)
+ENGINE = ReplacingMergeTree(updated_at)
+ORDER BY (job, backfill_id, slice_start, slice_end)
+SETTINGS index_granularity = 8192;
+
 
 -- ## Step 5 (optional): Grants for service accounts (2025-qtickets-api-grants.sql)
 -- Source: migrations/2025-qtickets-api-grants.sql
@@ -0,0 +1,22 @@
+-- Migration: change log of staging partitions touched by CDC.
+-- ch-python CDC loaders (qtickets_cdc, vk_ads_cdc) append the dates of every
+-- inserted batch with the batch _ver. The incremental dm builders rebuild only
+-- dates logged after their marker in meta.watermarks
+-- (source = '<builder job>', stream = 'changed_partitions') and advance it
+-- after a successful partition swap.
+
+CREATE TABLE IF NOT EXISTS meta.changed_partitions
+(
+    table_name      LowCardinality(String),  -- 'zakaz.stg_sales_events' | 'zakaz.stg_vk_ads_daily'
+    partition_date  Date,
+    _ver            UInt64,
+    rows            UInt64,
+    logged_at       DateTime DEFAULT now()
+)
+ENGINE = MergeTree
+PARTITION BY toYYYYMM(logged_at)
+ORDER BY (table_name, _ver, partition_date)
+TTL logged_at + INTERVAL 30 DAY;
+
+GRANT SELECT, INSERT ON meta.changed_partitions TO etl_writer;
+GRANT SELECT, INSERT ON meta.watermarks TO etl_writer;
@@ -0,0 +1,14 @@
+-- Migration: privileges for partition-swap rebuilds of the dm_* marts.
+-- ch-python builders (build_dm_sales*, build_dm_vk_*) build affected months in
+-- a per-run zakaz_shadow.<mart>_shadow_<run_id> table (CREATE TABLE ... AS
+-- <mart>, merges stopped with SYSTEM STOP MERGES) and swap them in with
+-- ALTER TABLE <mart> REPLACE PARTITION ... FROM <shadow> instead of
+-- ALTER TABLE ... DELETE mutations. Shadow names are generated per run, so the
+-- DDL privileges are granted on the whole zakaz_shadow database; in zakaz the
+-- writer only gets ALTER DELETE (required by REPLACE PARTITION) on the marts.
+
+CREATE DATABASE IF NOT EXISTS zakaz_shadow;
+
+GRANT CREATE TABLE, DROP TABLE, SELECT, INSERT, ALTER DELETE, SYSTEM MERGES ON zakaz_shadow.* TO etl_writer;
+GRANT ALTER DELETE ON zakaz.dm_sales_daily TO etl_writer;
+GRANT ALTER DELETE ON zakaz.dm_vk_ads_daily TO etl_writer;
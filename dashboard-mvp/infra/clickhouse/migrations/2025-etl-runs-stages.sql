@@ -0,0 +1,10 @@
+-- Migration: per-stage rows in meta.etl_runs.
+-- ch-python incremental builders (build_dm_sales_incr, build_dm_vk_incr) write
+-- one row per stage (affected_dates, rebuild, copy/build/swap:<partition>)
+-- sharing the run's run_id. The whole-run row written by ops/run_job.sh keeps
+-- stage = ''.
+
+ALTER TABLE meta.etl_runs ADD COLUMN IF NOT EXISTS stage LowCardinality(String) DEFAULT '' AFTER job;
+ALTER TABLE meta.etl_runs ADD COLUMN IF NOT EXISTS duration_ms UInt64 DEFAULT 0 AFTER finished_at;
+
+GRANT SELECT, INSERT ON meta.etl_runs TO etl_writer;
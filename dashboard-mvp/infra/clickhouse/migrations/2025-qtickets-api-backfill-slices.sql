@@ -0,0 +1,27 @@
+-- Migration: checkpoints for the time-sliced QTickets API backfill
+-- The loader splits long windows into slices fetched in parallel.  During the
+-- initial backfill every finished slice is recorded here under a backfill id,
+-- so a retry of that backfill only refetches the slices that did not complete
+-- (finished ones are replayed from staging).  Other runs never read this table.
+
+CREATE TABLE IF NOT EXISTS zakaz.meta_qtickets_backfill_slices
+(
+    job          LowCardinality(String),  -- Loader job name (JOB_NAME)
+    backfill_id  LowCardinality(String),  -- Backfill the slice belongs to
+    slice_start  DateTime,                -- Inclusive payed_at bound (MSK)
+    slice_end    DateTime,                -- Exclusive payed_at bound (MSK)
+    status       LowCardinality(String),  -- ok / error
+    orders       UInt64 DEFAULT 0,        -- Orders fetched for the slice
+    sales_rows   UInt64 DEFAULT 0,        -- Staging rows written for the slice
+    error        String DEFAULT '',       -- Error message for failed slices
+    updated_at   DateTime                 -- Version for ReplacingMergeTree
+)
+ENGINE = ReplacingMergeTree(updated_at)
+ORDER BY (job, backfill_id, slice_start, slice_end)
+SETTINGS index_granularity = 8192;
+
+GRANT SELECT, INSERT ON zakaz.meta_qtickets_backfill_slices TO etl_writer;
+
+-- Local/testing database
+CREATE TABLE IF NOT EXISTS zakaz_test.meta_qtickets_backfill_slices
+AS zakaz.meta_qtickets_backfill_slices;
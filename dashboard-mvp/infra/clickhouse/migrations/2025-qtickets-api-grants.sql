@@ -27,4 +27,5 @@ GRANT INSERT ON zakaz.fact_qtickets_sales_daily TO etl_writer;
 GRANT INSERT ON zakaz.fact_qtickets_sales_utm_daily TO etl_writer;
 GRANT INSERT ON zakaz.fact_qtickets_inventory_latest TO etl_writer;
 GRANT INSERT ON zakaz.meta_job_runs TO etl_writer;
+GRANT SELECT, INSERT ON meta.watermarks TO etl_writer;
 GRANT INSERT ON zakaz.plan_sales TO etl_writer;
@@ -0,0 +1,35 @@
+-- Migration: cheaper storage for raw QTickets API payloads
+-- payload_json columns are compressed with ZSTD instead of the default LZ4,
+-- and QTICKETS_PAYLOAD_MODE=hash stores each distinct payload once in a side
+-- table (payload_json of the staging rows then holds its md5).
+
+ALTER TABLE zakaz.stg_qtickets_api_orders_raw
+    MODIFY COLUMN payload_json String CODEC(ZSTD(3));
+ALTER TABLE zakaz.stg_qtickets_api_clients_raw
+    MODIFY COLUMN payload_json String CODEC(ZSTD(3));
+ALTER TABLE zakaz.stg_qtickets_api_price_shades_raw
+    MODIFY COLUMN payload_json String CODEC(ZSTD(3));
+ALTER TABLE zakaz.stg_qtickets_api_discounts_raw
+    MODIFY COLUMN payload_json String CODEC(ZSTD(3));
+ALTER TABLE zakaz.stg_qtickets_api_promo_codes_raw
+    MODIFY COLUMN payload_json String CODEC(ZSTD(3));
+ALTER TABLE zakaz.stg_qtickets_api_barcodes_raw
+    MODIFY COLUMN payload_json String CODEC(ZSTD(3));
+ALTER TABLE zakaz.stg_qtickets_api_partner_tickets_raw
+    MODIFY COLUMN payload_json String CODEC(ZSTD(3));
+
+CREATE TABLE IF NOT EXISTS zakaz.stg_qtickets_api_payloads_raw
+(
+    payload_hash  FixedString(32),          -- md5 of payload_json
+    payload_json  String CODEC(ZSTD(3)),    -- Serialised payload
+    _ver          UInt64                    -- Version for ReplacingMergeTree
+)
+ENGINE = ReplacingMergeTree(_ver)
+ORDER BY payload_hash
+SETTINGS index_granularity = 8192;
+
+GRANT SELECT, INSERT ON zakaz.stg_qtickets_api_payloads_raw TO etl_writer;
+
+-- Local/testing database
+CREATE TABLE IF NOT EXISTS zakaz_test.stg_qtickets_api_payloads_raw
+AS zakaz.stg_qtickets_api_payloads_raw;
@@ -0,0 +1,128 @@
+-- Migration: incremental QTickets sales rollups maintained by ClickHouse
+-- Materialized views fold every insert into stg_qtickets_api_orders_raw into
+-- AggregatingMergeTree rollups. Each group keeps the distinct
+-- (_dedup_key, tickets_sold, revenue) tuples of its orders, so orders that
+-- are staged again by an overlapping window are counted once, and a day split
+-- across several loader windows adds up to its full total.
+-- Keeping every order tuple grows with the order count, so the rollups only
+-- hold recent days: the TTL drops days after 45 days. The loader
+-- (QTICKETS_CH_ROLLUPS=true) compacts days older than 28 days into
+-- fact_qtickets_sales_daily / _utm_daily on every run, and the read views
+-- take the last 35 days from the rollups and older days from the facts
+-- (integrations/qtickets_api/rollups.py holds the same constants).
+-- Populate the rollups from existing staging data once after applying this
+-- migration (safe to repeat for the same reason):
+--   python -m integrations.qtickets_api.loader --envfile ... --backfill-rollups
+
+CREATE TABLE IF NOT EXISTS zakaz.agg_qtickets_sales_daily
+(
+    sales_date  Date,
+    event_id    String,
+    city        LowCardinality(String),
+    sales       AggregateFunction(groupUniqArray, Tuple(FixedString(32), UInt32, Float64))
+)
+ENGINE = AggregatingMergeTree
+PARTITION BY toYYYYMM(sales_date)
+ORDER BY (event_id, sales_date, city)
+TTL sales_date + INTERVAL 45 DAY
+SETTINGS index_granularity = 8192;
+
+CREATE TABLE IF NOT EXISTS zakaz.agg_qtickets_sales_utm_daily
+(
+    sales_date    Date,
+    event_id      String,
+    city          LowCardinality(String),
+    utm_source    LowCardinality(String),
+    utm_medium    LowCardinality(String),
+    utm_campaign  String,
+    utm_content   String,
+    utm_term      String,
+    sales         AggregateFunction(groupUniqArray, Tuple(FixedString(32), UInt32, Float64))
+)
+ENGINE = AggregatingMergeTree
+PARTITION BY toYYYYMM(sales_date)
+ORDER BY (sales_date, event_id, city, utm_source, utm_campaign, utm_medium, utm_content, utm_term)
+TTL sales_date + INTERVAL 45 DAY
+SETTINGS index_granularity = 8192;
+
+-- Rollups created by an earlier version of this migration
+ALTER TABLE zakaz.agg_qtickets_sales_daily MODIFY TTL sales_date + INTERVAL 45 DAY;
+ALTER TABLE zakaz.agg_qtickets_sales_utm_daily MODIFY TTL sales_date + INTERVAL 45 DAY;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS zakaz.mv_qtickets_sales_daily_agg
+TO zakaz.agg_qtickets_sales_daily
+AS SELECT
+    toDate(sale_ts) AS sales_date,
+    event_id,
+    city,
+    groupUniqArrayState((_dedup_key, tickets_sold, revenue)) AS sales
+FROM zakaz.stg_qtickets_api_orders_raw
+GROUP BY sales_date, event_id, city;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS zakaz.mv_qtickets_sales_utm_daily_agg
+TO zakaz.agg_qtickets_sales_utm_daily
+AS SELECT
+    toDate(sale_ts) AS sales_date,
+    event_id,
+    city,
+    utm_source,
+    utm_medium,
+    utm_campaign,
+    utm_content,
+    utm_term,
+    groupUniqArrayState((_dedup_key, tickets_sold, revenue)) AS sales
+FROM zakaz.stg_qtickets_api_orders_raw
+GROUP BY sales_date, event_id, city, utm_source, utm_medium, utm_campaign, utm_content, utm_term;
+
+-- Read side: same columns as fact_qtickets_sales_daily / _utm_daily
+CREATE OR REPLACE VIEW zakaz.v_qtickets_sales_daily_rollup AS
+SELECT
+    sales_date,
+    event_id,
+    city,
+    toUInt32(arraySum(s -> tupleElement(s, 2), orders)) AS tickets_sold,
+    arraySum(s -> tupleElement(s, 3), orders)           AS revenue
+FROM
+(
+    SELECT sales_date, event_id, city, groupUniqArrayMerge(sales) AS orders
+    FROM zakaz.agg_qtickets_sales_daily
+    WHERE sales_date >= today() - 35
+    GROUP BY sales_date, event_id, city
+)
+UNION ALL
+SELECT sales_date, event_id, city, tickets_sold, revenue
+FROM zakaz.fact_qtickets_sales_daily FINAL
+WHERE sales_date < today() - 35;
+
+CREATE OR REPLACE VIEW zakaz.v_qtickets_sales_utm_daily_rollup AS
+SELECT
+    sales_date,
+    event_id,
+    city,
+    utm_source,
+    utm_medium,
+    utm_campaign,
+    utm_content,
+    utm_term,
+    toUInt32(arraySum(s -> tupleElement(s, 2), orders)) AS tickets_sold,
+    arraySum(s -> tupleElement(s, 3), orders)           AS revenue
+FROM
+(
+    SELECT
+        sales_date, event_id, city,
+        utm_source, utm_medium, utm_campaign, utm_content, utm_term,
+        groupUniqArrayMerge(sales) AS orders
+    FROM zakaz.agg_qtickets_sales_utm_daily
+    WHERE sales_date >= today() - 35
+    GROUP BY sales_date, event_id, city, utm_source, utm_medium, utm_campaign, utm_content, utm_term
+)
+UNION ALL
+SELECT
+    sales_date, event_id, city,
+    utm_source, utm_medium, utm_campaign, utm_content, utm_term,
+    tickets_sold, revenue
+FROM zakaz.fact_qtickets_sales_utm_daily FINAL
+WHERE sales_date < today() - 35;
+
+GRANT SELECT, INSERT ON zakaz.agg_qtickets_sales_daily TO etl_writer;
+GRANT SELECT, INSERT ON zakaz.agg_qtickets_sales_utm_daily TO etl_writer;
@@ -1,12 +1,20 @@
 """Public exports for the ``integrations.common`` convenience package."""
 
-from .ch import ClickHouseClient, get_client, get_client_from_config
+from .ch import (
+    ClickHouseClient,
+    ClickHouseClientPool,
+    ColumnBatch,
+    get_client,
+    get_client_from_config,
+)
 from .logging import (
+    JsonLinesFormatter,
     Metrics,
     StructuredLogger,
     get_logger,
     log_data_operation,
     log_execution_time,
+    log_suppressed_summary,
     setup_integrations_logger,
 )
 from .time import (
@@ -14,6 +22,7 @@ from .time import (
     days_ago,
     format_msk,
     is_weekend,
+    localize_msk,
     now_msk,
     parse_period,
     to_date,
@@ -25,6 +34,8 @@ from .time import (
 __all__ = [
     # ClickHouse helpers
     "ClickHouseClient",
+    "ClickHouseClientPool",
+    "ColumnBatch",
     "get_client",
     "get_client_from_config",
     # Time helpers
@@ -32,6 +43,7 @@ __all__ = [
     "now_msk",
     "today_msk",
     "to_msk",
+    "localize_msk",
     "to_date",
     "date_range",
     "days_ago",
@@ -44,5 +56,7 @@ __all__ = [
     "get_logger",
     "log_execution_time",
     "log_data_operation",
+    "log_suppressed_summary",
     "setup_integrations_logger",
+    "JsonLinesFormatter",
 ]
@@ -0,0 +1,266 @@
+"""Background, per-table buffered writer on top of :class:`ClickHouseClient`."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .ch import ClickHouseClient, ColumnBatch
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["BufferedInserter", "BufferedInsertError"]
+
+
+class BufferedInsertError(RuntimeError):
+    """Raised by :class:`BufferedInserter` after a background insert failed."""
+
+
+class BufferedInserter:
+    """
+    Accumulate rows per table and write them from a background thread.
+
+    A table is flushed once it holds ``max_rows`` rows or its oldest buffered
+    row is ``max_delay_seconds`` old, so inserts overlap with whatever the
+    producer does next (typically fetching the following API page).
+    Producers block in ``add``/``add_columns`` while ``max_buffered_rows``
+    (default ``4 * max_rows``) rows are added but not yet written, so a
+    producer faster than ClickHouse cannot grow the buffers without bound.
+    ``flush()`` blocks until everything added before the call is written;
+    ``close()`` flushes and stops the thread. A failed insert is logged and
+    re-raised as :class:`BufferedInsertError` from the next ``add``/``flush``/
+    ``close`` call.
+
+    The inserter issues requests from its own thread, so ``ch_client`` must
+    not be used concurrently elsewhere; pass ``ch_client.clone()`` when the
+    caller keeps querying, with ``close_client=True`` so ``close()`` releases
+    the clone's connection pool. ``async_insert=True`` additionally lets
+    ClickHouse batch the parts server-side (``wait_for_async_insert`` stays
+    on so failures are still reported).
+    """
+
+    def __init__(
+        self,
+        ch_client: ClickHouseClient,
+        *,
+        max_rows: int = 5000,
+        max_delay_seconds: float = 1.0,
+        async_insert: bool = False,
+        max_buffered_rows: Optional[int] = None,
+        close_client: bool = False,
+    ) -> None:
+        if max_rows < 1:
+            raise ValueError("max_rows must be >= 1")
+        if max_buffered_rows is not None and max_buffered_rows < max_rows:
+            raise ValueError("max_buffered_rows must be >= max_rows")
+        self.ch_client = ch_client
+        self.close_client = close_client
+        self.max_rows = int(max_rows)
+        self.max_buffered_rows = int(max_buffered_rows or 4 * self.max_rows)
+        self.max_delay_seconds = float(max_delay_seconds)
+        self.settings: Optional[Dict[str, Any]] = (
+            {"async_insert": 1, "wait_for_async_insert": 1} if async_insert else None
+        )
+
+        self._cond = threading.Condition()
+        self._buffers: Dict[str, ColumnBatch] = {}
+        self._oldest: Dict[str, float] = {}
+        self._added = 0
+        self._taken = 0
+        self._done = 0
+        self._flush_target = 0
+        self._closed = False
+        self._error: Optional[BufferedInsertError] = None
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+        self._thread = threading.Thread(
+            target=self._run, name="ch-buffered-insert", daemon=True
+        )
+        self._thread.start()
+
+    # ------------------------------------------------------------------ #
+    # Producer API
+    # ------------------------------------------------------------------ #
+    def add(self, table: str, rows: Iterable[Mapping[str, Any]]) -> None:
+        """Buffer dict rows for ``table``."""
+        with self._cond:
+            self._wait_for_room()
+            batch = self._buffer(table)
+            before = len(batch)
+            for row in rows:
+                batch.append(row)
+            self._added_rows(table, len(batch) - before)
+
+    def add_columns(self, table: str, columns: Mapping[str, Sequence[Any]]) -> None:
+        """Buffer a column-oriented block (column name -> values) for ``table``."""
+        with self._cond:
+            self._wait_for_room()
+            batch = self._buffer(table)
+            before = len(batch)
+            batch.extend(columns)
+            self._added_rows(table, len(batch) - before)
+
+    def flush(self) -> None:
+        """Block until every row added so far has been written."""
+        with self._cond:
+            target = self._added
+            self._flush_target = max(self._flush_target, target)
+            self._cond.notify_all()
+            while self._done < target and self._thread.is_alive():
+                self._cond.wait()
+            self._raise_error()
+
+    def close(self) -> None:
+        """Flush the remaining rows, stop the background thread and, if owned, the client."""
+        with self._cond:
+            if not self._closed:
+                self._closed = True
+                self._cond.notify_all()
+        self._thread.join()
+        if self.close_client:
+            self.ch_client.close()
+        with self._cond:
+            self._raise_error()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-table ``rows``/``batches``/``failed_rows``/``seconds``/``rows_per_second``."""
+        with self._cond:
+            snapshot: Dict[str, Dict[str, float]] = {}
+            for table, values in self._stats.items():
+                item = dict(values)
+                seconds = item["seconds"]
+                item["seconds"] = round(seconds, 3)
+                item["rows_per_second"] = (
+                    round(item["rows"] / seconds, 1) if seconds > 0 else 0.0
+                )
+                snapshot[table] = item
+            return snapshot
+
+    def __enter__(self) -> "BufferedInserter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # Already failing: stop the thread but keep the original exception.
+        try:
+            self.close()
+        except BufferedInsertError as close_exc:
+            logger.error("Buffered insert failed during shutdown: %s", close_exc)
+
+    # ------------------------------------------------------------------ #
+    # Internals (called with ``self._cond`` held unless noted)
+    # ------------------------------------------------------------------ #
+    def _check_open(self) -> None:
+        self._raise_error()
+        if self._closed:
+            raise BufferedInsertError("BufferedInserter is closed")
+
+    def _wait_for_room(self) -> None:
+        """Block while ``max_buffered_rows`` rows are pending, forcing a flush."""
+        self._check_open()
+        while (
+            self._added - self._done >= self.max_buffered_rows
+            and self._thread.is_alive()
+        ):
+            # Rows spread over tables below max_rows would otherwise wait for
+            # max_delay_seconds; ask the writer to drain them now.
+            self._flush_target = max(self._flush_target, self._added)
+            self._cond.notify_all()
+            self._cond.wait()
+            self._check_open()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _buffer(self, table: str) -> ColumnBatch:
+        batch = self._buffers.get(table)
+        if batch is None:
+            batch = self._buffers[table] = ColumnBatch()
+        return batch
+
+    def _added_rows(self, table: str, count: int) -> None:
+        if not count:
+            return
+        self._oldest.setdefault(table, time.monotonic())
+        self._added += count
+        if len(self._buffers[table]) >= self.max_rows:
+            self._cond.notify_all()
+
+    def _take_ready(self, now: float) -> List[Tuple[str, ColumnBatch]]:
+        force = self._closed or self._taken < self._flush_target
+        ready: List[Tuple[str, ColumnBatch]] = []
+        for table in list(self._buffers):
+            batch = self._buffers[table]
+            if not len(batch):
+                continue
+            if (
+                force
+                or len(batch) >= self.max_rows
+                or now - self._oldest[table] >= self.max_delay_seconds
+            ):
+                ready.append((table, batch))
+                self._taken += len(batch)
+                del self._buffers[table]
+                self._oldest.pop(table, None)
+        return ready
+
+    def _next_deadline(self) -> Optional[float]:
+        if not self._oldest:
+            return None
+        return min(self._oldest.values()) + self.max_delay_seconds
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    ready = self._take_ready(time.monotonic())
+                    if ready:
+                        break
+                    if self._closed:
+                        return
+                    deadline = self._next_deadline()
+                    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    self._cond.wait(timeout)
+
+            # Not holding the lock: producers keep buffering meanwhile.
+            written = sum(self._write(table, batch) for table, batch in ready)
+
+            with self._cond:
+                self._done += written
+                self._cond.notify_all()
+
+    def _write(self, table: str, batch: ColumnBatch) -> int:
+        for chunk in batch.chunks(self.max_rows):
+            rows = len(next(iter(chunk.values()), ()))
+            started = time.perf_counter()
+            failed = False
+            try:
+                self.ch_client.insert_columns(table, chunk, settings=self.settings)
+            except Exception as exc:  # pylint: disable=broad-except
+                failed = True
+                logger.error("Buffered insert into %s failed: %s", table, exc)
+                with self._cond:
+                    if self._error is None:
+                        error = BufferedInsertError(
+                            f"Buffered insert into {table} failed: {exc}"
+                        )
+                        error.__cause__ = exc
+                        self._error = error
+            elapsed = time.perf_counter() - started
+            with self._cond:
+                stats = self._stats.setdefault(
+                    table,
+                    {"rows": 0, "batches": 0, "failed_rows": 0, "seconds": 0.0},
+                )
+                stats["seconds"] += elapsed
+                if failed:
+                    stats["failed_rows"] += rows
+                else:
+                    stats["rows"] += rows
+                    stats["batches"] += 1
+        return len(batch)
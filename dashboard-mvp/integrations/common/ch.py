@@ -4,8 +4,12 @@ from __future__ import annotations
 
 import logging
 import os
+import queue
+import threading
 import time
-from typing import Any, Dict, List, Optional, Sequence, TYPE_CHECKING
+from contextlib import contextmanager
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, TYPE_CHECKING
 
 import clickhouse_connect
 from clickhouse_connect.driver.exceptions import ClickHouseError
@@ -48,6 +52,76 @@ def _parse_bool(value: Optional[str], *, default: bool = False) -> bool:
     return default
 
 
+def _is_arrow_table(data: Any) -> bool:
+    return hasattr(data, "schema") and hasattr(data, "num_rows")
+
+
+def _is_dataframe(data: Any) -> bool:
+    return hasattr(data, "columns") and hasattr(data, "iloc")
+
+
+class ColumnBatch:
+    """
+    Accumulate dict rows directly as per-column lists.
+
+    Producers that emit rows one at a time append them here and hand
+    :attr:`columns` to :meth:`ClickHouseClient.insert_columns`, so no
+    list-of-lists copy of the batch is ever built.
+    """
+
+    def __init__(self, column_names: Optional[Sequence[str]] = None) -> None:
+        self._columns: Dict[str, List[Any]] = {
+            name: [] for name in (column_names or ())
+        }
+        self._rows = 0
+
+    def append(self, row: Mapping[str, Any]) -> None:
+        if not self._columns:
+            self._columns = {name: [] for name in row}
+        try:
+            for name, values in self._columns.items():
+                values.append(row[name])
+        except KeyError as exc:
+            # Roll back the partially appended row before reporting it.
+            for values in self._columns.values():
+                del values[self._rows:]
+            raise ValueError(f"Row {self._rows} is missing key: {exc.args[0]}") from None
+        self._rows += 1
+
+    def extend(self, columns: Mapping[str, Sequence[Any]]) -> None:
+        """Append a column-oriented block with the same column names."""
+        if not self._columns:
+            self._columns = {name: [] for name in columns}
+        if columns.keys() != self._columns.keys():
+            raise ValueError(
+                f"Column mismatch: expected {list(self._columns)}, got {list(columns)}"
+            )
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("Columns have different lengths")
+        for name, values in self._columns.items():
+            values.extend(columns[name])
+        self._rows += lengths.pop() if lengths else 0
+
+    def chunks(self, size: int) -> Iterator[Dict[str, List[Any]]]:
+        """Yield the buffered columns in blocks of at most ``size`` rows."""
+        if self._rows <= size:
+            yield self._columns
+            return
+        for start in range(0, self._rows, size):
+            yield {
+                name: values[start:start + size]
+                for name, values in self._columns.items()
+            }
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def columns(self) -> Dict[str, List[Any]]:
+        return self._columns
+
+
 class ClickHouseClient:
     """A small convenience wrapper around ``clickhouse_connect``."""
 
@@ -88,6 +162,27 @@ class ClickHouseClient:
         self.client = None
         self._connect()
 
+    def clone(self) -> "ClickHouseClient":
+        """
+        Return a new client with the same settings and its own connection.
+
+        ``clickhouse_connect`` clients must not be shared between threads that
+        run requests concurrently; give every writer thread its own clone.
+        """
+        return ClickHouseClient(
+            host=self.host,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            database=self.database,
+            secure=self.secure,
+            verify=self.verify,
+            max_retries=self.max_retries,
+            retry_delay=self.retry_delay,
+            connect_timeout=self.connect_timeout,
+            send_receive_timeout=self.send_receive_timeout,
+        )
+
     # ------------------------------------------------------------------ #
     # Connection helpers
     # ------------------------------------------------------------------ #
@@ -170,11 +265,14 @@ class ClickHouseClient:
         table: str,
         data: Sequence[Sequence[Any]] | Sequence[Dict[str, Any]],
         column_names: Optional[List[str]] = None,
+        settings: Optional[Dict[str, Any]] = None,
     ) -> None:
         """Insert data into ClickHouse with retries."""
         kwargs: Dict[str, Any] = {}
+        if settings:
+            kwargs["settings"] = settings
 
-        # Convert list of dictionaries to tabular format if needed
+        # Dict rows are transposed into columns and sent column-oriented
         if (data and
             isinstance(data, Sequence) and
             len(data) > 0 and
@@ -182,25 +280,28 @@ class ClickHouseClient:
             column_names is None):
 
             # Extract column names from first dictionary
-            column_names = list(data[0].keys())
+            first_keys = data[0].keys()
+            column_names = list(first_keys)
 
-            # Validate all dictionaries have the same keys
+            # Validate all dictionaries carry at least those keys; dict views
+            # compare in C, the set difference is only built for the error
             for i, row in enumerate(data):
                 if not isinstance(row, dict):
                     raise ValueError(f"Row {i} is not a dictionary: {type(row)}")
-                missing_keys = set(column_names) - set(row.keys())
-                if missing_keys:
+                if not first_keys <= row.keys():
+                    missing_keys = set(column_names) - set(row.keys())
                     raise ValueError(f"Row {i} is missing keys: {missing_keys}")
 
-            # Convert to list of lists
-            data = [[row.get(col) for col in column_names] for row in data]
-
+            rows = len(data)
+            columns = [list(map(itemgetter(col), data)) for col in column_names]
             logger.debug(
-                "Converted dict rows to tabular format for %s: rows=%s columns=%s",
+                "Converted dict rows to columns for %s: rows=%s columns=%s",
                 table,
-                len(data),
+                rows,
                 column_names,
             )
+            self._insert_columnar(table, column_names, columns, rows, settings)
+            return
 
         if column_names:
             kwargs["column_names"] = column_names
@@ -216,6 +317,79 @@ class ClickHouseClient:
         if rows is not None:
             logger.info("Inserted %s rows into %s", rows, table)
 
+    def insert_columns(
+        self, table: str, data: Any, settings: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Insert column-oriented data without any per-row conversion.
+
+        ``data`` may be a mapping of column name to values (lists, tuples or
+        NumPy arrays), a :class:`ColumnBatch`, a pandas ``DataFrame`` or a
+        pyarrow ``Table``. Frames are passed to ``insert_df``/``insert_arrow``
+        of ``clickhouse_connect`` as-is. ``settings`` are passed through as
+        query settings (for example ``async_insert``).
+        """
+        if isinstance(data, ColumnBatch):
+            data = data.columns
+        kwargs: Dict[str, Any] = {"settings": settings} if settings else {}
+
+        if _is_arrow_table(data):
+            rows = int(data.num_rows)
+            self._call_with_retry(self.client.insert_arrow, table, data, **kwargs)
+        elif _is_dataframe(data):
+            rows = len(data)
+            self._call_with_retry(self.client.insert_df, table, data, **kwargs)
+        elif isinstance(data, Mapping):
+            column_names = list(data.keys())
+            columns = [data[name] for name in column_names]
+            lengths = {len(column) for column in columns}
+            if len(lengths) > 1:
+                raise ValueError(
+                    f"Columns for {table} have different lengths: "
+                    + ", ".join(f"{name}={len(data[name])}" for name in column_names)
+                )
+            rows = lengths.pop() if lengths else 0
+            if not rows:
+                logger.debug("Skipping empty columnar insert into %s", table)
+                return
+            self._insert_columnar(table, column_names, columns, rows, settings)
+            return
+        else:
+            raise TypeError(
+                f"Unsupported columnar payload for {table}: {type(data).__name__}"
+            )
+        logger.info("Inserted %s rows into %s", rows, table)
+
+    def _insert_columnar(
+        self,
+        table: str,
+        column_names: List[str],
+        columns: Sequence[Sequence[Any]],
+        rows: int,
+        settings: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        logger.debug(
+            "Columnar insert into %s rows=%s columns=%s", table, rows, column_names
+        )
+        kwargs: Dict[str, Any] = {"settings": settings} if settings else {}
+        self._call_with_retry(
+            self.client.insert,
+            table,
+            columns,
+            column_names=column_names,
+            column_oriented=True,
+            **kwargs,
+        )
+        logger.info("Inserted %s rows into %s", rows, table)
+
+    def close(self) -> None:
+        """Release the underlying HTTP connection pool."""
+        if self.client is not None:
+            try:
+                self.client.close()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.debug("Ignoring error while closing ClickHouse client: %s", exc)
+
     def command(
         self, query: str, parameters: Optional[Dict[str, Any]] = None
     ) -> Any:
@@ -225,6 +399,77 @@ class ClickHouseClient:
         return self._call_with_retry(self.client.command, query)
 
 
+class ClickHouseClientPool:
+    """
+    Bounded set of :class:`ClickHouseClient` connections for parallel writers.
+
+    The pool starts with ``base`` and opens up to ``size - 1`` additional
+    connections via :meth:`ClickHouseClient.clone` the first time they are
+    needed. ``acquire()`` hands out one client exclusively; only the clones are
+    closed by :meth:`close`, ``base`` stays owned by the caller.
+    """
+
+    def __init__(
+        self,
+        base: ClickHouseClient,
+        size: int,
+        *,
+        factory: Optional[Callable[[], ClickHouseClient]] = None,
+    ) -> None:
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        self.base = base
+        self.size = int(size)
+        self._factory = factory or base.clone
+        self._idle: "queue.LifoQueue[ClickHouseClient]" = queue.LifoQueue()
+        self._idle.put(base)
+        self._clones: List[ClickHouseClient] = []
+        self._opened = 1
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self) -> Iterator[ClickHouseClient]:
+        client = self._checkout()
+        try:
+            yield client
+        finally:
+            self._idle.put(client)
+
+    def _checkout(self) -> ClickHouseClient:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            grow = self._opened < self.size
+            if grow:
+                self._opened += 1
+        if not grow:
+            return self._idle.get()
+        try:
+            clone = self._factory()
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+        with self._lock:
+            self._clones.append(clone)
+        return clone
+
+    def close(self) -> None:
+        with self._lock:
+            clones, self._clones = self._clones, []
+            self._opened -= len(clones)
+        for clone in clones:
+            clone.close()
+
+    def __enter__(self) -> "ClickHouseClientPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
 def get_client(env_file: Optional[str] = None) -> ClickHouseClient:
     """Return a client configured from environment variables or a dotenv file."""
     if env_file:
@@ -0,0 +1,327 @@
+"""
+Shared HTTP transport for the API clients.
+
+:func:`build_session` (requests) and :func:`build_httpx_client` (httpx) give
+every integration the same setup: a keep-alive pool sized to the client's
+concurrency, ``gzip``/``br`` negotiation (``br`` when a brotli package is
+installed) and an optional urllib3 retry policy.  Both record per-host
+transport metrics in an :class:`HttpTelemetry`:
+
+* ``requests`` / ``errors`` - completed and failed requests;
+* ``connections_opened`` / ``connections_reused`` - new sockets vs requests
+  served over a pooled keep-alive connection;
+* ``connect_ms`` - DNS lookup plus TCP connect of new connections (urllib3
+  resolves inside the connect call, so the two are not separated);
+* ``tls_ms`` - TLS handshake of new connections;
+* ``ttfb_ms`` - request sent to response headers received;
+* ``bytes_wire`` / ``bytes_decoded`` - response body before and after
+  content decoding.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Iterable, Mapping, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.util import Retry, make_headers
+
+__all__ = [
+    "ACCEPT_ENCODING",
+    "HttpTelemetry",
+    "InstrumentedSession",
+    "RETRY_STATUS",
+    "build_httpx_client",
+    "build_session",
+]
+
+# urllib3 advertises only the codings it can decode (br/zstd when installed).
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class HttpTelemetry:
+    """Thread-safe per-host transport counters, see the module docstring."""
+
+    def __init__(self) -> None:
+        self._hosts: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> Dict[str, float]:
+        stats = self._hosts.get(host)
+        if stats is None:
+            stats = self._hosts[host] = {
+                "requests": 0,
+                "errors": 0,
+                "connections_opened": 0,
+                "connect_ms": 0.0,
+                "tls_ms": 0.0,
+                "ttfb_ms": 0.0,
+                "ttfb_ms_max": 0.0,
+                "bytes_wire": 0,
+                "bytes_decoded": 0,
+            }
+        return stats
+
+    def record_connect(self, host: str, connect_ms: float, tls_ms: float = 0.0) -> None:
+        with self._lock:
+            stats = self._host(host)
+            stats["connections_opened"] += 1
+            stats["connect_ms"] += connect_ms
+            stats["tls_ms"] += tls_ms
+
+    def record_response(
+        self, host: str, *, ttfb_ms: float, bytes_wire: int, bytes_decoded: int
+    ) -> None:
+        with self._lock:
+            stats = self._host(host)
+            stats["requests"] += 1
+            stats["ttfb_ms"] += ttfb_ms
+            stats["ttfb_ms_max"] = max(stats["ttfb_ms_max"], ttfb_ms)
+            stats["bytes_wire"] += bytes_wire
+            stats["bytes_decoded"] += bytes_decoded
+
+    def record_error(self, host: str) -> None:
+        with self._lock:
+            self._host(host)["errors"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host totals with averages, ready for ``metrics=``."""
+        with self._lock:
+            hosts = {host: dict(stats) for host, stats in self._hosts.items()}
+        result: Dict[str, Dict[str, Any]] = {}
+        for host, stats in sorted(hosts.items()):
+            opened = int(stats["connections_opened"])
+            served = int(stats["requests"])
+            result[host] = {
+                "requests": served,
+                "errors": int(stats["errors"]),
+                "connections_opened": opened,
+                "connections_reused": max(served - opened, 0),
+                "connect_ms_avg": round(stats["connect_ms"] / opened, 1) if opened else 0.0,
+                "tls_ms_avg": round(stats["tls_ms"] / opened, 1) if opened else 0.0,
+                "ttfb_ms_avg": round(stats["ttfb_ms"] / served, 1) if served else 0.0,
+                "ttfb_ms_max": round(stats["ttfb_ms_max"], 1),
+                "bytes_wire": int(stats["bytes_wire"]),
+                "bytes_decoded": int(stats["bytes_decoded"]),
+            }
+        return result
+
+
+# --------------------------------------------------------------------------- #
+# requests / urllib3
+# --------------------------------------------------------------------------- #
+class _TimedConnectionMixin:
+    """Report the connect and TLS time of every new socket to the telemetry."""
+
+    def __init__(self, *args: Any, telemetry: Optional[HttpTelemetry] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._telemetry = telemetry
+        self._connect_ms = 0.0
+
+    def _new_conn(self):  # type: ignore[no-untyped-def]
+        started = time.perf_counter()
+        sock = super()._new_conn()  # type: ignore[misc]
+        self._connect_ms = (time.perf_counter() - started) * 1000
+        return sock
+
+    def connect(self) -> None:
+        started = time.perf_counter()
+        super().connect()  # type: ignore[misc]
+        if self._telemetry is not None:
+            total_ms = (time.perf_counter() - started) * 1000
+            # Plain HTTP: the remainder is proxy tunnelling at most.
+            tls_ms = total_ms - self._connect_ms if isinstance(self, HTTPSConnection) else 0.0
+            self._telemetry.record_connect(self.host, self._connect_ms, max(tls_ms, 0.0))  # type: ignore[attr-defined]
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedPoolManager(PoolManager):
+    def __init__(self, *args: Any, telemetry: HttpTelemetry, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.telemetry = telemetry
+
+    def _new_pool(self, scheme, host, port, request_context=None):  # type: ignore[no-untyped-def]
+        pool = super()._new_pool(scheme, host, port, request_context)
+        # Set on the pool rather than in connection_pool_kw, which is part of the pool key.
+        pool.ConnectionCls = _TimedHTTPSConnection if scheme == "https" else _TimedHTTPConnection
+        pool.conn_kw = dict(pool.conn_kw, telemetry=self.telemetry)
+        return pool
+
+
+class _TimedAdapter(HTTPAdapter):
+    def __init__(self, telemetry: HttpTelemetry, **kwargs: Any) -> None:
+        self.telemetry = telemetry
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):  # type: ignore[no-untyped-def]
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _TimedPoolManager(
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            telemetry=self.telemetry,
+            **pool_kwargs,
+        )
+
+
+class InstrumentedSession(requests.Session):
+    """``requests.Session`` that feeds :attr:`telemetry` for every response."""
+
+    def __init__(self, telemetry: Optional[HttpTelemetry] = None) -> None:
+        super().__init__()
+        self.telemetry = telemetry or HttpTelemetry()
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        host = urlsplit(request.url or "").hostname or ""
+        try:
+            response = super().send(request, **kwargs)
+        except requests.RequestException:
+            self.telemetry.record_error(host)
+            raise
+        # Redirect hops are recorded by the nested send() calls; only the first
+        # response belongs to this call.
+        first = response.history[0] if response.history else response
+        decoded = 0 if kwargs.get("stream") else len(first.content or b"")
+        tell = getattr(first.raw, "tell", None)
+        wire = tell() if callable(tell) and not kwargs.get("stream") else decoded
+        self.telemetry.record_response(
+            host,
+            ttfb_ms=first.elapsed.total_seconds() * 1000,
+            bytes_wire=int(wire),
+            bytes_decoded=decoded,
+        )
+        return response
+
+    def http_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.telemetry.snapshot()
+
+
+def build_session(
+    *,
+    pool_size: int = 1,
+    retries: int = 0,
+    backoff_factor: float = 0.5,
+    retry_status: Iterable[int] = RETRY_STATUS,
+    headers: Optional[Mapping[str, str]] = None,
+    telemetry: Optional[HttpTelemetry] = None,
+) -> InstrumentedSession:
+    """
+    Return a keep-alive :class:`InstrumentedSession`.
+
+    ``pool_size`` is the number of connections kept per host and should match
+    the number of threads sharing the session (extra threads still get a
+    connection, it is just closed after use).  ``retries`` enables urllib3
+    retries of connection errors and ``retry_status`` responses honouring
+    ``Retry-After``; leave it at ``0`` for clients with their own retry loop.
+    """
+    session = InstrumentedSession(telemetry)
+    size = max(1, int(pool_size or 1))
+    max_retries: Any = 0
+    if retries > 0:
+        max_retries = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=tuple(retry_status),
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+    adapter = _TimedAdapter(
+        session.telemetry,
+        pool_connections=4,
+        pool_maxsize=size,
+        max_retries=max_retries,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+# --------------------------------------------------------------------------- #
+# httpx
+# --------------------------------------------------------------------------- #
+def build_httpx_client(
+    *,
+    pool_size: int = 1,
+    retries: int = 0,
+    telemetry: Optional[HttpTelemetry] = None,
+    **client_kwargs: Any,
+):  # type: ignore[no-untyped-def]
+    """
+    Return an ``httpx.Client`` with the same pool sizing and telemetry.
+
+    Timings come from the httpcore ``trace`` extension and the response body
+    is read in the response hook to count its bytes.  httpx negotiates
+    ``gzip``/``br`` by itself.  ``retries`` only covers connection errors
+    (httpx has no status retries).  The telemetry is available as
+    ``client.telemetry``.
+    """
+    import httpx  # pylint: disable=import-outside-toplevel
+
+    stats = telemetry or HttpTelemetry()
+    size = max(1, int(pool_size or 1))
+
+    def _on_request(request: "httpx.Request") -> None:
+        host = request.url.host
+        marks: Dict[str, float] = {}
+
+        def trace(event: str, info: Dict[str, Any]) -> None:
+            now = time.perf_counter()
+            if event.endswith(".started"):
+                marks[event[: -len(".started")]] = now
+                return
+            step = event[: -len(".complete")] if event.endswith(".complete") else ""
+            elapsed_ms = (now - marks.get(step, now)) * 1000
+            if step == "connection.connect_tcp":
+                marks["connect_ms"] = elapsed_ms
+                if request.url.scheme != "https":
+                    stats.record_connect(host, elapsed_ms)
+            elif step == "connection.start_tls":
+                stats.record_connect(host, marks.get("connect_ms", 0.0), elapsed_ms)
+            elif step.endswith("receive_response_headers"):
+                sent = next(
+                    (value for key, value in marks.items() if key.endswith("send_request_headers")),
+                    marks.get(step, now),
+                )
+                marks["ttfb_ms"] = (now - sent) * 1000
+
+        request.extensions["trace"] = trace
+        request.extensions["telemetry_marks"] = marks
+
+    def _on_response(response: "httpx.Response") -> None:
+        response.read()
+        marks = response.request.extensions.get("telemetry_marks", {})
+        stats.record_response(
+            response.request.url.host,
+            ttfb_ms=marks.get("ttfb_ms", 0.0),
+            bytes_wire=response.num_bytes_downloaded,
+            bytes_decoded=len(response.content),
+        )
+
+    limits = httpx.Limits(max_connections=size, max_keepalive_connections=size)
+    client = httpx.Client(
+        transport=httpx.HTTPTransport(limits=limits, retries=retries),
+        event_hooks={"request": [_on_request], "response": [_on_response]},
+        **client_kwargs,
+    )
+    client.telemetry = stats  # type: ignore[attr-defined]
+    return client
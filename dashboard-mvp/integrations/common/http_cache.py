@@ -0,0 +1,229 @@
+"""On-disk cache for slowly changing HTTP catalogues with conditional requests."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+__all__ = ["CacheEntry", "HttpCache", "FingerprintStore", "payload_fingerprint"]
+
+
+class CacheEntry:
+    """Cached response body plus the validators needed to revalidate it."""
+
+    __slots__ = ("payload", "etag", "last_modified", "stored_at")
+
+    def __init__(
+        self,
+        payload: Any,
+        *,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        stored_at: Optional[float] = None,
+    ) -> None:
+        self.payload = payload
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at if stored_at is not None else time.time()
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Return ``If-None-Match``/``If-Modified-Since`` for a revalidation request."""
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _atomic_write(path: Path, data: Dict[str, Any]) -> None:
+    fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, ensure_ascii=False)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+class HttpCache:
+    """
+    File-per-entry response cache keyed by method, URL, query and body hash.
+
+    Entries younger than ``ttl_seconds`` are served without a request; older
+    ones are revalidated with their ``ETag``/``Last-Modified`` validators.
+    Entries untouched for ``max_age_seconds`` are removed and the cache is
+    trimmed to ``max_entries`` (least recently stored first).
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        *,
+        ttl_seconds: float = 3600,
+        max_entries: int = 2000,
+        max_age_seconds: float = 7 * 24 * 3600,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = int(max_entries)
+        self.max_age_seconds = float(max_age_seconds)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        material = json.dumps(
+            [method.upper(), url, params or {}, json_body],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        path = self._path(key)
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                raw = json.load(handle)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Dropping unreadable HTTP cache entry %s: %s", path.name, exc)
+            self._remove(path)
+            return None
+        return CacheEntry(
+            raw.get("payload"),
+            etag=raw.get("etag"),
+            last_modified=raw.get("last_modified"),
+            stored_at=raw.get("stored_at"),
+        )
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return self.ttl_seconds > 0 and time.time() - entry.stored_at < self.ttl_seconds
+
+    def put(
+        self,
+        key: str,
+        payload: Any,
+        *,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        entry = CacheEntry(payload, etag=etag, last_modified=last_modified)
+        _atomic_write(
+            self._path(key),
+            {
+                "payload": entry.payload,
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+                "stored_at": entry.stored_at,
+            },
+        )
+
+    def touch(self, key: str, entry: CacheEntry) -> None:
+        """Restart the TTL of an entry confirmed by a ``304 Not Modified``."""
+        self.put(key, entry.payload, etag=entry.etag, last_modified=entry.last_modified)
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self.stats[outcome] = self.stats.get(outcome, 0) + 1
+
+    def snapshot_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def evict(self) -> int:
+        """Remove expired entries and trim to ``max_entries``; return the count removed."""
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        entries.sort()
+        now = time.time()
+        removed = 0
+        overflow = max(0, len(entries) - self.max_entries)
+        for index, (mtime, path) in enumerate(entries):
+            if index < overflow or now - mtime > self.max_age_seconds:
+                removed += self._remove(path)
+        if removed:
+            logger.info("Evicted %s HTTP cache entries from %s", removed, self.directory)
+        return removed
+
+    @staticmethod
+    def _remove(path: Path) -> int:
+        try:
+            path.unlink()
+            return 1
+        except OSError:
+            return 0
+
+
+def payload_fingerprint(payload: Any) -> str:
+    """Stable MD5 of a JSON-serialisable payload."""
+    material = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(material.encode("utf-8")).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Remember the fingerprint of every catalogue that reached the warehouse.
+
+    ``stage`` reports whether a payload differs from the last committed one and
+    keeps the new value pending; ``commit`` persists the pending values once the
+    load succeeded, so a failed run never hides a change from the next one.
+    """
+
+    FILENAME = "fingerprints.state"  # not *.json, so HttpCache.evict skips it
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        self.path = Path(directory) / self.FILENAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._committed: Dict[str, str] = {}
+        self._pending: Dict[str, str] = {}
+        try:
+            with self.path.open("r", encoding="utf-8") as handle:
+                loaded = json.load(handle)
+            if isinstance(loaded, dict):
+                self._committed = {str(k): str(v) for k, v in loaded.items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable fingerprint store %s: %s", self.path, exc)
+
+    def stage(self, name: str, payload: Any) -> bool:
+        """Return ``True`` when ``payload`` changed since the last commit."""
+        fingerprint = payload_fingerprint(payload)
+        self._pending[name] = fingerprint
+        return self._committed.get(name) != fingerprint
+
+    def commit(self) -> None:
+        if not self._pending:
+            return
+        self._committed.update(self._pending)
+        self._pending = {}
+        _atomic_write(self.path, self._committed)
@@ -7,54 +7,208 @@ import json
 import logging
 import os
 import sys
+import threading
 import time
-from typing import Any, Callable, Dict, Optional, Protocol, TypeVar
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Protocol, Tuple, TypeVar, Union
+
+from .serialize import dumps
 
 __all__ = [
+    "JsonLinesFormatter",
     "Metrics",
     "StructuredLogger",
     "get_logger",
+    "log_suppressed_summary",
     "setup_integrations_logger",
     "log_execution_time",
     "log_data_operation",
 ]
 
 Metrics = Dict[str, Any]
+# ``metrics`` may also be a callable, evaluated only when the record is emitted.
+MetricsArg = Union[Metrics, Callable[[], Metrics], None]
 
 _LOGGER_CONFIGURED = False
+_HANDLER: Optional[logging.Handler] = None
+
+# Messages logged with ``throttle=True`` are emitted this many times per
+# (logger, level, message) and counted afterwards (LOG_REPEAT_LIMIT).
+_DEFAULT_REPEAT_LIMIT = 20
+
+
+def _repeat_limit() -> int:
+    try:
+        return max(0, int(os.getenv("LOG_REPEAT_LIMIT", _DEFAULT_REPEAT_LIMIT)))
+    except ValueError:
+        return _DEFAULT_REPEAT_LIMIT
+
+
+class _Throttle:
+    """Occurrence counts of throttled messages, shared by all loggers."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.seen: Counter = Counter()
+        # Read on first use: the module is imported before entry points load
+        # their env file, which may set LOG_REPEAT_LIMIT.
+        self.limit: Optional[int] = None
+
+    def allow(self, key: Tuple[str, int, str]) -> bool:
+        with self.lock:
+            if self.limit is None:
+                self.limit = _repeat_limit()
+            self.seen[key] += 1
+            return self.seen[key] <= self.limit
+
+    def drain_suppressed(self) -> Dict[Tuple[str, int, str], int]:
+        with self.lock:
+            limit = self.limit or 0
+            suppressed = {
+                key: count - limit
+                for key, count in self.seen.items()
+                if count > limit
+            }
+            self.seen.clear()
+        return suppressed
+
+
+_THROTTLE = _Throttle()
+
+
+class _MetricsMessage:
+    """
+    Log message with metrics attached, rendered on first use.
+
+    Handlers call ``str()`` only for records that pass the level checks, so
+    disabled or filtered records never serialise their metrics.
+    """
+
+    __slots__ = ("message", "_metrics", "_rendered")
+
+    def __init__(self, message: str, metrics: MetricsArg) -> None:
+        self.message = message
+        self._metrics = metrics
+        self._rendered: Optional[str] = None
+
+    @property
+    def metrics(self) -> Optional[Metrics]:
+        if callable(self._metrics):
+            self._metrics = self._metrics()
+        return self._metrics
+
+    def __str__(self) -> str:
+        if self._rendered is None:
+            metrics = self.metrics
+            if not metrics:
+                self._rendered = str(self.message)
+            else:
+                try:
+                    serialized = json.dumps(metrics, ensure_ascii=False, default=str)
+                except TypeError:
+                    serialized = str(metrics)
+                self._rendered = f"{self.message} | metrics={serialized}"
+        return self._rendered
 
 
 class StructuredLogger(logging.Logger):
-    """Logger that supports optional ``metrics`` keyword argument."""
+    """
+    Logger that supports optional ``metrics`` and ``throttle`` keyword arguments.
+
+    ``metrics`` (a dict, or a callable returning one) is only serialised when
+    the record is actually emitted. ``throttle=True`` marks messages logged
+    from hot loops: only the first ``LOG_REPEAT_LIMIT`` occurrences are
+    emitted and the rest are reported by :func:`log_suppressed_summary`.
+    """
+
+    def _log_metrics(
+        self,
+        level: int,
+        msg: str,
+        args: Tuple[Any, ...],
+        metrics: MetricsArg,
+        throttle: bool,
+        kwargs: Dict[str, Any],
+    ) -> None:
+        if not self.isEnabledFor(level):
+            return
+        if throttle and not _THROTTLE.allow((self.name, level, msg)):
+            return
+        message: Any = _MetricsMessage(msg, metrics) if metrics else msg
+        kwargs.setdefault("stacklevel", 3)
+        self._log(level, message, args, **kwargs)
+
+    def debug(self, msg: str, *args: Any, metrics: MetricsArg = None, throttle: bool = False, **kwargs: Any) -> None:  # type: ignore[override]
+        self._log_metrics(logging.DEBUG, msg, args, metrics, throttle, kwargs)
 
-    def _attach_metrics(self, message: str, metrics: Optional[Metrics]) -> str:
-        if not metrics:
-            return message
-        try:
-            serialized = json.dumps(metrics, ensure_ascii=False, default=str)
-        except TypeError:
-            serialized = str(metrics)
-        return f"{message} | metrics={serialized}"
+    def info(self, msg: str, *args: Any, metrics: MetricsArg = None, throttle: bool = False, **kwargs: Any) -> None:  # type: ignore[override]
+        self._log_metrics(logging.INFO, msg, args, metrics, throttle, kwargs)
 
-    def debug(self, msg: str, *args: Any, metrics: Optional[Metrics] = None, **kwargs: Any) -> None:  # type: ignore[override]
-        super().debug(self._attach_metrics(msg, metrics), *args, **kwargs)
+    def warning(self, msg: str, *args: Any, metrics: MetricsArg = None, throttle: bool = False, **kwargs: Any) -> None:  # type: ignore[override]
+        self._log_metrics(logging.WARNING, msg, args, metrics, throttle, kwargs)
 
-    def info(self, msg: str, *args: Any, metrics: Optional[Metrics] = None, **kwargs: Any) -> None:  # type: ignore[override]
-        super().info(self._attach_metrics(msg, metrics), *args, **kwargs)
+    def error(self, msg: str, *args: Any, metrics: MetricsArg = None, throttle: bool = False, **kwargs: Any) -> None:  # type: ignore[override]
+        self._log_metrics(logging.ERROR, msg, args, metrics, throttle, kwargs)
 
-    def warning(self, msg: str, *args: Any, metrics: Optional[Metrics] = None, **kwargs: Any) -> None:  # type: ignore[override]
-        super().warning(self._attach_metrics(msg, metrics), *args, **kwargs)
+    def critical(self, msg: str, *args: Any, metrics: MetricsArg = None, throttle: bool = False, **kwargs: Any) -> None:  # type: ignore[override]
+        self._log_metrics(logging.CRITICAL, msg, args, metrics, throttle, kwargs)
 
-    def error(self, msg: str, *args: Any, metrics: Optional[Metrics] = None, **kwargs: Any) -> None:  # type: ignore[override]
-        super().error(self._attach_metrics(msg, metrics), *args, **kwargs)
 
-    def critical(self, msg: str, *args: Any, metrics: Optional[Metrics] = None, **kwargs: Any) -> None:  # type: ignore[override]
-        super().critical(self._attach_metrics(msg, metrics), *args, **kwargs)
+def log_suppressed_summary() -> Dict[str, int]:
+    """
+    Log how many throttled messages were dropped since the last call.
+
+    Call at the end of a run; each logger reports its own messages at their
+    original level. Returns ``{message: suppressed_count}``.
+    """
+    summary: Dict[str, int] = {}
+    for (name, level, msg), count in _THROTTLE.drain_suppressed().items():
+        summary[msg] = summary.get(msg, 0) + count
+        logging.getLogger(name).log(
+            level,
+            _MetricsMessage(
+                "Suppressed repeated log message",
+                {"message": msg, "suppressed": count},
+            ),
+        )
+    return summary
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One JSON object per record: ``ts``, ``logger``, ``level``, ``message``
+    and the record's ``metrics`` as a nested object (serialised once).
+
+    Enabled for the root handler with ``LOG_FORMAT=json``.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "logger": record.name,
+            "level": record.levelname,
+        }
+        msg = record.msg
+        if isinstance(msg, _MetricsMessage):
+            message = str(msg.message)
+            metrics = msg.metrics
+        else:
+            message = str(msg)
+            metrics = None
+        if record.args:
+            message = message % record.args
+        payload["message"] = message
+        if metrics:
+            payload["metrics"] = metrics
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return dumps(payload)
 
 
 def _configure_root_logger() -> None:
     """Initialise root logger to emit ISO timestamps to stdout."""
-    global _LOGGER_CONFIGURED  # pylint: disable=global-statement
+    global _LOGGER_CONFIGURED, _HANDLER  # pylint: disable=global-statement
 
     if _LOGGER_CONFIGURED:
         return
@@ -62,13 +216,18 @@ def _configure_root_logger() -> None:
     logging.setLoggerClass(StructuredLogger)
 
     handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter(
-        fmt="%(asctime)sZ %(name)s %(levelname)s %(message)s",
-        datefmt="%Y-%m-%dT%H:%M:%S",
-    )
-    formatter.converter = time.gmtime  # type: ignore[attr-defined]
+    formatter: logging.Formatter
+    if os.getenv("LOG_FORMAT", "").lower() == "json":
+        formatter = JsonLinesFormatter()
+    else:
+        formatter = logging.Formatter(
+            fmt="%(asctime)sZ %(name)s %(levelname)s %(message)s",
+            datefmt="%Y-%m-%dT%H:%M:%S",
+        )
+        formatter.converter = time.gmtime  # type: ignore[attr-defined]
     handler.setFormatter(formatter)
 
+    _HANDLER = handler
     root = logging.getLogger()
     root.handlers = [handler]
     level_name = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)  # type: ignore[attr-defined]
@@ -82,6 +241,10 @@ def get_logger(name: str) -> StructuredLogger:
     _configure_root_logger()
     logger = logging.getLogger(name)
     logger.propagate = False
+    # Non-propagating loggers need the stdout handler themselves; otherwise
+    # only WARNING+ reached stderr through logging.lastResort.
+    if not logger.handlers and _HANDLER is not None:
+        logger.addHandler(_HANDLER)
     return logger  # type: ignore[return-value]
 
 
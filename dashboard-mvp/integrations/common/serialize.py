@@ -0,0 +1,153 @@
+"""JSON serialisation of raw API payloads stored in staging tables."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Union
+
+try:  # orjson is optional; the stdlib fallback produces the same text
+    # apart from the exponent spelling of very large/small floats (1e16 vs 1e+16).
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None  # type: ignore[assignment]
+
+try:  # zstandard is only needed for PAYLOAD_MODE=zstd.
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None  # type: ignore[assignment]
+
+__all__ = ["PAYLOAD_MODES", "PayloadSerializer", "dumps", "strip_keys"]
+
+PAYLOAD_MODES = ("json", "zstd", "hash")
+
+if orjson is not None:
+    # Datetimes/dataclasses go through ``default=str`` like in the json path.
+    _ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+def dumps(obj: Any, *, sort_keys: bool = False) -> str:
+    """
+    Serialise ``obj`` to compact UTF-8 JSON (no ASCII escaping).
+
+    Uses orjson when installed and falls back to :mod:`json` for values it
+    rejects (e.g. integers wider than 64 bits). Unknown types are
+    stringified with ``str``.
+    """
+    if orjson is not None:
+        options = _ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=str, option=options).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        separators=(",", ":"),
+        default=str,
+    )
+
+
+def strip_keys(obj: Any, keys: FrozenSet[str]) -> Any:
+    """Return a copy of ``obj`` without ``keys`` at any nesting level."""
+    if not keys:
+        return obj
+    if isinstance(obj, dict):
+        return {
+            key: strip_keys(value, keys) for key, value in obj.items() if key not in keys
+        }
+    if isinstance(obj, list):
+        return [strip_keys(value, keys) for value in obj]
+    return obj
+
+
+class PayloadSerializer:
+    """
+    Turn raw payloads into the value of a ``payload_json`` column.
+
+    ``mode`` selects what is stored:
+
+    * ``json`` - the JSON text;
+    * ``zstd`` - the JSON text compressed with ZSTD (``zstandard`` package);
+    * ``hash`` - the md5 of the JSON text. The text itself is kept once per
+      hash and handed out by :meth:`drain_side_rows` for a side table.
+
+    ``drop_keys`` are removed from the payload at any depth before it is
+    serialised (PII or noisy fields nobody reads back).
+    """
+
+    def __init__(
+        self,
+        mode: str = "json",
+        *,
+        drop_keys: Iterable[str] = (),
+        sort_keys: bool = True,
+        zstd_level: int = 3,
+    ) -> None:
+        if mode not in PAYLOAD_MODES:
+            raise ValueError(
+                f"Unknown payload mode {mode!r}, expected one of {', '.join(PAYLOAD_MODES)}"
+            )
+        if mode == "zstd" and zstandard is None:
+            raise ValueError("Payload mode 'zstd' requires the zstandard package")
+        self.mode = mode
+        self.drop_keys: FrozenSet[str] = frozenset(drop_keys)
+        self.sort_keys = sort_keys
+        self.zstd_level = zstd_level
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending: Dict[str, str] = {}
+        self._seen: set[str] = set()
+        self._stats = {"payloads": 0, "json_bytes": 0, "stored_bytes": 0}
+
+    def __call__(self, payload: Optional[Dict[str, Any]]) -> Union[str, bytes]:
+        text = dumps(strip_keys(payload or {}, self.drop_keys), sort_keys=self.sort_keys)
+        raw = text.encode("utf-8")
+        stored: Union[str, bytes]
+        if self.mode == "zstd":
+            stored = self._compressor().compress(raw)
+            stored_bytes = len(stored)
+        elif self.mode == "hash":
+            stored = hashlib.md5(raw).hexdigest()
+            stored_bytes = len(stored)
+            with self._lock:
+                if stored not in self._seen:
+                    self._seen.add(stored)
+                    self._pending[stored] = text
+        else:
+            stored = text
+            stored_bytes = len(raw)
+        with self._lock:
+            self._stats["payloads"] += 1
+            self._stats["json_bytes"] += len(raw)
+            self._stats["stored_bytes"] += stored_bytes
+        return stored
+
+    def _compressor(self) -> "zstandard.ZstdCompressor":
+        # ZstdCompressor instances must not be shared between threads.
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(level=self.zstd_level)
+            self._local.compressor = compressor
+        return compressor
+
+    def drain_side_rows(self, version: int) -> List[Dict[str, Any]]:
+        """Return (and forget) the ``payload_hash``/``payload_json`` rows not yet handed out."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return [
+            {"payload_hash": digest, "payload_json": text, "_ver": version}
+            for digest, text in pending.items()
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+        stats["mode"] = self.mode
+        return stats
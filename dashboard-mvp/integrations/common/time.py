@@ -5,8 +5,10 @@ from __future__ import annotations
 import calendar
 import logging
 import os
+from contextvars import ContextVar
+from functools import lru_cache
 from datetime import date, datetime, time as dt_time, timedelta
-from typing import Iterable, Optional, Tuple, Union
+from typing import Dict, Iterable, Optional, Tuple, Union
 
 import pytz
 
@@ -15,6 +17,7 @@ __all__ = [
     "now_msk",
     "today_msk",
     "to_msk",
+    "localize_msk",
     "to_date",
     "date_range",
     "days_ago",
@@ -69,41 +72,74 @@ def today_msk() -> date:
     return now_msk().date()
 
 
+_STRPTIME_PATTERNS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%fZ",
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%d",
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y",
+)
+
+# Pattern that matched the last non-ISO string per call site (the ``hint`` of
+# :func:`to_msk`); tried first next time since a given field almost always
+# carries one format.  Call sites without a hint share the ``None`` entry.
+_last_patterns: Dict[Optional[str], str] = {}
+_hint: ContextVar[Optional[str]] = ContextVar("to_msk_hint", default=None)
+
+PARSE_CACHE_SIZE = 8192
+
+
+def _parse_naive_or_aware(value: str) -> datetime:
+    """Parse a stripped string, ISO-8601 first, then the legacy patterns."""
+    try:
+        # Covers every ISO shape the patterns below accept (and 'Z' suffixes).
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+
+    hint = _hint.get()
+    last = _last_patterns.get(hint)
+    if last is not None:
+        try:
+            return datetime.strptime(value, last)
+        except ValueError:
+            pass
+    for pattern in _STRPTIME_PATTERNS:
+        if pattern == last:
+            continue
+        try:
+            dt = datetime.strptime(value, pattern)
+        except ValueError:
+            continue
+        _last_patterns[hint] = pattern
+        return dt
+    raise ValueError(f"Unsupported datetime string: {value}")
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_string(value: str, fmt: Optional[str], tz: pytz.BaseTzInfo) -> datetime:
+    """Parse and convert a datetime string; memoised because the same ``payed_at``
+    is converted by the client window filter and again by the transformer."""
+    dt = datetime.strptime(value, fmt) if fmt else _parse_naive_or_aware(value)
+    if dt.tzinfo is None:
+        dt = pytz.UTC.localize(dt)
+    return dt.astimezone(tz)
+
+
 def _parse_datetime(value: Union[str, datetime, date], fmt: Optional[str]) -> datetime:
     """Coerce common input shapes into a timezone-aware datetime."""
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            raise ValueError("Empty datetime string")
+        return _parse_string(value, fmt, _current_timezone())
     if isinstance(value, datetime):
         dt = value
     elif isinstance(value, date):
         dt = datetime.combine(value, dt_time.min)
-    elif isinstance(value, str):
-        value = value.strip()
-        if not value:
-            raise ValueError("Empty datetime string")
-        if fmt:
-            dt = datetime.strptime(value, fmt)
-        else:
-            for pattern in (
-                "%Y-%m-%d %H:%M:%S",
-                "%Y-%m-%dT%H:%M:%S.%fZ",
-                "%Y-%m-%dT%H:%M:%S.%f%z",
-                "%Y-%m-%dT%H:%M:%SZ",
-                "%Y-%m-%dT%H:%M:%S%z",
-                "%Y-%m-%d",
-                "%d.%m.%Y %H:%M:%S",
-                "%d.%m.%Y",
-            ):
-                try:
-                    dt = datetime.strptime(value, pattern)
-                    break
-                except ValueError:
-                    continue
-            else:
-                try:
-                    # Last resort: let fromisoformat handle offsets like '+03:00'
-                    normalized = value.replace("Z", "+00:00")
-                    dt = datetime.fromisoformat(normalized)
-                except ValueError as exc:
-                    raise ValueError(f"Unsupported datetime string: {value}") from exc
     else:
         raise TypeError(f"Unsupported type for datetime conversion: {type(value)!r}")
 
@@ -113,9 +149,33 @@ def _parse_datetime(value: Union[str, datetime, date], fmt: Optional[str]) -> da
     return dt.astimezone(_current_timezone())
 
 
-def to_msk(value: Union[str, datetime, date], fmt: Optional[str] = None) -> datetime:
-    """Convert the provided value to a timezone-aware datetime in MSK."""
-    return _parse_datetime(value, fmt)
+def to_msk(
+    value: Union[str, datetime, date],
+    fmt: Optional[str] = None,
+    *,
+    hint: Optional[str] = None,
+) -> datetime:
+    """
+    Convert the provided value to a timezone-aware datetime in MSK.
+
+    ``hint`` names the call site; the legacy pattern that last matched for
+    it is tried first, so call sites with different formats do not keep
+    overwriting each other's guess.
+    """
+    if hint is None:
+        return _parse_datetime(value, fmt)
+    token = _hint.set(hint)
+    try:
+        return _parse_datetime(value, fmt)
+    finally:
+        _hint.reset(token)
+
+
+def localize_msk(value: datetime) -> datetime:
+    """Attach the configured timezone to a naive MSK wall-clock datetime."""
+    if value.tzinfo is not None:
+        return value.astimezone(_current_timezone())
+    return _current_timezone().localize(value)
 
 
 def to_date(value: Union[str, datetime, date], fmt: Optional[str] = None) -> date:
@@ -5,6 +5,7 @@
 
 import re
 import logging
+from functools import lru_cache
 from typing import Optional, Dict, Any, Tuple
 
 # Настройка логгера
@@ -15,6 +16,15 @@ UTM_CONTENT_PATTERN = re.compile(
     r"^(?P<city>[a-zа-я\-]+)_(?P<dd>\d{2})_(?P<mm>\d{2})$", re.IGNORECASE
 )
 
+# Символы, которые удаляются из названия города перед поиском в словаре
+CITY_CLEAN_PATTERN = re.compile(r"[^\wа-я\-]")
+
+# Размер LRU-кэшей нормализации: одни и те же utm_content повторяются
+# тысячи раз за прогон, различных значений - единицы сотен.
+UTM_CACHE_SIZE = 4096
+
+UTM_PARAMS = ("utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content")
+
 # Словарь для нормализации названий городов
 CITY_NORMALIZATION = {
     "msk": "москва",
@@ -50,15 +60,12 @@ CITY_NORMALIZATION = {
     "kursk": "курск",
     "ivanovo": "иваново",
     "bryansk": "брянск",
-    "tver": "тверь",
     "kaluga": "калуга",
     "kostroma": "кострома",
     "smolensk": "смоленск",
     "orlov": "орёл",
     "tambov": "тамбов",
     "vladimir": "владимир",
-    "ivanovo": "иваново",
-    "yaroslavl": "ярославль",
     "pskov": "псков",
     "velikiy_novgorod": "великий новгород",
     "petrozavodsk": "петрозаводск",
@@ -73,7 +80,6 @@ CITY_NORMALIZATION = {
     "salekhard": "салехард",
     "khanty-mansiysk": "ханты-мансийск",
     "yekaterinburg": "екатеринбург",
-    "chelyabinsk": "челябинск",
     "tyumen": "тюмень",
     "surgut": "сургут",
     "nizhnevartovsk": "нижневартовск",
@@ -83,30 +89,11 @@ CITY_NORMALIZATION = {
     "izhevsk": "ижевск",
     "kirov": "киров",
     "cheboksary": "чебоксары",
-    "ulyanovsk": "ульяновск",
-    "saransk": "саранск",
     "yoshkar-ola": "йошкар-ола",
-    "kazan": "казань",
     "sterlitamak": "стерлитамак",
-    "ufa": "уфа",
     "orenburg": "оренбург",
-    "penza": "пенза",
-    "samara": "самара",
     "tolyatti": "тольятти",
-    "izhevsk": "ижевск",
-    "kirov": "киров",
-    "cheboksary": "чебоксары",
-    "ulyanovsk": "ульяновск",
-    "saransk": "саранск",
-    "yoshkar-ola": "йошкар-ола",
-    "kazan": "казань",
-    "sterlitamak": "стерлитамак",
-    "ufa": "уфа",
-    "orenburg": "оренбург",
-    "penza": "пенза",
-    "samara": "самара",
     "tol_yatti": "тольятти",
-    "naberezhnye_chelny": "набережные челны",
     "almaty": "алматы",
     "bishkek": "бишкек",
     "tashkent": "ташкент",
@@ -137,7 +124,6 @@ CITY_NORMALIZATION = {
     "gorlovka": "горловка",
     "kramatorsk": "краматорск",
     "slavyansk": "славянск",
-    "mariupol": "мариуполь",
     "berdyansk": "бердянск",
     "melitopol": "мелитополь",
     "genichesk": "геническ",
@@ -146,10 +132,8 @@ CITY_NORMALIZATION = {
     "krasnoperekopsk": "красноперекопск",
     "dzhankoy": "джанкой",
     "saki": "саки",
-    "evpatoriya": "евпатория",
     "sudak": "судак",
     "alushta": "алушта",
-    "yalta": "ялта",
     "foros": "форос",
     "gaspra": "гаспра",
     "miskhor": "мисхор",
@@ -187,10 +171,8 @@ CITY_NORMALIZATION = {
     "lenino": "ленино",
     "nizhne": "нижнее",
     "novo": "ново",
-    "oktyabrskoye": "октябрьское",
     "peryatyn": "перятин",
     "podgornoye": "подгорное",
-    "pervomayskoye": "первомайское",
     "raduzhnoye": "радужное",
     "rybache": "рыбачье",
     "severnoye": "северное",
@@ -199,7 +181,6 @@ CITY_NORMALIZATION = {
     "stroganovka": "строгановка",
     "tabachnoye": "табачное",
     "ternovka": "терновка",
-    "ufa": "уфа",
     "kholodnoye": "холодное",
     "chayka": "чайка",
     "shchelkino": "щёлкино",
@@ -426,18 +407,18 @@ def normalize_city(city: str) -> str:
     """
     if not city:
         return ""
+    return _normalize_city(city)
 
+
+@lru_cache(maxsize=UTM_CACHE_SIZE)
+def _normalize_city(city: str) -> str:
     city_lower = city.lower().strip()
 
     # Удаляем лишние символы
-    city_clean = re.sub(r"[^\wа-я\-]", "", city_lower)
-
-    # Если город есть в словаре нормализации
-    if city_clean in CITY_NORMALIZATION:
-        return CITY_NORMALIZATION[city_clean]
+    city_clean = CITY_CLEAN_PATTERN.sub("", city_lower)
 
-    # Возвращаем очищенное название
-    return city_clean
+    # Если город есть в словаре нормализации, иначе - очищенное название
+    return CITY_NORMALIZATION.get(city_clean, city_clean)
 
 
 def parse_utm_content(utm_content: str) -> Optional[Dict[str, Any]]:
@@ -453,15 +434,22 @@ def parse_utm_content(utm_content: str) -> Optional[Dict[str, Any]]:
     if not utm_content:
         return None
 
+    parsed = _parse_utm_content(utm_content)
+    return dict(parsed) if parsed is not None else None
+
+
+@lru_cache(maxsize=UTM_CACHE_SIZE)
+def _parse_utm_content(utm_content: str) -> Optional[Tuple[Tuple[str, Any], ...]]:
+    """Кэшируемая часть :func:`parse_utm_content` (предупреждения пишутся один раз на значение)."""
     match = UTM_CONTENT_PATTERN.match(utm_content.strip())
     if not match:
         # Fallback: keep utm_content, but leave derived fields empty to avoid noisy warnings
-        return {
-            "utm_content": utm_content,
-            "utm_city": "",
-            "utm_day": 0,
-            "utm_month": 0,
-        }
+        return (
+            ("utm_content", utm_content),
+            ("utm_city", ""),
+            ("utm_day", 0),
+            ("utm_month", 0),
+        )
 
     try:
         city = normalize_city(match.group("city"))
@@ -477,12 +465,12 @@ def parse_utm_content(utm_content: str) -> Optional[Dict[str, Any]]:
             logger.warning(f"Некорректный месяц в utm_content: {utm_content}")
             return None
 
-        return {
-            "utm_content": utm_content,
-            "utm_city": city,
-            "utm_day": day,
-            "utm_month": month,
-        }
+        return (
+            ("utm_content", utm_content),
+            ("utm_city", city),
+            ("utm_day", day),
+            ("utm_month", month),
+        )
     except (ValueError, AttributeError) as e:
         logger.warning(f"Ошибка при парсинге utm_content {utm_content}: {e}")
         return None
@@ -498,27 +486,50 @@ def extract_utm_params(params: Dict[str, str]) -> Dict[str, Any]:
     Returns:
         dict: Словарь с UTM-параметрами
     """
+    raw = tuple(params.get(utm_param, "") for utm_param in UTM_PARAMS)
+    try:
+        return dict(_extract_utm_params(raw))
+    except TypeError:
+        # Нехешируемые значения обрабатываются без кэша
+        return dict(_extract_utm_params.__wrapped__(raw))
+
+
+@lru_cache(maxsize=UTM_CACHE_SIZE)
+def _extract_utm_params(raw: Tuple[str, ...]) -> Tuple[Tuple[str, Any], ...]:
     result = {}
 
     # Базовые UTM-параметры
-    for utm_param in [
-        "utm_source",
-        "utm_medium",
-        "utm_campaign",
-        "utm_term",
-        "utm_content",
-    ]:
-        value = params.get(utm_param, "").strip()
+    for utm_param, raw_value in zip(UTM_PARAMS, raw):
+        value = raw_value.strip()
         if value:
             result[utm_param] = value
 
     # Дополнительный парсинг utm_content
     if "utm_content" in result:
-        parsed = parse_utm_content(result["utm_content"])
+        parsed = _parse_utm_content(result["utm_content"])
         if parsed:
             result.update(parsed)
 
-    return result
+    return tuple(result.items())
+
+
+def utm_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Статистика LRU-кэшей нормализации UTM (для метрик логгера)."""
+    stats = {}
+    for name, cached in (
+        ("extract_utm_params", _extract_utm_params),
+        ("parse_utm_content", _parse_utm_content),
+        ("normalize_city", _normalize_city),
+    ):
+        info = cached.cache_info()
+        calls = info.hits + info.misses
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "hit_rate": round(info.hits / calls, 4) if calls else 0.0,
+        }
+    return stats
 
 
 def build_utm_content(city: str, day: int, month: int) -> str:
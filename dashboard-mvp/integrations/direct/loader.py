@@ -21,6 +21,7 @@ from integrations.common import (
     setup_integrations_logger, log_data_operation,
     parse_utm_content, extract_utm_params
 )
+from integrations.common.http import build_session
 
 # Настройка логгера
 logger = setup_integrations_logger('direct')
@@ -51,7 +52,7 @@ class DirectAPIClient:
         self.client_id = client_id
         self.api_url = api_url or os.getenv('DIRECT_API_URL', 'https://api.direct.yandex.ru/json/v5')
         self.timeout = timeout
-        self.session = requests.Session()
+        self.session = build_session(retries=3)
         self.session.headers.update({
             'Authorization': f'Bearer {self.token}',
             'Client-Login': self.login,
@@ -527,6 +528,7 @@ def main():
         )
         
         logger.info(f"Загрузка успешно завершена, загружено строк: {rows_count}")
+        logger.info("HTTP-транспорт Яндекс.Директ", metrics=api_client.session.http_stats())
     
     except Exception as e:
         logger.error(f"Ошибка при выполнении загрузчика: {e}")
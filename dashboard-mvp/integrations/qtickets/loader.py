@@ -20,6 +20,7 @@ from integrations.common import (
     now_msk, today_msk, to_date, days_ago,
     setup_integrations_logger, log_data_operation
 )
+from integrations.common.http import build_session
 
 # Настройка логгера
 logger = setup_integrations_logger('qtickets')
@@ -39,7 +40,7 @@ class QTicketsAPIClient:
         self.token = token
         self.api_url = api_url or os.getenv('QTICKETS_API_URL', 'https://api.qtickets.ru/v1')
         self.timeout = timeout
-        self.session = requests.Session()
+        self.session = build_session(retries=3)
         self.session.headers.update({
             'Authorization': f'Bearer {self.token}',
             'Content-Type': 'application/json',
@@ -413,6 +414,7 @@ def main():
         )
         
         logger.info(f"Загрузка успешно завершена: {results}")
+        logger.info("HTTP-транспорт QTickets", metrics=api_client.session.http_stats())
         
     except Exception as e:
         logger.error(f"Ошибка при выполнении загрузчика: {e}")
@@ -0,0 +1,182 @@
+"""
+Time slicing and checkpoints for long QTickets order windows.
+
+Large windows (the first-run backfill in particular) are cut into slices
+aligned to ``slice_hours`` boundaries counted from MSK midnight.  During the
+initial backfill every finished slice is recorded in
+``meta_qtickets_backfill_slices`` under a backfill id, so that a retry of the
+same backfill only refetches the slices that failed; completed slices are
+replayed from ``stg_qtickets_api_orders_raw`` to rebuild the daily aggregates.
+Regular and repair runs are not checkpointed and always refetch their window.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from integrations.common.ch import ClickHouseClient
+from integrations.common.logging import setup_integrations_logger
+from integrations.common.time import now_msk, to_msk
+
+logger = setup_integrations_logger("qtickets_api")
+
+Slice = Tuple[datetime, datetime]
+
+SALES_REPLAY_COLUMNS = (
+    "event_id",
+    "city",
+    "sale_ts",
+    "tickets_sold",
+    "revenue",
+    "utm_source",
+    "utm_medium",
+    "utm_campaign",
+    "utm_content",
+    "utm_term",
+)
+
+
+def build_slices(
+    window_start: datetime, window_end: datetime, slice_hours: int
+) -> List[Slice]:
+    """
+    Split ``[window_start, window_end)`` into aligned slices.
+
+    Inner boundaries fall on multiples of ``slice_hours`` from the MSK midnight
+    of ``window_start``, so full slices keep identical bounds from run to run
+    and can be matched against stored checkpoints.  Only the first and last
+    slices may be partial.
+    """
+    if slice_hours <= 0 or window_end <= window_start:
+        return [(window_start, window_end)]
+
+    step = timedelta(hours=slice_hours)
+    start = to_msk(window_start)
+    end = to_msk(window_end)
+    anchor = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    boundary = anchor + step * ((start - anchor) // step + 1)
+
+    slices: List[Slice] = []
+    cursor = start
+    while boundary < end:
+        slices.append((cursor, boundary))
+        cursor = boundary
+        boundary += step
+    slices.append((cursor, end))
+    return slices
+
+
+def backfill_window_id(window_start: datetime, hours: int) -> str:
+    """
+    Identify one initial backfill for its checkpoints.
+
+    Retries of a failed backfill on the same MSK day share the id and resume
+    from its checkpoints; a later backfill (e.g. after the guard table was
+    cleared) gets a new id and refetches everything.
+    """
+    return f"initial:{hours}h:{to_msk(window_start):%Y%m%d}"
+
+
+def slice_key(item: Slice) -> Tuple[datetime, datetime]:
+    """Return the naive MSK bounds used as the checkpoint key."""
+    start, end = item
+    return (
+        to_msk(start).replace(tzinfo=None, microsecond=0),
+        to_msk(end).replace(tzinfo=None, microsecond=0),
+    )
+
+
+class SliceCheckpoints:
+    """
+    Read and write per-slice completion markers for one backfill of a job.
+
+    Checkpoints are an optimisation only: when the table is missing or
+    unreadable the backfill proceeds without them and refetches every slice.
+    """
+
+    def __init__(
+        self, ch_client: ClickHouseClient, table: str, job: str, backfill_id: str
+    ) -> None:
+        self.ch_client = ch_client
+        self.table = table
+        self.job = job
+        self.backfill_id = backfill_id
+        self.available = True
+
+    def _disable(self, exc: Exception) -> None:
+        self.available = False
+        logger.warning(
+            "Backfill checkpoints unavailable; refetching all slices",
+            metrics={"table": self.table, "error": str(exc)},
+        )
+
+    def completed(self, slices: Iterable[Slice]) -> Set[Tuple[datetime, datetime]]:
+        """Return keys of the given slices that already finished successfully."""
+        keys = {slice_key(item) for item in slices}
+        if not keys or not self.available:
+            return set()
+        try:
+            result = self.ch_client.execute(
+                f"SELECT slice_start, slice_end FROM {self.table} FINAL "
+                "WHERE job = %(job)s AND backfill_id = %(backfill_id)s "
+                "AND status = 'ok' "
+                "AND slice_start >= %(start)s AND slice_end <= %(end)s",
+                {
+                    "job": self.job,
+                    "backfill_id": self.backfill_id,
+                    "start": min(key[0] for key in keys),
+                    "end": max(key[1] for key in keys),
+                },
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            self._disable(exc)
+            return set()
+        done = {(row[0], row[1]) for row in getattr(result, "result_rows", None) or []}
+        return keys & done
+
+    def mark(
+        self,
+        item: Slice,
+        *,
+        status: str,
+        orders: int = 0,
+        sales_rows: int = 0,
+        error: str = "",
+    ) -> None:
+        if not self.available:
+            return
+        slice_start, slice_end = slice_key(item)
+        try:
+            self.ch_client.insert(
+                self.table,
+                [
+                    {
+                        "job": self.job,
+                        "backfill_id": self.backfill_id,
+                        "slice_start": slice_start,
+                        "slice_end": slice_end,
+                        "status": status,
+                        "orders": int(orders),
+                        "sales_rows": int(sales_rows),
+                        "error": error[:1000],
+                        "updated_at": now_msk().replace(tzinfo=None),
+                    }
+                ],
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            self._disable(exc)
+
+
+def replay_sales_rows(
+    ch_client: ClickHouseClient, table: str, item: Slice
+) -> List[Dict[str, Any]]:
+    """Read staged sales rows of a completed slice back for re-aggregation."""
+    slice_start, slice_end = slice_key(item)
+    result = ch_client.execute(
+        f"SELECT {', '.join(SALES_REPLAY_COLUMNS)} FROM {table} FINAL "
+        "WHERE sale_ts >= %(start)s AND sale_ts < %(end)s",
+        {"start": slice_start, "end": slice_end},
+    )
+    rows = getattr(result, "result_rows", None) or []
+    return [dict(zip(SALES_REPLAY_COLUMNS, row)) for row in rows]
@@ -9,13 +9,20 @@ errors (5xx), and normalises responses for downstream processing.
 from __future__ import annotations
 
 import json
+import random
+import threading
 import time
-from datetime import datetime, timedelta
-from typing import Any, Dict, Iterable, List, Optional, Sequence
-from urllib.parse import urljoin
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from urllib.parse import urljoin, urlsplit
 
 import requests
 
+from integrations.common.http import build_session
+from integrations.common.http_cache import CacheEntry, HttpCache
 from integrations.common.logging import StructuredLogger, setup_integrations_logger
 from integrations.common.time import now_msk, to_msk
 
@@ -51,10 +58,116 @@ class QticketsApiError(RuntimeError):
         return {k: v for k, v in payload.items() if v not in (None, "")}
 
 
+class _HostState:
+    __slots__ = ("rate", "next_slot", "blocked_until", "starts", "stats")
+
+    def __init__(self, rate: Optional[float]) -> None:
+        self.rate = rate
+        self.next_slot = 0.0
+        self.blocked_until = 0.0
+        self.starts: deque = deque(maxlen=32)
+        self.stats = {"requests": 0, "throttled": 0, "waits": 0, "wait_seconds": 0.0}
+
+
+class _AdaptiveRateLimiter:
+    """
+    Thread-safe per-host AIMD rate limiter.
+
+    Request starts are spaced ``1 / rate`` seconds apart (a token bucket
+    holding one token).  ``rate`` starts at ``max_per_second`` (unlimited when
+    unset).  Every success adds ``increase / rate`` back up to that ceiling,
+    roughly ``+increase`` requests per second each second.  A 429/503
+    multiplies the rate by ``decrease``, but never below ``min_per_second``.
+    An unlimited host starts AIMD from its observed request rate.  A
+    ``Retry-After`` blocks the host for every thread until it expires.
+    """
+
+    def __init__(
+        self,
+        max_per_second: Optional[float],
+        *,
+        min_per_second: float = 0.5,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+    ) -> None:
+        self.ceiling = max_per_second if max_per_second and max_per_second > 0 else None
+        self.floor = min(min_per_second, self.ceiling or min_per_second)
+        self.increase = increase
+        self.decrease = decrease
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.ceiling)
+        return state
+
+    def acquire(self, host: str) -> float:
+        """Block until the host may receive another request; return the wait in seconds."""
+        with self._lock:
+            state = self._state(host)
+            now = time.monotonic()
+            slot = max(now, state.blocked_until)
+            if state.rate:
+                slot = max(slot, state.next_slot)
+                state.next_slot = slot + 1.0 / state.rate
+            state.starts.append(slot)
+            wait = slot - now
+            state.stats["requests"] += 1
+            if wait > 0:
+                state.stats["waits"] += 1
+                state.stats["wait_seconds"] += wait
+        if wait > 0:
+            time.sleep(wait)
+        return max(wait, 0.0)
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            state = self._state(host)
+            if state.rate is None:
+                return
+            rate = state.rate + self.increase / state.rate
+            state.rate = min(rate, self.ceiling) if self.ceiling else rate
+
+    def record_throttle(self, host: str, retry_after: Optional[float] = None) -> float:
+        """Cut the host's rate (and block it for ``retry_after``); return the new rate."""
+        with self._lock:
+            state = self._state(host)
+            current = state.rate or self._observed_rate(state)
+            state.rate = max(self.floor, current * self.decrease)
+            state.stats["throttled"] += 1
+            if retry_after:
+                state.blocked_until = max(state.blocked_until, time.monotonic() + retry_after)
+            return state.rate
+
+    @staticmethod
+    def _observed_rate(state: _HostState) -> float:
+        starts = state.starts
+        span = starts[-1] - starts[0] if len(starts) > 1 else 0.0
+        return (len(starts) - 1) / span if span > 0 else float(len(starts) or 1)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host current rate (``None`` = unlimited), throttle and wait counters."""
+        with self._lock:
+            return {
+                host: {
+                    "rate_per_second": round(state.rate, 3) if state.rate else None,
+                    **state.stats,
+                    "wait_seconds": round(state.stats["wait_seconds"], 3),
+                }
+                for host, state in sorted(self._hosts.items())
+            }
+
+
 class QticketsApiClient:
     """Wrapper around the official QTickets REST API."""
 
-    RETRYABLE_STATUS = {500, 502, 503, 504}
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+    # Statuses that mean "slow down": the host's request rate is cut.
+    THROTTLE_STATUS = {429, 503}
+    # Upper bound for a single backoff, including server-sent Retry-After.
+    MAX_BACKOFF_SECONDS = 60.0
 
     def __init__(
         self,
@@ -69,12 +182,23 @@ class QticketsApiClient:
         dry_run: bool = False,
         partners_base_url: Optional[str] = None,
         partners_token: Optional[str] = None,
+        page_concurrency: int = 1,
+        max_requests_per_second: Optional[float] = None,
+        http_cache: Optional[HttpCache] = None,
+        pool_size: Optional[int] = None,
     ) -> None:
         self.base_url = (base_url or "").rstrip("/")
-        self.session = requests.Session()
         self.timeout = timeout
         self.max_retries = max_retries
         self.backoff_factor = backoff_factor
+        # Pages 2..N are prefetched concurrently when the API reports total_pages.
+        self.page_concurrency = max(1, int(page_concurrency or 1))
+        # Keep-alive connections per host; callers sharing the client across
+        # worker threads pass the total number of concurrent requests.
+        self.session = build_session(pool_size=pool_size or self.page_concurrency)
+        self._rate_limiter = _AdaptiveRateLimiter(max_requests_per_second)
+        # Optional on-disk cache for whole catalogues (see ``_collect_paginated``).
+        self.http_cache = http_cache
         self.logger = logger or setup_integrations_logger("qtickets_api")
 
         token_value = (token or "").strip()
@@ -115,6 +239,14 @@ class QticketsApiClient:
                 },
             )
 
+    def http_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host connection reuse, timing and byte counters of the session."""
+        return self.session.http_stats()
+
+    def rate_limit_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host current request rate and throttle/wait counters."""
+        return self._rate_limiter.stats()
+
     # --------------------------------------------------------------------- #
     # Public endpoints
     # --------------------------------------------------------------------- #
@@ -133,7 +265,7 @@ class QticketsApiClient:
 
         filters = [{"column": "deleted_at", "operator": "null"}]
         params = {"where": json.dumps(filters, ensure_ascii=False)}
-        payload = self._collect_paginated("events", params=params)
+        payload = self._collect_paginated("events", params=params, cacheable=True)
         self.logger.info(
             "Fetched events from QTickets API",
             metrics={"endpoint": "events", "records": len(payload)},
@@ -160,23 +292,14 @@ class QticketsApiClient:
             )
             return []
 
-        filters = self._build_orders_filters(date_from, date_to)
-        order_by = {"payed_at": "desc"}
-        body: Dict[str, Any] = {
-            "where": filters,
-            "orderBy": order_by,
-            "per_page": 200,
-        }
-        if self.org_name:
-            body["organization"] = self.org_name
-
+        body = self._orders_request_body(date_from, date_to)
         self.logger.info(
             "Fetching orders via GET with JSON body",
             metrics={
                 "endpoint": "orders",
                 "method": "GET",
-                "filters": filters,
-                "order_by": order_by,
+                "filters": body["where"],
+                "order_by": body["orderBy"],
             },
         )
 
@@ -187,23 +310,7 @@ class QticketsApiClient:
         )
 
         # Filter by payed_at locally to ensure exact window matching
-        filtered: List[Dict[str, Any]] = []
-        for order in payload:
-            payed_at = order.get("payed_at")
-            if not payed_at:
-                continue
-            try:
-                payed_dt = to_msk(payed_at)
-            except Exception:
-                # Keep the record – the transformer will decide how to handle it.
-                filtered.append(order)
-                continue
-
-            if date_from and payed_dt < to_msk(date_from):
-                continue
-            if date_to and payed_dt >= to_msk(date_to):
-                continue
-            filtered.append(order)
+        filtered = list(self._filter_orders_window(payload, date_from, date_to))
 
         self.logger.info(
             "Fetched orders from QTickets API via GET",
@@ -239,6 +346,76 @@ class QticketsApiClient:
             )
             return self._fetch_orders_post_fallback(date_from, date_to)
 
+    def iter_orders(
+        self, date_from: datetime, date_to: datetime
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield paid orders within the window while the pages are being fetched.
+
+        Streaming counterpart of :meth:`list_orders`: only the page in hand (plus
+        any prefetched pages) is kept in memory, so long backfill windows do not
+        grow the process with the window size.  The POST fallback is attempted
+        only when GET fails before the first order is yielded; once consumers
+        have seen data a failure is re-raised instead of replaying the window.
+
+        Args:
+            date_from: inclusive lower bound (MSK).
+            date_to: exclusive upper bound (MSK).
+        """
+        if self.stub_mode:
+            self.logger.warning(
+                f"QticketsApiClient.iter_orders() stub for org={self.org_name or '<missing_org>'} "
+                f"window=[{date_from} .. {date_to}] -> []"
+            )
+            return
+
+        yielded = False
+        try:
+            for order in self._iter_orders_window("GET", date_from, date_to):
+                yielded = True
+                yield order
+        except Exception as e:
+            if yielded:
+                raise
+            self.logger.warning(
+                "GET /orders failed, attempting POST fallback",
+                metrics={"error": str(e)},
+            )
+            yield from self._iter_orders_window("POST", date_from, date_to)
+
+    def _iter_orders_window(
+        self, method: str, date_from: datetime, date_to: datetime
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream ``/orders`` page by page, keeping only orders inside the window."""
+        body = self._orders_request_body(date_from, date_to)
+        self.logger.info(
+            "Streaming orders from QTickets API",
+            metrics={
+                "endpoint": "orders",
+                "method": method,
+                "filters": body["where"],
+                "order_by": body["orderBy"],
+            },
+        )
+
+        raw_records = 0
+        records = 0
+        for page_items in self._iter_paginated("orders", method=method, json_body=body):
+            raw_records += len(page_items)
+            for order in self._filter_orders_window(page_items, date_from, date_to):
+                records += 1
+                yield order
+
+        self.logger.info(
+            "Streamed orders from QTickets API",
+            metrics={
+                "endpoint": "orders",
+                "method": method,
+                "records": records,
+                "raw_records": raw_records,
+            },
+        )
+
     def _fetch_orders_post_fallback(
         self, date_from: datetime, date_to: datetime
     ) -> List[Dict[str, Any]]:
@@ -252,23 +429,14 @@ class QticketsApiClient:
             )
             return []
 
-        filters = self._build_orders_filters(date_from, date_to)
-        order_by = {"payed_at": "desc"}
-        body: Dict[str, Any] = {
-            "where": filters,
-            "orderBy": order_by,
-            "per_page": 200,
-        }
-        if self.org_name:
-            body["organization"] = self.org_name
-
+        body = self._orders_request_body(date_from, date_to)
         self.logger.info(
             "Fetching orders via POST fallback with JSON body",
             metrics={
                 "endpoint": "orders",
                 "method": "POST",
-                "filters": filters,
-                "order_by": order_by,
+                "filters": body["where"],
+                "order_by": body["orderBy"],
             },
         )
 
@@ -279,23 +447,7 @@ class QticketsApiClient:
         )
 
         # Ensure only orders with payed_at inside the requested window remain.
-        filtered: List[Dict[str, Any]] = []
-        for order in payload:
-            payed_at = order.get("payed_at")
-            if not payed_at:
-                continue
-            try:
-                payed_dt = to_msk(payed_at)
-            except Exception:
-                # Keep the record – the transformer will decide how to handle it.
-                filtered.append(order)
-                continue
-
-            if date_from and payed_dt < to_msk(date_from):
-                continue
-            if date_to and payed_dt >= to_msk(date_to):
-                continue
-            filtered.append(order)
+        filtered = list(self._filter_orders_window(payload, date_from, date_to))
 
         self.logger.info(
             "Fetched orders from QTickets API via POST fallback",
@@ -308,6 +460,43 @@ class QticketsApiClient:
         )
         return filtered
 
+    def _orders_request_body(
+        self, date_from: datetime, date_to: datetime
+    ) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "where": self._build_orders_filters(date_from, date_to),
+            "orderBy": {"payed_at": "desc"},
+            "per_page": 200,
+        }
+        if self.org_name:
+            body["organization"] = self.org_name
+        return body
+
+    @staticmethod
+    def _filter_orders_window(
+        orders: Iterable[Dict[str, Any]], date_from: datetime, date_to: datetime
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield orders whose ``payed_at`` falls into ``[date_from, date_to)``."""
+        # Convert the bounds once per window, not once per order.
+        lower = to_msk(date_from) if date_from else None
+        upper = to_msk(date_to) if date_to else None
+        for order in orders:
+            payed_at = order.get("payed_at")
+            if not payed_at:
+                continue
+            try:
+                payed_dt = to_msk(payed_at, hint="qtickets_api.window_filter")
+            except Exception:
+                # Keep the record – the transformer will decide how to handle it.
+                yield order
+                continue
+
+            if lower is not None and payed_dt < lower:
+                continue
+            if upper is not None and payed_dt >= upper:
+                continue
+            yield order
+
     def _build_orders_filters(
         self, date_from: datetime, date_to: datetime
     ) -> List[Dict[str, Any]]:
@@ -367,6 +556,7 @@ class QticketsApiClient:
             "clients",
             method="GET",
             json_body=body,
+            cacheable=True,
         )
         self.logger.info(
             "Fetched clients from QTickets API",
@@ -397,7 +587,7 @@ class QticketsApiClient:
                 f"QticketsApiClient.list_price_shades() stub for org={self.org_name or '<missing_org>'} -> []"
             )
             return []
-        payload = self._collect_paginated("price-shades")
+        payload = self._collect_paginated("price-shades", cacheable=True)
         self.logger.info(
             "Fetched price shades from QTickets API",
             metrics={"endpoint": "price-shades", "records": len(payload)},
@@ -411,7 +601,7 @@ class QticketsApiClient:
                 f"QticketsApiClient.list_discounts() stub for org={self.org_name or '<missing_org>'} -> []"
             )
             return []
-        payload = self._collect_paginated("discounts")
+        payload = self._collect_paginated("discounts", cacheable=True)
         self.logger.info(
             "Fetched discounts from QTickets API",
             metrics={"endpoint": "discounts", "records": len(payload)},
@@ -425,7 +615,7 @@ class QticketsApiClient:
                 f"QticketsApiClient.list_promo_codes() stub for org={self.org_name or '<missing_org>'} -> []"
             )
             return []
-        payload = self._collect_paginated("promo-codes")
+        payload = self._collect_paginated("promo-codes", cacheable=True)
         self.logger.info(
             "Fetched promo codes from QTickets API",
             metrics={"endpoint": "promo-codes", "records": len(payload)},
@@ -623,40 +813,219 @@ class QticketsApiClient:
         json_body: Optional[Dict[str, Any]] = None,
         base_url: Optional[str] = None,
         headers: Optional[Dict[str, str]] = None,
+        cacheable: bool = False,
     ) -> List[Dict[str, Any]]:
-        """Collect all pages for an endpoint that supports pagination."""
+        """
+        Collect all pages for an endpoint that supports pagination.
+
+        ``cacheable`` GET catalogues go through :attr:`http_cache` as a unit:
+        the collected items are stored under one entry carrying the validators
+        of the first page.  A fresh entry is returned without a request; a
+        stale one is revalidated by requesting page 1 with
+        ``If-None-Match``/``If-Modified-Since`` and reused on ``304``, otherwise
+        every page is refetched, so pages of different snapshots never mix.
+        """
+        verb = (method or "GET").upper()
+        cache = (
+            self.http_cache
+            if cacheable and verb == "GET" and not self.stub_mode
+            else None
+        )
+        cache_key: Optional[str] = None
+        cached: Optional[CacheEntry] = None
+        first_payload: Any = None
+        head: Optional[CacheEntry] = None
+        if cache is not None:
+            base = (base_url or self.base_url).rstrip("/")
+            cache_key = cache.make_key(
+                verb, urljoin(base + "/", path.lstrip("/")), params, json_body
+            )
+            cached = cache.get(cache_key)
+            if cached is not None and cache.is_fresh(cached):
+                cache.record("hits")
+                return cached.payload
+            head = self._fetch_page(
+                verb,
+                path,
+                1,
+                params=params,
+                json_body=json_body,
+                base_url=base_url,
+                headers=headers,
+                conditional=cached or CacheEntry(None),
+            )
+            if cached is not None and head is cached:
+                cache.touch(cache_key, cached)
+                cache.record("revalidated")
+                return cached.payload
+            first_payload = head.payload
+
         items: List[Dict[str, Any]] = []
+        for page_items in self._iter_paginated(
+            path,
+            method=method,
+            params=params,
+            json_body=json_body,
+            base_url=base_url,
+            headers=headers,
+            first_payload=first_payload,
+        ):
+            items.extend(page_items)
+
+        if cache is not None and head is not None:
+            cache.put(
+                cache_key,
+                items,
+                etag=head.etag,
+                last_modified=head.last_modified,
+            )
+            cache.record("misses")
+        return items
+
+    def _iter_paginated(
+        self,
+        path: str,
+        *,
+        method: str = "GET",
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+        base_url: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        first_payload: Any = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield the items of a paginated endpoint one page at a time.
+
+        Pages are requested one by one until the first response reveals
+        ``meta.total_pages``; with ``page_concurrency > 1`` the remaining pages
+        are then fetched in parallel (at most ``page_concurrency`` in flight)
+        and yielded strictly in page order.  ``first_payload`` (an already
+        fetched page 1) is used instead of requesting that page again.
+        """
         page = 1
 
         verb = (method or "GET").upper()
-        while True:
-            page_params = dict(params or {})
-            page_body = dict(json_body) if json_body is not None else None
-
-            if page_body is not None and "page" not in page_body:
-                page_body["page"] = page
-            if page_body is None and "page" not in page_params:
-                page_params["page"] = page
+        fixed_page = json_body is not None and "page" in json_body
+        if json_body is None and params and "page" in params:
+            fixed_page = True
 
-            payload = self._request(
+        def fetch(page_number: int) -> Any:
+            return self._fetch_page(
                 verb,
                 path,
-                params=page_params or None,
-                json_body=page_body,
+                page_number,
+                params=params,
+                json_body=json_body,
                 base_url=base_url,
                 headers=headers,
             )
 
+        while True:
+            if page == 1 and first_payload is not None:
+                payload = first_payload
+            else:
+                payload = fetch(page)
+
             current_items = self._extract_items(payload)
             if not current_items:
-                break
+                return
 
-            items.extend(current_items)
+            yield current_items
             if not self._has_next_page(payload, page):
-                break
+                return
+
+            total_pages = self._total_pages(payload)
+            if self.page_concurrency > 1 and total_pages and not fixed_page:
+                for page, payload, current_items in self._prefetch_pages(
+                    fetch, page + 1, total_pages
+                ):
+                    if not current_items:
+                        return
+                    yield current_items
+                if not self._has_next_page(payload, page):
+                    return
             page += 1
 
-        return items
+    def _prefetch_pages(
+        self,
+        fetch,
+        first_page: int,
+        last_page: int,
+    ) -> Iterator[tuple[int, Any, List[Dict[str, Any]]]]:
+        """
+        Fetch ``first_page..last_page`` with bounded concurrency, preserving order.
+
+        Yields ``(page, payload, items)``; closing the generator (e.g. after an
+        empty page) cancels the requests that have not started yet.
+        """
+        pending: deque = deque()
+        next_page = first_page
+        with ThreadPoolExecutor(
+            max_workers=self.page_concurrency, thread_name_prefix="qtickets-page"
+        ) as pool:
+            try:
+                while pending or next_page <= last_page:
+                    while next_page <= last_page and len(pending) < self.page_concurrency:
+                        pending.append((next_page, pool.submit(fetch, next_page)))
+                        next_page += 1
+                    page, future = pending.popleft()
+                    payload = future.result()
+                    yield page, payload, self._extract_items(payload)
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def _fetch_page(
+        self,
+        verb: str,
+        path: str,
+        page: int,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+        base_url: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        conditional: Optional[CacheEntry] = None,
+    ) -> Any:
+        """
+        Request a single page and report its latency.
+
+        With ``conditional`` the page is revalidated and a :class:`CacheEntry`
+        is returned (see :meth:`_request`).
+        """
+        page_params = dict(params or {})
+        page_body = dict(json_body) if json_body is not None else None
+
+        if page_body is not None and "page" not in page_body:
+            page_body["page"] = page
+        if page_body is None and "page" not in page_params:
+            page_params["page"] = page
+
+        started = time.perf_counter()
+        payload = self._request(
+            verb,
+            path,
+            params=page_params or None,
+            json_body=page_body,
+            base_url=base_url,
+            headers=headers,
+            conditional=conditional,
+        )
+        if conditional is None or payload is not conditional:
+            self.logger.info(
+                "Fetched page from QTickets API",
+                metrics={
+                    "endpoint": path.lstrip("/"),
+                    "page": page,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "records": len(
+                        self._extract_items(
+                            payload.payload if conditional is not None else payload
+                        )
+                    ),
+                },
+            )
+        return payload
 
     def _request_metrics(
         self,
@@ -747,8 +1116,16 @@ class QticketsApiClient:
         headers: Optional[Dict[str, str]] = None,
         api_label: Optional[str] = None,
         token_fp: Optional[str] = None,
+        conditional: Optional[CacheEntry] = None,
     ) -> Any:
-        """Perform an HTTP request with structured logging and retry/backoff."""
+        """
+        Perform an HTTP request with structured logging and retry/backoff.
+
+        With ``conditional`` the request carries its
+        ``If-None-Match``/``If-Modified-Since`` validators and returns a
+        :class:`CacheEntry`: ``conditional`` itself on ``304``, otherwise a new
+        entry with the payload and the response's ``ETag``/``Last-Modified``.
+        """
         api_name = api_label or ("partners" if base_url and base_url != self.base_url else "rest")
         request_metrics = self._request_metrics(
             method, path, params, json_body, api_label=api_name, token_fp=token_fp
@@ -769,9 +1146,15 @@ class QticketsApiClient:
         )
         request_metrics["token_fp"] = effective_token_fp
 
+        host = urlsplit(url).netloc
+
+        if conditional is not None:
+            header_bucket.update(conditional.conditional_headers())
+
         last_error: Optional[QticketsApiError] = None
         for attempt in range(1, self.max_retries + 1):
             try:
+                self._rate_limiter.acquire(host)
                 response = self.session.request(
                     method,
                     url,
@@ -803,13 +1186,21 @@ class QticketsApiClient:
                         }
                     )
 
+                    retry_after: Optional[float] = None
+                    if response.status_code in self.THROTTLE_STATUS:
+                        retry_after = self._retry_after(response)
+                        log_metrics["retry_after"] = retry_after
+                        log_metrics["rate_per_second"] = self._rate_limiter.record_throttle(
+                            host, retry_after
+                        )
+
                     if response.status_code in self.RETRYABLE_STATUS and attempt < self.max_retries:
                         self.logger.warning(
                             "Transient QTickets API error",
                             metrics=log_metrics,
                         )
                         last_error = error
-                        self._sleep(attempt, error)
+                        self._sleep(attempt, error, retry_after)
                         continue
 
                     self.logger.error(
@@ -818,18 +1209,30 @@ class QticketsApiClient:
                     )
                     raise error
 
-                if not response.content:
-                    return None
-
-                try:
-                    return response.json()
-                except ValueError as err:
-                    body_preview = response.text[:512]
-                    raise QticketsApiError(
-                        "Invalid JSON response",
-                        status=response.status_code,
-                        details={"body_preview": body_preview, **request_metrics},
-                    ) from err
+                self._rate_limiter.record_success(host)
+
+                if response.status_code == 304 and conditional is not None:
+                    return conditional
+
+                payload = None
+                if response.content:
+                    try:
+                        payload = response.json()
+                    except ValueError as err:
+                        body_preview = response.text[:512]
+                        raise QticketsApiError(
+                            "Invalid JSON response",
+                            status=response.status_code,
+                            details={"body_preview": body_preview, **request_metrics},
+                        ) from err
+
+                if conditional is not None:
+                    return CacheEntry(
+                        payload,
+                        etag=response.headers.get("ETag"),
+                        last_modified=response.headers.get("Last-Modified"),
+                    )
+                return payload
 
             except requests.RequestException as err:
                 log_metrics = dict(request_metrics)
@@ -863,15 +1266,45 @@ class QticketsApiClient:
             details=request_metrics,
         )
 
-    def _sleep(self, attempt: int, error: Exception) -> None:
-        """Sleep with exponential backoff and log the retry."""
-        wait = self.backoff_factor * (2 ** (attempt - 1))
+    @classmethod
+    def _retry_after(cls, response: requests.Response) -> Optional[float]:
+        """Seconds requested by a ``Retry-After`` header (delta or HTTP date)."""
+        value = (response.headers.get("Retry-After") or "").strip()
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+            if when.tzinfo is None:
+                when = when.replace(tzinfo=timezone.utc)
+            seconds = (when - datetime.now(timezone.utc)).total_seconds()
+        return min(max(seconds, 0.0), cls.MAX_BACKOFF_SECONDS)
+
+    def _sleep(
+        self, attempt: int, error: Exception, retry_after: Optional[float] = None
+    ) -> None:
+        """
+        Sleep before a retry and log it.
+
+        Honours ``retry_after`` when the server sent one, otherwise uses
+        exponential backoff with equal jitter so that parallel workers do not
+        retry in lockstep.
+        """
+        if retry_after is not None:
+            wait = retry_after
+        else:
+            ceiling = min(self.backoff_factor * (2 ** (attempt - 1)), self.MAX_BACKOFF_SECONDS)
+            wait = ceiling / 2 + random.uniform(0, ceiling / 2)
         self.logger.warning(
             "Temporary QTickets API error, backing off",
             metrics={
                 "attempt": attempt,
                 "max_attempts": self.max_retries,
-                "sleep_seconds": wait,
+                "sleep_seconds": round(wait, 3),
                 "error": str(error),
             },
         )
@@ -929,3 +1362,16 @@ class QticketsApiClient:
 
         # Fallback: stop pagination if the endpoint does not provide explicit metadata.
         return False
+
+    @staticmethod
+    def _total_pages(payload: Any) -> Optional[int]:
+        """Return ``meta.total_pages`` when the payload exposes it."""
+        if not isinstance(payload, dict):
+            return None
+        meta = payload.get("meta")
+        if not isinstance(meta, dict) or "total_pages" not in meta:
+            return None
+        try:
+            return int(meta["total_pages"])
+        except (TypeError, ValueError):
+            return None
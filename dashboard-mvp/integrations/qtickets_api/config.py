@@ -12,10 +12,12 @@ from __future__ import annotations
 import os
 import json
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 
+from integrations.common.serialize import PAYLOAD_MODES
+
 ENV_ALIASES = {
     "QTICKETS_TOKEN": ("QTICKETS_TOKEN", "QTICKETS_API_TOKEN"),
     "QTICKETS_BASE_URL": ("QTICKETS_BASE_URL", "QTICKETS_API_BASE_URL"),
@@ -108,6 +110,29 @@ class QticketsApiConfig:
     dry_run: bool
     skip_resources: Dict[str, bool] = field(default_factory=dict)
 
+    # Throughput settings
+    page_concurrency: int = 1
+    max_requests_per_second: Optional[float] = None
+    orders_batch_size: int = 5000
+    backfill_slice_hours: int = 24
+    backfill_workers: int = 4
+    inventory_workers: int = 4
+    http_cache_dir: Optional[str] = None
+    http_cache_ttl_seconds: int = 3600
+    ch_flush_seconds: float = 1.0
+    ch_async_insert: bool = False
+    ch_load_workers: int = 4
+    ch_rollups: bool = False
+
+    # Raw payload storage (payload_json columns)
+    payload_mode: str = "json"
+    payload_drop_keys: Tuple[str, ...] = ()
+
+    # Incremental mode (payed_at watermark in meta.watermarks)
+    use_watermark: bool = True
+    watermark_overlap_minutes: int = 30
+    watermark_max_lookback_hours: int = 168
+
     # List of all required environment variables
     REQUIRED_KEYS = (
         "QTICKETS_TOKEN",
@@ -211,6 +236,12 @@ class QticketsApiConfig:
             except ValueError as exc:
                 raise ConfigError(f"{key} must be an integer, got: {value}") from exc
 
+        def parse_float(key: str, value: str) -> float:
+            try:
+                return float(value.strip())
+            except ValueError as exc:
+                raise ConfigError(f"{key} must be a number, got: {value}") from exc
+
         skip_flags: Dict[str, bool] = {}
         for resource, env_name in SKIPPABLE_RESOURCE_ENV.items():
             raw_value = _read_env(env_name)
@@ -230,6 +261,131 @@ class QticketsApiConfig:
 
         backfill_guard_table = (_read_env("QTICKETS_BACKFILL_GUARD_TABLE") or "meta_job_runs").strip()
 
+        page_concurrency_raw = _read_env("QTICKETS_PAGE_CONCURRENCY")
+        page_concurrency = (
+            parse_int("QTICKETS_PAGE_CONCURRENCY", page_concurrency_raw)
+            if page_concurrency_raw is not None
+            else 1
+        )
+        if page_concurrency < 1:
+            raise ConfigError("QTICKETS_PAGE_CONCURRENCY must be >= 1")
+
+        max_rps_raw = _read_env("QTICKETS_MAX_RPS")
+        max_requests_per_second: Optional[float] = None
+        if max_rps_raw is not None:
+            max_requests_per_second = parse_float("QTICKETS_MAX_RPS", max_rps_raw) or None
+
+        orders_batch_raw = _read_env("QTICKETS_ORDERS_BATCH_SIZE")
+        orders_batch_size = (
+            parse_int("QTICKETS_ORDERS_BATCH_SIZE", orders_batch_raw)
+            if orders_batch_raw is not None
+            else 5000
+        )
+        if orders_batch_size < 1:
+            raise ConfigError("QTICKETS_ORDERS_BATCH_SIZE must be >= 1")
+
+        slice_hours_raw = _read_env("QTICKETS_BACKFILL_SLICE_HOURS")
+        backfill_slice_hours = (
+            parse_int("QTICKETS_BACKFILL_SLICE_HOURS", slice_hours_raw)
+            if slice_hours_raw is not None
+            else 24
+        )
+        if backfill_slice_hours < 0:
+            raise ConfigError("QTICKETS_BACKFILL_SLICE_HOURS must be >= 0")
+
+        backfill_workers_raw = _read_env("QTICKETS_BACKFILL_WORKERS")
+        backfill_workers = (
+            parse_int("QTICKETS_BACKFILL_WORKERS", backfill_workers_raw)
+            if backfill_workers_raw is not None
+            else 4
+        )
+        if backfill_workers < 1:
+            raise ConfigError("QTICKETS_BACKFILL_WORKERS must be >= 1")
+
+        inventory_workers_raw = _read_env("QTICKETS_INVENTORY_WORKERS")
+        inventory_workers = (
+            parse_int("QTICKETS_INVENTORY_WORKERS", inventory_workers_raw)
+            if inventory_workers_raw is not None
+            else 4
+        )
+        if inventory_workers < 1:
+            raise ConfigError("QTICKETS_INVENTORY_WORKERS must be >= 1")
+
+        http_cache_dir = (_read_env("QTICKETS_HTTP_CACHE_DIR") or "").strip() or None
+        cache_ttl_raw = _read_env("QTICKETS_HTTP_CACHE_TTL_SECONDS")
+        http_cache_ttl_seconds = (
+            parse_int("QTICKETS_HTTP_CACHE_TTL_SECONDS", cache_ttl_raw)
+            if cache_ttl_raw is not None
+            else 3600
+        )
+        if http_cache_ttl_seconds < 0:
+            raise ConfigError("QTICKETS_HTTP_CACHE_TTL_SECONDS must be >= 0")
+
+        flush_seconds_raw = _read_env("QTICKETS_CH_FLUSH_SECONDS")
+        ch_flush_seconds = (
+            parse_float("QTICKETS_CH_FLUSH_SECONDS", flush_seconds_raw)
+            if flush_seconds_raw is not None
+            else 1.0
+        )
+        if ch_flush_seconds < 0:
+            raise ConfigError("QTICKETS_CH_FLUSH_SECONDS must be >= 0")
+        async_insert_raw = _read_env("QTICKETS_CH_ASYNC_INSERT")
+        ch_async_insert = (
+            parse_bool("QTICKETS_CH_ASYNC_INSERT", async_insert_raw)
+            if async_insert_raw is not None
+            else False
+        )
+
+        load_workers_raw = _read_env("QTICKETS_CH_LOAD_WORKERS")
+        ch_load_workers = (
+            parse_int("QTICKETS_CH_LOAD_WORKERS", load_workers_raw)
+            if load_workers_raw is not None
+            else 4
+        )
+        if ch_load_workers < 1:
+            raise ConfigError("QTICKETS_CH_LOAD_WORKERS must be >= 1")
+        ch_rollups_raw = _read_env("QTICKETS_CH_ROLLUPS")
+        ch_rollups = (
+            parse_bool("QTICKETS_CH_ROLLUPS", ch_rollups_raw)
+            if ch_rollups_raw is not None
+            else False
+        )
+
+        use_watermark_raw = _read_env("QTICKETS_USE_WATERMARK")
+        use_watermark = (
+            parse_bool("QTICKETS_USE_WATERMARK", use_watermark_raw)
+            if use_watermark_raw is not None
+            else True
+        )
+        overlap_raw = _read_env("QTICKETS_WATERMARK_OVERLAP_MINUTES")
+        watermark_overlap_minutes = (
+            parse_int("QTICKETS_WATERMARK_OVERLAP_MINUTES", overlap_raw)
+            if overlap_raw is not None
+            else 30
+        )
+        if watermark_overlap_minutes < 0:
+            raise ConfigError("QTICKETS_WATERMARK_OVERLAP_MINUTES must be >= 0")
+        max_lookback_raw = _read_env("QTICKETS_WATERMARK_MAX_LOOKBACK_HOURS")
+        watermark_max_lookback_hours = (
+            parse_int("QTICKETS_WATERMARK_MAX_LOOKBACK_HOURS", max_lookback_raw)
+            if max_lookback_raw is not None
+            else 168
+        )
+        if watermark_max_lookback_hours < 1:
+            raise ConfigError("QTICKETS_WATERMARK_MAX_LOOKBACK_HOURS must be >= 1")
+
+        payload_mode = (_read_env("QTICKETS_PAYLOAD_MODE") or "json").strip().lower()
+        if payload_mode not in PAYLOAD_MODES:
+            raise ConfigError(
+                f"QTICKETS_PAYLOAD_MODE must be one of {', '.join(PAYLOAD_MODES)}, "
+                f"got: {payload_mode}"
+            )
+        payload_drop_keys = tuple(
+            key.strip()
+            for key in (_read_env("QTICKETS_PAYLOAD_DROP_KEYS") or "").split(",")
+            if key.strip()
+        )
+
         # Build configuration object
         config = cls(
             # QTickets API
@@ -258,6 +414,25 @@ class QticketsApiConfig:
             job_name=raw_env["JOB_NAME"],
             dry_run=parse_bool("DRY_RUN", raw_env["DRY_RUN"]),
             skip_resources=skip_flags,
+            # Throughput
+            page_concurrency=page_concurrency,
+            max_requests_per_second=max_requests_per_second,
+            orders_batch_size=orders_batch_size,
+            backfill_slice_hours=backfill_slice_hours,
+            backfill_workers=backfill_workers,
+            inventory_workers=inventory_workers,
+            http_cache_dir=http_cache_dir,
+            http_cache_ttl_seconds=http_cache_ttl_seconds,
+            ch_flush_seconds=ch_flush_seconds,
+            ch_async_insert=ch_async_insert,
+            ch_load_workers=ch_load_workers,
+            ch_rollups=ch_rollups,
+            payload_mode=payload_mode,
+            payload_drop_keys=payload_drop_keys,
+            # Incremental mode
+            use_watermark=use_watermark,
+            watermark_overlap_minutes=watermark_overlap_minutes,
+            watermark_max_lookback_hours=watermark_max_lookback_hours,
         )
 
         config._apply_runtime_env()
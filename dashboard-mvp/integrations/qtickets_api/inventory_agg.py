@@ -9,6 +9,7 @@ to this format and rolls up to event-level snapshots for ClickHouse ingestion.
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Dict, Iterable, List, Sequence
 
@@ -25,14 +26,22 @@ def build_inventory_snapshot(
     client: QticketsApiClient | None,
     *,
     snapshot_ts: datetime | None = None,
+    max_workers: int = 1,
 ) -> List[Dict[str, Any]]:
     """
     Collapse seat availability into per-event snapshots.
 
+    Seat requests are fanned out over a pool of ``max_workers`` threads in
+    three passes (event seats, per-show seats for events that returned
+    nothing, partners fallback), so no task ever waits on another task of the
+    same pool.  The request rate is bounded by the client's per-host limiter
+    (``QTICKETS_MAX_RPS``); rows and logs keep the order of ``events``.
+
     Args:
         events: Raw events payload returned by :meth:`QticketsApiClient.list_events`.
         client: API client used to fetch seat allocations per show.
         snapshot_ts: Optional explicit timestamp in MSK.  Defaults to ``now``.
+        max_workers: Number of concurrent seat requests.
 
     Returns:
         List of dictionaries ready for ClickHouse staging. Empty when the client
@@ -52,7 +61,7 @@ def build_inventory_snapshot(
     snapshot_ts = snapshot_ts or now_msk()
     snapshot_naive = snapshot_ts.replace(tzinfo=None)
 
-    inventory_rows: List[Dict[str, Any]] = []
+    targets: List[Dict[str, Any]] = []
     for event in events:
         event_id = event.get("id") or event.get("event_id")
         event_name = event.get("name") or event.get("event_name") or ""
@@ -63,46 +72,61 @@ def build_inventory_snapshot(
             logger.warning("Skipping event without identifier in inventory aggregation")
             continue
 
-        show_ids = _extract_show_ids(event)
-
-        total, left = _summarize_seat_payload(client.list_event_seats(event_id))
-
-        if total == 0 and show_ids:
-            for show_id in show_ids:
-                try:
-                    payload = client.get_event_show_seats(event_id, show_id)
-                except Exception as exc:
-                    logger.warning(
-                        "Failed to fetch show seats from REST API",
-                        metrics={
-                            "event_id": event_id,
-                            "show_id": show_id,
-                            "error": str(exc),
-                        },
-                    )
-                    continue
-                sub_total, sub_left = _summarize_seat_payload(payload)
-                total += sub_total
-                left += sub_left
-
-        if total == 0 and getattr(client, "partners_ready", False):
-            payload = client.partners_event_seats(event_id)
-            total, left = _summarize_seat_payload(payload)
-            if total == 0 and show_ids:
-                for show_id in show_ids:
-                    payload = client.partners_event_seats(event_id, show_id)
-                    sub_total, sub_left = _summarize_seat_payload(payload)
-                    total += sub_total
-                    left += sub_left
+        targets.append(
+            {
+                "event_id": event_id,
+                "event_name": event_name,
+                "city": city,
+                "show_ids": _extract_show_ids(event),
+            }
+        )
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, int(max_workers or 1)), thread_name_prefix="qtickets-seats"
+    ) as pool:
+        totals: List[tuple[int, int]] = list(
+            pool.map(
+                lambda target: _summarize_seat_payload(
+                    client.list_event_seats(target["event_id"])
+                ),
+                targets,
+            )
+        )
+
+        show_jobs = [
+            (index, show_id)
+            for index, target in enumerate(targets)
+            if totals[index][0] == 0
+            for show_id in target["show_ids"]
+        ]
+        show_totals = pool.map(
+            lambda job: _fetch_show_seats(client, targets[job[0]]["event_id"], job[1]),
+            show_jobs,
+        )
+        for (index, _), (sub_total, sub_left) in zip(show_jobs, show_totals):
+            total, left = totals[index]
+            totals[index] = (total + sub_total, left + sub_left)
+
+        if getattr(client, "partners_ready", False):
+            fallback = [index for index, (total, _) in enumerate(totals) if total == 0]
+            partner_totals = pool.map(
+                lambda index: _fetch_partner_seats(client, targets[index]),
+                fallback,
+            )
+            for index, result in zip(fallback, partner_totals):
+                totals[index] = result
 
+    inventory_rows: List[Dict[str, Any]] = []
+    for target, (total, left) in zip(targets, totals):
         # Log inventory metrics for debugging
         logger.info(
             "Calculated inventory for event",
+            throttle=True,
             metrics={
-                "event_id": event_id,
-                "event_name": event_name[:50],  # Truncate for logging
-                "city": city,
-                "shows_processed": len(show_ids),
+                "event_id": target["event_id"],
+                "event_name": target["event_name"][:50],  # Truncate for logging
+                "city": target["city"],
+                "shows_processed": len(target["show_ids"]),
                 "tickets_total": total,
                 "tickets_left": left,
             },
@@ -110,9 +134,9 @@ def build_inventory_snapshot(
 
         inventory_rows.append(
             {
-                "event_id": str(event_id),
-                "event_name": event_name,
-                "city": city,
+                "event_id": str(target["event_id"]),
+                "event_name": target["event_name"],
+                "city": target["city"],
                 "snapshot_ts": snapshot_naive,
                 "tickets_total": int(total) if total > 0 else None,
                 "tickets_left": int(left) if left > 0 else None,
@@ -126,6 +150,40 @@ def build_inventory_snapshot(
     return inventory_rows
 
 
+def _fetch_show_seats(
+    client: QticketsApiClient, event_id: Any, show_id: Any
+) -> tuple[int, int]:
+    """Seat totals of a single show via REST; failures count as empty."""
+    try:
+        payload = client.get_event_show_seats(event_id, show_id)
+    except Exception as exc:
+        logger.warning(
+            "Failed to fetch show seats from REST API",
+            metrics={
+                "event_id": event_id,
+                "show_id": show_id,
+                "error": str(exc),
+            },
+        )
+        return 0, 0
+    return _summarize_seat_payload(payload)
+
+
+def _fetch_partner_seats(
+    client: QticketsApiClient, target: Dict[str, Any]
+) -> tuple[int, int]:
+    """Seat totals from the partners API, per event first and then per show."""
+    event_id = target["event_id"]
+    total, left = _summarize_seat_payload(client.partners_event_seats(event_id))
+    if total == 0 and target["show_ids"]:
+        for show_id in target["show_ids"]:
+            payload = client.partners_event_seats(event_id, show_id)
+            sub_total, sub_left = _summarize_seat_payload(payload)
+            total += sub_total
+            left += sub_left
+    return total, left
+
+
 def _extract_show_ids(event: Dict[str, Any]) -> List[Any]:
     """Extract show identifiers from the event payload if available."""
     candidate_keys = ("shows", "sessions", "seances")
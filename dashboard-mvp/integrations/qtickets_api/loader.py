@@ -12,20 +12,32 @@ import argparse
 import json
 import os
 import sys
+import threading
+from contextlib import nullcontext
 import time
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime, timedelta
+from functools import partial
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Sequence
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
 
 # Ensure the project root is in PYTHONPATH for direct invocation.
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
 
 from dotenv import load_dotenv
+from integrations.common.buffered_insert import BufferedInserter  # noqa: E402
+from integrations.common.http_cache import (  # noqa: E402
+    FingerprintStore,
+    HttpCache,
+)
+from integrations.common.serialize import PayloadSerializer  # noqa: E402
 from integrations.common import (  # noqa: E402  pylint: disable=wrong-import-position
     ClickHouseClient,
+    ClickHouseClientPool,
     get_client,
     get_client_from_config,
+    localize_msk,
+    log_suppressed_summary,
     now_msk,
     setup_integrations_logger,
     to_msk,
@@ -33,12 +45,30 @@ from integrations.common import (  # noqa: E402  pylint: disable=wrong-import-po
 
 from .client import QticketsApiClient, QticketsApiError  # noqa: E402
 from .config import ConfigError, QticketsApiConfig  # noqa: E402
+from .change_detection import skip_unchanged  # noqa: E402
+from .backfill import (  # noqa: E402
+    Slice,
+    SliceCheckpoints,
+    backfill_window_id,
+    build_slices,
+    replay_sales_rows,
+    slice_key,
+)
 from .inventory_agg import build_inventory_snapshot  # noqa: E402
+from .rollups import backfill_rollups, compact_rollups  # noqa: E402
+from .sales_agg import SalesRollup  # noqa: E402
+from .watermark import (  # noqa: E402
+    next_watermark,
+    read_watermark,
+    resume_window_start,
+    write_watermark,
+)
 from .transform import (
+    configure_payload_serializer,
     transform_barcodes,
     transform_clients,
     transform_discounts,
-    transform_orders_to_sales_rows,
+    iter_sales_column_batches,
     transform_partner_tickets,
     transform_price_shades,
     transform_promo_codes,
@@ -47,6 +77,9 @@ from .transform import (
 
 logger = setup_integrations_logger("qtickets_api")
 NON_FATAL_HTTP_STATUSES = {403, 404}
+BACKFILL_SLICES_TABLE = "meta_qtickets_backfill_slices"
+# Side table for QTICKETS_PAYLOAD_MODE=hash (payload_json holds the md5 then).
+PAYLOADS_TABLE = "stg_qtickets_api_payloads_raw"
 
 
 def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
@@ -76,6 +109,16 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
         "--offline-fixtures-dir",
         help="Use fixtures from this directory instead of making real API calls",
     )
+    parser.add_argument(
+        "--full-window",
+        action="store_true",
+        help="Ignore the payed_at watermark and fetch the whole --since-hours window",
+    )
+    parser.add_argument(
+        "--backfill-rollups",
+        action="store_true",
+        help="Populate the ClickHouse sales rollups from staged orders and exit",
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -97,8 +140,12 @@ def main(argv: Sequence[str] | None = None) -> None:
     dry_run = bool(args.dry_run)
     since_hours = args.since_hours
     backfill_mode = False
+    watermark: datetime | None = None
     ch_client: ClickHouseClient | None = None
     skipped_resources: List[Dict[str, Any]] = []
+    http_cache: HttpCache | None = None
+    fingerprints: FingerprintStore | None = None
+    unchanged_catalogues: List[str] = []
 
     try:
         # Load dotenv files (QTickets env first, then optional ClickHouse overrides)
@@ -116,13 +163,22 @@ def main(argv: Sequence[str] | None = None) -> None:
         )
         dry_run = bool(args.dry_run or config.dry_run)
         job_name = config.job_name
+        payloads = PayloadSerializer(
+            config.payload_mode, drop_keys=config.payload_drop_keys
+        )
+        configure_payload_serializer(payloads)
 
         # Skip ClickHouse client in dry-run mode
         ch_client = None if dry_run else get_client_from_config(config)
 
-        database_prefix = (
-            "zakaz_test" if os.getenv("CH_DATABASE") == "zakaz_test" else config.clickhouse_db
-        )
+        database_prefix = _target_database(config.clickhouse_db)
+
+        if args.backfill_rollups:
+            if ch_client is None:
+                raise ConfigError("--backfill-rollups cannot run in dry-run mode")
+            stats = backfill_rollups(ch_client, database_prefix, run_version)
+            logger.info("[qtickets_api] Sales rollups backfilled", metrics=stats)
+            return
 
         if (
             not dry_run
@@ -132,7 +188,7 @@ def main(argv: Sequence[str] | None = None) -> None:
             try:
                 guard_table = f"{database_prefix}.{config.backfill_guard_table}"
                 result = ch_client.execute(
-                    f"SELECT count() FROM {guard_table} WHERE job = %(job)s",
+                    f"SELECT count() FROM {guard_table} WHERE job = %(job)s AND status = 'ok'",
                     {"job": job_name},
                 )
                 existing_runs = 0
@@ -153,7 +209,7 @@ def main(argv: Sequence[str] | None = None) -> None:
                     backfill_mode = True
                     since_hours = max(since_hours, config.initial_backfill_hours)
                     logger.info(
-                        "Initial backfill enabled (no previous runs found)",
+                        "Initial backfill enabled (no previous successful runs found)",
                         metrics={
                             "job": job_name,
                             "since_hours": since_hours,
@@ -175,6 +231,7 @@ def main(argv: Sequence[str] | None = None) -> None:
         # Use fixtures if in offline mode
         if args.offline_fixtures_dir:
             events, orders = _load_fixtures(args.offline_fixtures_dir)
+            order_slices: List[Slice] = []
             client = None  # No real client needed in offline mode
             clients_payload = []
             price_shades_payload = []
@@ -183,17 +240,56 @@ def main(argv: Sequence[str] | None = None) -> None:
             barcodes_payload = []
             partner_tickets_payload = []
         else:
+            if config.http_cache_dir:
+                http_cache = HttpCache(
+                    config.http_cache_dir, ttl_seconds=config.http_cache_ttl_seconds
+                )
+                http_cache.evict()
+                if not dry_run:
+                    fingerprints = FingerprintStore(config.http_cache_dir)
             client = QticketsApiClient(
                 base_url=config.qtickets_base_url,
                 token=config.qtickets_token,
                 logger=logger,
                 org_name=config.org_name,
                 dry_run=dry_run,
+                page_concurrency=config.page_concurrency,
+                max_requests_per_second=config.max_requests_per_second,
+                http_cache=http_cache,
+                # Backfill slices page concurrently; inventory fans out per event.
+                pool_size=max(
+                    config.page_concurrency * config.backfill_workers,
+                    config.inventory_workers,
+                ),
             )
 
             window_end = now_msk()
             window_start = window_end - timedelta(hours=max(since_hours, 1))
 
+            if (
+                config.use_watermark
+                and not args.full_window
+                and not backfill_mode
+                and ch_client is not None
+            ):
+                try:
+                    watermark = read_watermark(ch_client)
+                except Exception as exc:  # pylint: disable=broad-except
+                    logger.warning(
+                        "Unable to read payed_at watermark; using the full window",
+                        metrics={"job": job_name, "error": str(exc)},
+                    )
+                    watermark = None
+                if watermark is not None:
+                    window_start = resume_window_start(
+                        watermark,
+                        window_end,
+                        overlap=timedelta(minutes=config.watermark_overlap_minutes),
+                        max_lookback=timedelta(
+                            hours=config.watermark_max_lookback_hours
+                        ),
+                    )
+
             logger.info(
                 "Starting QTickets API ingestion run",
                 metrics={
@@ -201,13 +297,18 @@ def main(argv: Sequence[str] | None = None) -> None:
                     "since_hours": since_hours,
                     "window_start": window_start.isoformat(),
                     "window_end": window_end.isoformat(),
+                    "watermark": watermark.isoformat() if watermark else None,
                     "dry_run": dry_run,
                     "_ver": run_version,
                 },
             )
 
             events = client.list_events()
-            orders = client.list_orders(window_start, window_end)
+            # Consumed lazily by _stream_sales below, one page at a time.
+            orders = client.iter_orders(window_start, window_end)
+            order_slices = build_slices(
+                window_start, window_end, config.backfill_slice_hours
+            )
             clients_payload = _fetch_optional_resource(
                 resource_key="clients",
                 description="clients list",
@@ -305,7 +406,10 @@ def main(argv: Sequence[str] | None = None) -> None:
                 )
             else:
                 inventory_rows = build_inventory_snapshot(
-                    events, client, snapshot_ts=window_end
+                    events,
+                    client,
+                    snapshot_ts=window_end,
+                    max_workers=config.inventory_workers,
                 )
         except Exception as exc:
             logger.warning(
@@ -314,22 +418,110 @@ def main(argv: Sequence[str] | None = None) -> None:
             )
             inventory_rows = []
 
-        sales_rows = transform_orders_to_sales_rows(orders, version=run_version)
+        write_ch = not dry_run and ch_client is not None
+        # Staging batches are written by a background thread on its own
+        # connection, overlapping the inserts with fetching the next pages.
+        stage_writer = (
+            BufferedInserter(
+                ch_client.clone(),
+                max_rows=config.orders_batch_size,
+                max_delay_seconds=config.ch_flush_seconds,
+                async_insert=config.ch_async_insert,
+                close_client=True,
+            )
+            if write_ch
+            else None
+        )
+        sales_sink = (
+            partial(stage_writer.add_columns, _sales_stage_table(database_prefix))
+            if stage_writer is not None
+            else None
+        )
+
+        def _flush_stage() -> None:
+            # Payload side rows of a slice are written before it is checkpointed.
+            _stage_payload_rows(stage_writer, payloads, run_version, database_prefix)
+            stage_writer.flush()
+
+        with stage_writer or nullcontext():
+            if len(order_slices) > 1:
+                sales = _stream_sales_sliced(
+                    client,
+                    order_slices,
+                    version=run_version,
+                    batch_size=config.orders_batch_size,
+                    workers=config.backfill_workers,
+                    sink=sales_sink,
+                    flush=_flush_stage if stage_writer is not None else None,
+                    ch_client=ch_client if write_ch else None,
+                    database=database_prefix,
+                    job=job_name,
+                    backfill_id=(
+                        backfill_window_id(
+                            window_start, config.initial_backfill_hours
+                        )
+                        if backfill_mode
+                        else None
+                    ),
+                    aggregate=not config.ch_rollups,
+                )
+            else:
+                sales = _stream_sales(
+                    orders,
+                    version=run_version,
+                    batch_size=config.orders_batch_size,
+                    sink=sales_sink,
+                    aggregate=not config.ch_rollups,
+                )
+            if stage_writer is not None:
+                _stage_payload_rows(stage_writer, payloads, run_version, database_prefix)
+        # With QTICKETS_CH_ROLLUPS the materialized views keep the daily
+        # rollups, so the Python facts stay empty and are not loaded.
+        if write_ch and client is not None and not config.ch_rollups:
+            _refresh_partial_first_day(ch_client, sales, window_start, database_prefix)
+        sales_daily_rows = sales["rollup"].daily_rows(run_version)
+        sales_utm_daily_rows = sales["rollup"].utm_rows(run_version)
         inventory_stage_rows = _augment_inventory_rows(inventory_rows, run_version)
-        events_rows = _transform_events(events, run_version)
-        sales_daily_rows = _aggregate_sales_daily(sales_rows, run_version)
-        sales_utm_daily_rows = _aggregate_sales_utm_daily(sales_rows, run_version)
-        clients_rows = transform_clients(
-            clients_payload, version=run_version, ingested_at=window_end
+        # Catalogues identical to the last loaded version are neither
+        # transformed nor re-inserted.
+        events_rows = (
+            _transform_events(events, run_version)
+            if _catalogue_changed(fingerprints, "events", events, unchanged_catalogues)
+            else []
+        )
+        clients_rows = (
+            transform_clients(clients_payload, version=run_version, ingested_at=window_end)
+            if _catalogue_changed(
+                fingerprints, "clients", clients_payload, unchanged_catalogues
+            )
+            else []
         )
-        price_shades_rows = transform_price_shades(
-            price_shades_payload, version=run_version, ingested_at=window_end
+        price_shades_rows = (
+            transform_price_shades(
+                price_shades_payload, version=run_version, ingested_at=window_end
+            )
+            if _catalogue_changed(
+                fingerprints, "price_shades", price_shades_payload, unchanged_catalogues
+            )
+            else []
         )
-        discounts_rows = transform_discounts(
-            discounts_payload, version=run_version, ingested_at=window_end
+        discounts_rows = (
+            transform_discounts(
+                discounts_payload, version=run_version, ingested_at=window_end
+            )
+            if _catalogue_changed(
+                fingerprints, "discounts", discounts_payload, unchanged_catalogues
+            )
+            else []
         )
-        promo_code_rows = transform_promo_codes(
-            promo_codes_payload, version=run_version, ingested_at=window_end
+        promo_code_rows = (
+            transform_promo_codes(
+                promo_codes_payload, version=run_version, ingested_at=window_end
+            )
+            if _catalogue_changed(
+                fingerprints, "promo_codes", promo_codes_payload, unchanged_catalogues
+            )
+            else []
         )
         barcode_rows = transform_barcodes(
             barcodes_payload, version=run_version, ingested_at=window_end
@@ -340,8 +532,8 @@ def main(argv: Sequence[str] | None = None) -> None:
 
         metrics = {
             "events": len(events),
-            "orders": len(orders),
-            "sales_rows": len(sales_rows),
+            "orders": sales["orders"],
+            "sales_rows": sales["sales_rows"],
             "inventory_rows": len(inventory_stage_rows),
             "sales_daily_rows": len(sales_daily_rows),
             "sales_utm_daily_rows": len(sales_utm_daily_rows),
@@ -353,6 +545,15 @@ def main(argv: Sequence[str] | None = None) -> None:
             "partner_ticket_rows": len(partner_ticket_rows),
         }
         metrics["lookback_hours"] = since_hours
+        metrics["watermark_from"] = watermark.isoformat() if watermark else None
+        metrics["watermark_to"] = next_watermark(
+            sales["max_sale_ts"],
+            window_end,
+            timedelta(minutes=config.watermark_overlap_minutes),
+        ).isoformat()
+        if "order_slices" in sales:
+            metrics["order_slices"] = sales["order_slices"]
+            metrics["order_slices_replayed"] = sales["order_slices_replayed"]
         metrics["backfill_mode"] = backfill_mode
         metrics["rows_processed"] = (
             metrics["sales_rows"]
@@ -368,6 +569,16 @@ def main(argv: Sequence[str] | None = None) -> None:
         )
         if skipped_resources:
             metrics["skipped_resources"] = skipped_resources
+        if http_cache is not None:
+            metrics["http_cache"] = http_cache.snapshot_stats()
+        if client is not None:
+            metrics["http"] = client.http_stats()
+            metrics["rate_limit"] = client.rate_limit_stats()
+        if unchanged_catalogues:
+            metrics["unchanged_catalogues"] = unchanged_catalogues
+        if stage_writer is not None:
+            metrics["ch_stage_inserts"] = stage_writer.stats()
+        metrics["payloads"] = payloads.stats()
 
         if dry_run:
             logger.info(
@@ -414,9 +625,40 @@ def main(argv: Sequence[str] | None = None) -> None:
 
         if not dry_run:
             try:
+                if ch_client is not None:
+                    # Reference rows identical to their latest stored version
+                    # are dropped instead of re-inserted with a new _ver.
+                    reference_rows, change_stats = skip_unchanged(
+                        ch_client,
+                        database_prefix,
+                        {
+                            "dim_events": events_rows,
+                            "stg_qtickets_api_clients_raw": clients_rows,
+                            "stg_qtickets_api_price_shades_raw": price_shades_rows,
+                            "stg_qtickets_api_discounts_raw": discounts_rows,
+                            "stg_qtickets_api_promo_codes_raw": promo_code_rows,
+                            "stg_qtickets_api_barcodes_raw": barcode_rows,
+                            "stg_qtickets_api_partner_tickets_raw": partner_ticket_rows,
+                        },
+                    )
+                    events_rows = reference_rows["dim_events"]
+                    clients_rows = reference_rows["stg_qtickets_api_clients_raw"]
+                    price_shades_rows = reference_rows["stg_qtickets_api_price_shades_raw"]
+                    discounts_rows = reference_rows["stg_qtickets_api_discounts_raw"]
+                    promo_code_rows = reference_rows["stg_qtickets_api_promo_codes_raw"]
+                    barcode_rows = reference_rows["stg_qtickets_api_barcodes_raw"]
+                    partner_ticket_rows = reference_rows[
+                        "stg_qtickets_api_partner_tickets_raw"
+                    ]
+                    if change_stats:
+                        metrics["change_detection"] = change_stats
+                        metrics["rows_unchanged_skipped"] = sum(
+                            item["skipped"] for item in change_stats.values()
+                        )
+
                 _load_clickhouse(
                     ch_client=ch_client,
-                    sales_stage_rows=sales_rows,
+                    database=database_prefix,
                     inventory_stage_rows=inventory_stage_rows,
                     events_rows=events_rows,
                     sales_daily_rows=sales_daily_rows,
@@ -427,10 +669,34 @@ def main(argv: Sequence[str] | None = None) -> None:
                     promo_code_rows=promo_code_rows,
                     barcode_rows=barcode_rows,
                     partner_ticket_rows=partner_ticket_rows,
+                    payload_rows=payloads.drain_side_rows(run_version),
+                    max_workers=config.ch_load_workers,
                 )
 
+                if config.ch_rollups:
+                    try:
+                        compact_rollups(ch_client, database_prefix, run_version)
+                    except Exception as exc:  # pylint: disable=broad-except
+                        # Retried by the next run well before the rollup TTL.
+                        logger.warning(
+                            "Unable to compact sales rollups",
+                            metrics={"job": job_name, "error": str(exc)},
+                        )
+
+                write_watermark(
+                    ch_client,
+                    next_watermark(
+                        sales["max_sale_ts"],
+                        window_end,
+                        timedelta(minutes=config.watermark_overlap_minutes),
+                    ),
+                )
+                if fingerprints is not None:
+                    fingerprints.commit()
+
                 _record_job_run(
                     ch_client=ch_client,
+                    database=database_prefix,
                     job=job_name,
                     status="ok",
                     started_at=started_at,
@@ -454,6 +720,11 @@ def main(argv: Sequence[str] | None = None) -> None:
                     error_info={
                         "error_type": exc.__class__.__name__,
                         "message": str(exc),
+                        **(
+                            exc.as_dict()
+                            if isinstance(exc, ClickHouseLoadError)
+                            else {}
+                        ),
                     },
                 )
                 raise SystemExit(1)
@@ -495,15 +766,33 @@ def main(argv: Sequence[str] | None = None) -> None:
             },
         )
         raise SystemExit(1)
+    finally:
+        # Counts of per-order/per-event messages dropped by throttling.
+        log_suppressed_summary()
 
 
 # --------------------------------------------------------------------- #
 # ClickHouse loaders
 # --------------------------------------------------------------------- #
+class ClickHouseLoadError(RuntimeError):
+    """One or more tables of :func:`_load_clickhouse` failed to load."""
+
+    def __init__(self, failures: Dict[str, str], loaded: Sequence[str]) -> None:
+        self.failures = dict(failures)
+        self.loaded = list(loaded)
+        details = "; ".join(f"{table}: {error}" for table, error in self.failures.items())
+        super().__init__(
+            f"{len(self.failures)} ClickHouse table load(s) failed: {details}"
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"failed_tables": self.failures, "loaded_tables": self.loaded}
+
+
 def _load_clickhouse(
     *,
     ch_client: ClickHouseClient | None,
-    sales_stage_rows: Sequence[Dict[str, Any]],
+    database: str,
     inventory_stage_rows: Sequence[Dict[str, Any]],
     events_rows: Sequence[Dict[str, Any]],
     sales_daily_rows: Sequence[Dict[str, Any]],
@@ -514,100 +803,122 @@ def _load_clickhouse(
     promo_code_rows: Sequence[Dict[str, Any]],
     barcode_rows: Sequence[Dict[str, Any]],
     partner_ticket_rows: Sequence[Dict[str, Any]],
+    payload_rows: Sequence[Dict[str, Any]] = (),
+    max_workers: int = 1,
 ) -> None:
-    """Persist staging and fact tables to ClickHouse."""
+    """
+    Persist staging and fact tables to ClickHouse.
+
+    The per-table inserts are independent and run on up to ``max_workers``
+    pooled connections, largest table first. Every insert is attempted; if
+    any fail, :class:`ClickHouseLoadError` reports all failed tables (the
+    others are loaded and stay idempotent through ``_ver``).
+
+    Order staging rows are not part of this call: they are streamed in batches
+    through a :class:`BufferedInserter` while the orders are being fetched.
+    """
     if ch_client is None:
         logger.info("Skipping ClickHouse load: no client (dry-run mode)")
         return
 
-    # Use zakaz_test for local testing
-    database_prefix = (
-        "zakaz_test" if os.getenv("CH_DATABASE") == "zakaz_test" else "zakaz"
-    )
-
-    if sales_stage_rows:
-        ch_client.insert(
-            f"{database_prefix}.stg_qtickets_api_orders_raw", list(sales_stage_rows)
-        )
-
-    if inventory_stage_rows:
-        ch_client.insert(
-            f"{database_prefix}.stg_qtickets_api_inventory_raw",
-            list(inventory_stage_rows),
-        )
 
-    if events_rows:
-        ch_client.insert(f"{database_prefix}.dim_events", list(events_rows))
+    latest_inventory_rows = [
+        # Use same rows with _ver to update the latest snapshot fact table.
+        {
+            "snapshot_ts": row["snapshot_ts"],
+            "event_id": row["event_id"],
+            "event_name": row["event_name"],
+            "city": row["city"],
+            "tickets_total": row["tickets_total"],
+            "tickets_left": row["tickets_left"],
+            "_ver": row["_ver"],
+        }
+        for row in inventory_stage_rows
+    ]
+    loads = [
+        ("stg_qtickets_api_inventory_raw", inventory_stage_rows),
+        ("dim_events", events_rows),
+        ("fact_qtickets_sales_daily", sales_daily_rows),
+        ("fact_qtickets_sales_utm_daily", sales_utm_daily_rows),
+        ("stg_qtickets_api_clients_raw", clients_rows),
+        ("stg_qtickets_api_price_shades_raw", price_shades_rows),
+        ("stg_qtickets_api_discounts_raw", discounts_rows),
+        ("stg_qtickets_api_promo_codes_raw", promo_code_rows),
+        ("stg_qtickets_api_barcodes_raw", barcode_rows),
+        ("stg_qtickets_api_partner_tickets_raw", partner_ticket_rows),
+        ("fact_qtickets_inventory_latest", latest_inventory_rows),
+        (PAYLOADS_TABLE, payload_rows),
+    ]
+    loads = sorted(
+        ((f"{database}.{table}", list(rows)) for table, rows in loads if rows),
+        key=lambda item: len(item[1]),
+        reverse=True,
+    )
+    if not loads:
+        return
 
-    if sales_daily_rows:
-        ch_client.insert(
-            f"{database_prefix}.fact_qtickets_sales_daily", list(sales_daily_rows)
-        )
+    failures: Dict[str, str] = {}
+    loaded: List[str] = []
+    workers = max(1, min(max_workers, len(loads)))
 
-    if sales_utm_daily_rows:
-        ch_client.insert(
-            f"{database_prefix}.fact_qtickets_sales_utm_daily",
-            list(sales_utm_daily_rows),
-        )
+    if workers == 1:
+        for table, rows in loads:
+            try:
+                ch_client.insert(table, rows)
+                loaded.append(table)
+            except Exception as exc:  # pylint: disable=broad-except
+                failures[table] = str(exc)
+    else:
+        with ClickHouseClientPool(ch_client, workers) as pool:
+
+            def _insert(table: str, rows: List[Dict[str, Any]]) -> None:
+                with pool.acquire() as pooled:
+                    pooled.insert(table, rows)
+
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="qtickets-ch-load"
+            ) as executor:
+                futures = {
+                    executor.submit(_insert, table, rows): table for table, rows in loads
+                }
+                for future in as_completed(futures):
+                    table = futures[future]
+                    try:
+                        future.result()
+                        loaded.append(table)
+                    except Exception as exc:  # pylint: disable=broad-except
+                        failures[table] = str(exc)
 
-    if clients_rows:
-        ch_client.insert(
-            f"{database_prefix}.stg_qtickets_api_clients_raw",
-            list(clients_rows),
+    if failures:
+        logger.error(
+            "ClickHouse load failed for some tables",
+            metrics={"failed_tables": failures, "loaded_tables": loaded},
         )
+        raise ClickHouseLoadError(failures, loaded)
 
-    if price_shades_rows:
-        ch_client.insert(
-            f"{database_prefix}.stg_qtickets_api_price_shades_raw",
-            list(price_shades_rows),
-        )
 
-    if discounts_rows:
-        ch_client.insert(
-            f"{database_prefix}.stg_qtickets_api_discounts_raw",
-            list(discounts_rows),
-        )
+def _target_database(config_db: str) -> str:
+    """Return the ClickHouse database to write to (``zakaz_test`` for local testing)."""
+    return "zakaz_test" if os.getenv("CH_DATABASE") == "zakaz_test" else config_db
 
-    if promo_code_rows:
-        ch_client.insert(
-            f"{database_prefix}.stg_qtickets_api_promo_codes_raw",
-            list(promo_code_rows),
-        )
 
-    if barcode_rows:
-        ch_client.insert(
-            f"{database_prefix}.stg_qtickets_api_barcodes_raw",
-            list(barcode_rows),
-        )
+def _sales_stage_table(database: str) -> str:
+    return f"{database}.stg_qtickets_api_orders_raw"
 
-    if partner_ticket_rows:
-        ch_client.insert(
-            f"{database_prefix}.stg_qtickets_api_partner_tickets_raw",
-            list(partner_ticket_rows),
-        )
 
-    if inventory_stage_rows:
-        # Use same rows with _ver to update the latest snapshot fact table.
-        latest_rows = [
-            {
-                "snapshot_ts": row["snapshot_ts"],
-                "event_id": row["event_id"],
-                "event_name": row["event_name"],
-                "city": row["city"],
-                "tickets_total": row["tickets_total"],
-                "tickets_left": row["tickets_left"],
-                "_ver": row["_ver"],
-            }
-            for row in inventory_stage_rows
-        ]
-        ch_client.insert(
-            f"{database_prefix}.fact_qtickets_inventory_latest", latest_rows
-        )
+def _stage_payload_rows(
+    writer: BufferedInserter, payloads: PayloadSerializer, version: int, database: str
+) -> None:
+    """Queue the payload side rows of the orders staged so far (hash mode)."""
+    rows = payloads.drain_side_rows(version)
+    if rows:
+        writer.add(f"{database}.{PAYLOADS_TABLE}", rows)
 
 
 def _record_job_run(
     *,
     ch_client: ClickHouseClient | None,
+    database: str,
     job: str,
     status: str,
     started_at: datetime,
@@ -650,6 +961,7 @@ def _record_job_run(
         "promo_code_rows",
         "barcode_rows",
         "partner_ticket_rows",
+        "rows_unchanged_skipped",
     ):
         if key in base_metrics:
             message_payload[key] = base_metrics[key]
@@ -668,10 +980,20 @@ def _record_job_run(
         "message": json.dumps(message_payload, ensure_ascii=False),
         "metrics": json.dumps(base_metrics, ensure_ascii=False),
     }
-    database_prefix = (
-        "zakaz_test" if os.getenv("CH_DATABASE") == "zakaz_test" else "zakaz"
-    )
-    ch_client.insert(f"{database_prefix}.meta_job_runs", [payload])
+    ch_client.insert(f"{database}.meta_job_runs", [payload])
+
+
+def _catalogue_changed(
+    fingerprints: FingerprintStore | None,
+    name: str,
+    payload: Any,
+    unchanged: List[str],
+) -> bool:
+    """Return ``False`` (and note the name) when a catalogue matches the last load."""
+    if fingerprints is None or fingerprints.stage(name, payload):
+        return True
+    unchanged.append(name)
+    return False
 
 
 def _fetch_optional_resource(
@@ -761,6 +1083,7 @@ def _safe_record_failure(
         ch_client = get_client_from_config(config)
         _record_job_run(
             ch_client=ch_client,
+            database=_target_database(config.clickhouse_db),
             job=job,
             status="error",
             started_at=started_at,
@@ -884,95 +1207,221 @@ def _coerce_date(value: Any) -> date | None:
         return None
 
 
-def _aggregate_sales_daily(
-    rows: Sequence[Dict[str, Any]], version: int
-) -> List[Dict[str, Any]]:
-    """Roll raw sales rows by day/event/city."""
-    buckets: Dict[tuple, Dict[str, Any]] = defaultdict(
-        lambda: {"tickets_sold": 0, "revenue": 0.0}
-    )
+def _stream_sales(
+    orders: Iterable[Dict[str, Any]],
+    *,
+    version: int,
+    batch_size: int,
+    sink: Optional[Callable[[Dict[str, List[Any]]], None]] = None,
+    aggregate: bool = True,
+) -> Dict[str, Any]:
+    """
+    Transform orders into sales rows batch by batch.
+
+    The columnar engine (:func:`iter_sales_column_batches`) yields blocks of
+    ``batch_size`` rows; each block is folded into a :class:`SalesRollup` and
+    handed to ``sink`` (the staging insert) as-is and dropped, so memory is
+    bounded by the batch and page size rather than by the ingestion window.
+    Without a ``sink`` only the rollup is kept; with ``aggregate=False`` the
+    rollup stays empty.
+    """
+    counts = {"orders": 0, "sales_rows": 0}
+    max_sale_ts: Optional[datetime] = None
+    rollup = SalesRollup()
 
-    for row in rows:
-        sale_ts = row.get("sale_ts")
-        if not isinstance(sale_ts, datetime):
-            continue
+    def _counted_orders() -> Iterator[Dict[str, Any]]:
+        for order in orders:
+            counts["orders"] += 1
+            yield order
 
-        key = (row.get("event_id"), row.get("city"), sale_ts.date())
-        bucket = buckets[key]
-        bucket["tickets_sold"] += int(row.get("tickets_sold", 0))
-        bucket["revenue"] += float(row.get("revenue", 0))
+    for columns in iter_sales_column_batches(
+        _counted_orders(), version=version, batch_size=batch_size
+    ):
+        counts["sales_rows"] += len(columns["sale_ts"])
+        batch_max = max(columns["sale_ts"])
+        if max_sale_ts is None or batch_max > max_sale_ts:
+            max_sale_ts = batch_max
+        if aggregate:
+            rollup.add_columns(columns)
+        if sink is not None:
+            sink(columns)
+
+    return {
+        "orders": counts["orders"],
+        "sales_rows": counts["sales_rows"],
+        "max_sale_ts": max_sale_ts,
+        "rollup": rollup,
+    }
 
-    aggregated: List[Dict[str, Any]] = []
-    for (event_id, city, sales_date), values in buckets.items():
-        aggregated.append(
-            {
-                "sales_date": sales_date,
-                "event_id": event_id,
-                "city": city,
-                "tickets_sold": int(values["tickets_sold"]),
-                "revenue": float(values["revenue"]),
-                "_ver": int(version),
-            }
-        )
 
-    return aggregated
+def _refresh_partial_first_day(
+    ch_client: ClickHouseClient,
+    sales: Dict[str, Any],
+    window_start: datetime,
+    database: str,
+) -> None:
+    """
+    Re-aggregate the day cut by ``window_start`` from staging.
 
+    Incremental windows start mid-day, so the in-memory rollup for that date
+    only holds part of its sales; rebuilding it from the staged rows keeps the
+    ReplacingMergeTree facts from being overwritten with partial totals.
+    """
+    first_day = to_msk(window_start).date()
+    day_start = localize_msk(datetime.combine(first_day, datetime.min.time()))
+    if day_start == to_msk(window_start):
+        return
 
-def _aggregate_sales_utm_daily(
-    rows: Sequence[Dict[str, Any]], version: int
-) -> List[Dict[str, Any]]:
-    """Roll raw sales rows by day/event/city/UTM."""
-    buckets: Dict[tuple, Dict[str, Any]] = defaultdict(
-        lambda: {"tickets_sold": 0, "revenue": 0.0}
+    sales["rollup"].drop_day(first_day)
+
+    rows = replay_sales_rows(
+        ch_client,
+        _sales_stage_table(database),
+        (day_start, day_start + timedelta(days=1)),
     )
+    sales["rollup"].add_rows(rows)
 
-    for row in rows:
-        sale_ts = row.get("sale_ts")
-        if not isinstance(sale_ts, datetime):
-            continue
 
-        key = (
-            row.get("event_id"),
-            row.get("city"),
-            sale_ts.date(),
-            row.get("utm_source") or "",
-            row.get("utm_medium") or "",
-            row.get("utm_campaign") or "",
-            row.get("utm_content") or "",
-            row.get("utm_term") or "",
-        )
-        bucket = buckets[key]
-        bucket["tickets_sold"] += int(row.get("tickets_sold", 0))
-        bucket["revenue"] += float(row.get("revenue", 0))
-
-    aggregated: List[Dict[str, Any]] = []
-    for (
-        event_id,
-        city,
-        sales_date,
-        utm_source,
-        utm_medium,
-        utm_campaign,
-        utm_content,
-        utm_term,
-    ), values in buckets.items():
-        aggregated.append(
-            {
-                "sales_date": sales_date,
-                "event_id": event_id,
-                "city": city,
-                "utm_source": utm_source,
-                "utm_medium": utm_medium,
-                "utm_campaign": utm_campaign,
-                "utm_content": utm_content,
-                "utm_term": utm_term,
-                "tickets_sold": int(values["tickets_sold"]),
-                "revenue": float(values["revenue"]),
-                "_ver": int(version),
-            }
+def _stream_sales_sliced(
+    client: QticketsApiClient,
+    slices: Sequence[Slice],
+    *,
+    version: int,
+    batch_size: int,
+    workers: int,
+    sink: Optional[Callable[[Dict[str, List[Any]]], None]],
+    ch_client: ClickHouseClient | None,
+    database: str,
+    job: str,
+    backfill_id: str | None = None,
+    flush: Optional[Callable[[], None]] = None,
+    aggregate: bool = True,
+) -> Dict[str, Any]:
+    """
+    Run :func:`_stream_sales` per time slice on a bounded worker pool.
+
+    With a ``backfill_id`` (initial backfill only) finished slices are
+    checkpointed in ``meta_qtickets_backfill_slices``; slices completed by an
+    earlier failed attempt of the same backfill are not refetched but replayed
+    from staging so the daily aggregates still cover the whole window.  Other
+    runs always refetch every slice.  If
+    any slice fails the first error is re-raised once the others are done.
+    ``flush`` (the buffered staging writer's) runs before a slice is marked
+    done, so a checkpoint never covers rows that are still in memory.
+    ``aggregate=False`` (rollups kept by ClickHouse) skips the rollup and the
+    replay.
+    """
+    checkpoints = (
+        SliceCheckpoints(
+            ch_client,
+            f"{database}.{BACKFILL_SLICES_TABLE}",
+            job,
+            backfill_id,
+        )
+        if ch_client is not None and backfill_id
+        else None
+    )
+    done = checkpoints.completed(slices) if checkpoints else set()
+    pending = [item for item in slices if slice_key(item) not in done]
+    replayed = [item for item in slices if slice_key(item) in done]
+
+    logger.info(
+        "Fetching orders in time slices",
+        metrics={
+            "slices": len(slices),
+            "pending": len(pending),
+            "replayed": len(replayed),
+            "workers": workers,
+        },
+    )
+
+    # The ClickHouse client is shared by all workers; serialise its use.
+    ch_lock = threading.Lock()
+
+    def _locked_sink(batch: Dict[str, List[Any]]) -> None:
+        with ch_lock:
+            sink(batch)  # type: ignore[misc]
+
+    def _run_slice(item: Slice) -> Dict[str, Any]:
+        return _stream_sales(
+            client.iter_orders(*item),
+            version=version,
+            batch_size=batch_size,
+            sink=_locked_sink if sink is not None else None,
+            aggregate=aggregate,
+        )
+
+    result: Dict[str, Any] = {
+        "orders": 0,
+        "sales_rows": 0,
+        "max_sale_ts": None,
+        "rollup": SalesRollup(),
+        "order_slices": len(slices),
+        "order_slices_replayed": len(replayed),
+    }
+    failures: List[tuple[Slice, Exception]] = []
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, workers), thread_name_prefix="qtickets-slice"
+    ) as pool:
+        futures = {pool.submit(_run_slice, item): item for item in pending}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                sliced = future.result()
+            except Exception as exc:  # pylint: disable=broad-except
+                failures.append((item, exc))
+                logger.warning(
+                    "Order slice failed",
+                    metrics={
+                        "slice_start": item[0].isoformat(),
+                        "slice_end": item[1].isoformat(),
+                        "error": str(exc),
+                    },
+                )
+                if checkpoints is not None:
+                    with ch_lock:
+                        checkpoints.mark(item, status="error", error=str(exc))
+                continue
+
+            result["orders"] += sliced["orders"]
+            result["sales_rows"] += sliced["sales_rows"]
+            if sliced["max_sale_ts"] is not None and (
+                result["max_sale_ts"] is None
+                or sliced["max_sale_ts"] > result["max_sale_ts"]
+            ):
+                result["max_sale_ts"] = sliced["max_sale_ts"]
+            result["rollup"].merge(sliced["rollup"])
+            if checkpoints is not None:
+                if flush is not None:
+                    # A slice is only checkpointed once its rows are in staging.
+                    flush()
+                with ch_lock:
+                    checkpoints.mark(
+                        item,
+                        status="ok",
+                        orders=sliced["orders"],
+                        sales_rows=sliced["sales_rows"],
+                    )
+
+    if failures:
+        logger.error(
+            "Order slices failed",
+            metrics={
+                "failed": len(failures),
+                "slices": len(slices),
+                "checkpointed": checkpoints is not None and checkpoints.available,
+            },
         )
+        raise failures[0][1]
+
+    if ch_client is not None and aggregate:
+        stage_table = _sales_stage_table(database)
+        for item in replayed:
+            rows = replay_sales_rows(ch_client, stage_table, item)
+            result["rollup"].add_rows(rows)
 
-    return aggregated
+    return result
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+"""
+ClickHouse-side sales rollups for the QTickets API integration.
+
+``2025-qtickets-api-sales-rollups.sql`` adds materialized views that fold
+every insert into ``stg_qtickets_api_orders_raw`` into the
+``agg_qtickets_sales_daily`` / ``agg_qtickets_sales_utm_daily``
+AggregatingMergeTree tables.  The rollup states keep distinct order tuples,
+so re-staged orders are counted once, but they grow with the number of
+orders; the rollups therefore only hold the last ``ROLLUP_TTL_DAYS`` days.
+:func:`compact_rollups` writes the final totals of closed days into the
+ReplacingMergeTree fact tables before the TTL drops them, and the read views
+serve the last ``ROLLUP_LIVE_DAYS`` days from the rollups and older days from
+the facts.
+
+:func:`backfill_rollups` fills both sides from rows that were staged before
+the migration; running it again does not change the totals.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List
+
+from integrations.common.ch import ClickHouseClient
+from integrations.common.logging import setup_integrations_logger
+
+logger = setup_integrations_logger("qtickets_api")
+
+STAGE_TABLE = "stg_qtickets_api_orders_raw"
+
+# Keep in sync with the TTL and the views in 2025-qtickets-api-sales-rollups.sql.
+ROLLUP_TTL_DAYS = 45
+ROLLUP_LIVE_DAYS = 35
+# Days older than this are compacted into the facts on every run, leaving a
+# margin of runs before they leave the live window.
+COMPACT_AFTER_DAYS = 28
+
+# Rollup table -> GROUP BY columns (besides the sales_date derived from sale_ts)
+ROLLUP_TABLES: Dict[str, List[str]] = {
+    "agg_qtickets_sales_daily": ["event_id", "city"],
+    "agg_qtickets_sales_utm_daily": [
+        "event_id",
+        "city",
+        "utm_source",
+        "utm_medium",
+        "utm_campaign",
+        "utm_content",
+        "utm_term",
+    ],
+}
+
+# Rollup table -> fact table holding the days past the live window
+ROLLUP_FACTS: Dict[str, str] = {
+    "agg_qtickets_sales_daily": "fact_qtickets_sales_daily",
+    "agg_qtickets_sales_utm_daily": "fact_qtickets_sales_utm_daily",
+}
+
+
+def _backfill_sql(database: str, table: str, group_by: List[str]) -> str:
+    columns = ", ".join(group_by)
+    return (
+        f"INSERT INTO {database}.{table} (sales_date, {columns}, sales) "
+        f"SELECT toDate(sale_ts) AS sales_date, {columns}, "
+        "groupUniqArrayState((_dedup_key, tickets_sold, revenue)) AS sales "
+        f"FROM {database}.{STAGE_TABLE} "
+        "WHERE toYYYYMM(sale_ts) = %(month)s "
+        f"AND toDate(sale_ts) >= today() - {ROLLUP_TTL_DAYS} "
+        f"GROUP BY sales_date, {columns}"
+    )
+
+
+def _history_sql(database: str, table: str, group_by: List[str]) -> str:
+    # Staging is deduplicated by _dedup_key, so FINAL sums every order once.
+    columns = ", ".join(group_by)
+    return (
+        f"INSERT INTO {database}.{ROLLUP_FACTS[table]} "
+        f"(sales_date, {columns}, tickets_sold, revenue, _ver) "
+        f"SELECT toDate(sale_ts) AS sales_date, {columns}, "
+        "toUInt32(sum(tickets_sold)), sum(revenue), %(ver)s "
+        f"FROM {database}.{STAGE_TABLE} FINAL "
+        "WHERE toYYYYMM(sale_ts) = %(month)s "
+        f"AND toDate(sale_ts) < today() - {ROLLUP_LIVE_DAYS} "
+        f"GROUP BY sales_date, {columns}"
+    )
+
+
+def _compact_sql(database: str, table: str, group_by: List[str]) -> str:
+    columns = ", ".join(group_by)
+    return (
+        f"INSERT INTO {database}.{ROLLUP_FACTS[table]} "
+        f"(sales_date, {columns}, tickets_sold, revenue, _ver) "
+        f"SELECT sales_date, {columns}, "
+        "toUInt32(arraySum(s -> tupleElement(s, 2), orders)), "
+        "arraySum(s -> tupleElement(s, 3), orders), %(ver)s "
+        f"FROM (SELECT sales_date, {columns}, groupUniqArrayMerge(sales) AS orders "
+        f"FROM {database}.{table} "
+        f"WHERE sales_date >= today() - {ROLLUP_TTL_DAYS} "
+        f"AND sales_date < today() - {COMPACT_AFTER_DAYS} "
+        f"GROUP BY sales_date, {columns})"
+    )
+
+
+def backfill_rollups(
+    ch_client: ClickHouseClient, database: str, version: int
+) -> Dict[str, int]:
+    """
+    Populate the sales rollups and their facts from staged orders, a month at a time.
+
+    Days within the rollup TTL get rollup states; days past the live window
+    get their totals written to the fact tables with ``version`` as ``_ver``.
+    Returns the number of months processed per rollup table.
+    """
+    result = ch_client.execute(
+        f"SELECT DISTINCT toYYYYMM(sale_ts) AS month FROM {database}.{STAGE_TABLE} "
+        "ORDER BY month"
+    )
+    months = [int(row[0]) for row in getattr(result, "result_rows", None) or []]
+
+    stats: Dict[str, int] = {}
+    for table, group_by in ROLLUP_TABLES.items():
+        rollup_sql = _backfill_sql(database, table, group_by)
+        history_sql = _history_sql(database, table, group_by)
+        for month in months:
+            ch_client.command(rollup_sql, {"month": month})
+            ch_client.command(history_sql, {"month": month, "ver": int(version)})
+        stats[table] = len(months)
+        logger.info(
+            "Backfilled sales rollup from staging",
+            metrics={"table": f"{database}.{table}", "months": len(months)},
+        )
+    return stats
+
+
+def compact_rollups(ch_client: ClickHouseClient, database: str, version: int) -> None:
+    """
+    Write the totals of closed rollup days into the fact tables.
+
+    Covers the days between ``COMPACT_AFTER_DAYS`` and ``ROLLUP_TTL_DAYS`` old
+    on every call; ReplacingMergeTree keeps the row with the newest ``_ver``,
+    so repeating it is harmless.
+    """
+    for table, group_by in ROLLUP_TABLES.items():
+        ch_client.command(_compact_sql(database, table, group_by), {"ver": int(version)})
+    logger.info(
+        "Compacted closed sales rollup days into facts",
+        metrics={
+            "tables": list(ROLLUP_FACTS.values()),
+            "older_than_days": COMPACT_AFTER_DAYS,
+        },
+    )
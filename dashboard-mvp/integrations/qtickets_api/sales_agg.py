@@ -0,0 +1,161 @@
+"""
+Streaming sales rollups for the QTickets API integration.
+
+:class:`SalesRollup` folds sales rows into the ``fact_qtickets_sales_daily``
+(day/event/city) and ``fact_qtickets_sales_utm_daily`` (day/event/city/UTM)
+aggregates in one pass while the rows are produced, so no row list has to be
+kept or re-scanned.  Group keys are interned to dense integer ids and the
+totals live in typed arrays; rollups built by parallel workers are combined
+with :meth:`SalesRollup.merge`.
+"""
+
+from __future__ import annotations
+
+from array import array
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Mapping, Sequence
+
+UTM_FIELDS = ("utm_source", "utm_medium", "utm_campaign", "utm_content", "utm_term")
+
+
+class _Totals:
+    """Tickets/revenue per interned group key, in first-seen key order."""
+
+    __slots__ = ("ids", "keys", "tickets", "revenue")
+
+    def __init__(self) -> None:
+        self._reset()
+
+    def _reset(self) -> None:
+        self.ids: Dict[tuple, int] = {}
+        self.keys: List[tuple] = []
+        self.tickets = array("q")
+        self.revenue = array("d")
+
+    def add(self, key: tuple, tickets: int, revenue: float) -> None:
+        group = self.ids.get(key)
+        if group is None:
+            group = self.ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.tickets.append(0)
+            self.revenue.append(0.0)
+        self.tickets[group] += tickets
+        self.revenue[group] += revenue
+
+    def merge(self, other: "_Totals") -> None:
+        for key, tickets, revenue in zip(other.keys, other.tickets, other.revenue):
+            self.add(key, tickets, revenue)
+
+    def drop(self, keep) -> None:
+        kept = [
+            (key, tickets, revenue)
+            for key, tickets, revenue in zip(self.keys, self.tickets, self.revenue)
+            if keep(key)
+        ]
+        self._reset()
+        for key, tickets, revenue in kept:
+            self.add(key, tickets, revenue)
+
+
+class SalesRollup:
+    """
+    Day/event/city and day/event/city/UTM totals of sales rows.
+
+    Rows without a ``datetime`` ``sale_ts`` are ignored.  Totals are added in
+    row order starting from ``0``/``0.0``, so the result matches summing the
+    rows one by one.
+    """
+
+    __slots__ = ("_daily", "_utm")
+
+    def __init__(self) -> None:
+        self._daily = _Totals()
+        self._utm = _Totals()
+
+    def add(self, row: Dict[str, Any]) -> None:
+        sale_ts = row.get("sale_ts")
+        if not isinstance(sale_ts, datetime):
+            return
+
+        get = row.get
+        daily_key = (get("event_id"), get("city"), sale_ts.date())
+        utm_key = daily_key + (
+            get("utm_source") or "",
+            get("utm_medium") or "",
+            get("utm_campaign") or "",
+            get("utm_content") or "",
+            get("utm_term") or "",
+        )
+        tickets = int(get("tickets_sold", 0))
+        revenue = float(get("revenue", 0))
+        self._daily.add(daily_key, tickets, revenue)
+        self._utm.add(utm_key, tickets, revenue)
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.add(row)
+
+    def add_columns(self, columns: Mapping[str, Sequence[Any]]) -> None:
+        """Fold a column-oriented block of sales rows (column name -> values)."""
+        for values in zip(
+            columns["sale_ts"],
+            columns["event_id"],
+            columns["city"],
+            *(columns[name] for name in UTM_FIELDS),
+            columns["tickets_sold"],
+            columns["revenue"],
+        ):
+            sale_ts, event_id, city = values[:3]
+            if not isinstance(sale_ts, datetime):
+                continue
+            daily_key = (event_id, city, sale_ts.date())
+            utm_key = daily_key + tuple(value or "" for value in values[3:8])
+            tickets = int(values[8])
+            revenue = float(values[9])
+            self._daily.add(daily_key, tickets, revenue)
+            self._utm.add(utm_key, tickets, revenue)
+
+    def merge(self, other: "SalesRollup") -> None:
+        """Add the totals of ``other`` (e.g. a worker's partial rollup)."""
+        self._daily.merge(other._daily)  # pylint: disable=protected-access
+        self._utm.merge(other._utm)  # pylint: disable=protected-access
+
+    def drop_day(self, sales_date: date) -> None:
+        """Forget every group of ``sales_date`` (before re-adding it in full)."""
+        self._daily.drop(lambda key: key[2] != sales_date)
+        self._utm.drop(lambda key: key[2] != sales_date)
+
+    def daily_rows(self, version: int) -> List[Dict[str, Any]]:
+        """``fact_qtickets_sales_daily`` rows."""
+        totals = self._daily
+        return [
+            {
+                "sales_date": sales_date,
+                "event_id": event_id,
+                "city": city,
+                "tickets_sold": int(tickets),
+                "revenue": float(revenue),
+                "_ver": int(version),
+            }
+            for (event_id, city, sales_date), tickets, revenue in zip(
+                totals.keys, totals.tickets, totals.revenue
+            )
+        ]
+
+    def utm_rows(self, version: int) -> List[Dict[str, Any]]:
+        """``fact_qtickets_sales_utm_daily`` rows."""
+        totals = self._utm
+        rows: List[Dict[str, Any]] = []
+        for key, tickets, revenue in zip(totals.keys, totals.tickets, totals.revenue):
+            event_id, city, sales_date = key[:3]
+            row: Dict[str, Any] = {
+                "sales_date": sales_date,
+                "event_id": event_id,
+                "city": city,
+            }
+            row.update(zip(UTM_FIELDS, key[3:]))
+            row["tickets_sold"] = int(tickets)
+            row["revenue"] = float(revenue)
+            row["_ver"] = int(version)
+            rows.append(row)
+        return rows
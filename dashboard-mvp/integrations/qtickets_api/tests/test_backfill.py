@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from integrations.common.time import to_msk
+from integrations.qtickets_api.backfill import SliceCheckpoints, build_slices, slice_key
+from integrations.qtickets_api.loader import _stream_sales_sliced
+
+
+def _msk(value: str) -> datetime:
+    return to_msk(f"{value}+03:00")
+
+
+def test_build_slices_aligns_inner_boundaries_to_midnight():
+    slices = build_slices(_msk("2025-01-01T15:30:00"), _msk("2025-01-04T02:00:00"), 24)
+
+    assert [slice_key(item) for item in slices] == [
+        (datetime(2025, 1, 1, 15, 30), datetime(2025, 1, 2)),
+        (datetime(2025, 1, 2), datetime(2025, 1, 3)),
+        (datetime(2025, 1, 3), datetime(2025, 1, 4)),
+        (datetime(2025, 1, 4), datetime(2025, 1, 4, 2)),
+    ]
+
+
+def test_build_slices_keeps_short_window_whole():
+    start = _msk("2025-01-01T10:00:00")
+    end = start + timedelta(hours=2)
+
+    assert build_slices(start, end, 24) == [(start, end)]
+    assert build_slices(start, end, 0) == [(start, end)]
+
+
+class _FakeClient:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = []
+
+    def iter_orders(self, date_from, date_to):
+        self.calls.append((date_from, date_to))
+        if self.fail_on is not None and date_from == self.fail_on:
+            raise RuntimeError("boom")
+        yield {
+            "id": f"o-{date_from:%d}",
+            "payed": 1,
+            "payed_at": date_from.isoformat(),
+            "event_id": "e1",
+            "baskets": [{"price": 10, "quantity": 1}],
+        }
+
+
+def test_stream_sales_sliced_merges_slices():
+    slices = build_slices(_msk("2025-01-01T00:00:00"), _msk("2025-01-04T00:00:00"), 24)
+    client = _FakeClient()
+
+    result = _stream_sales_sliced(
+        client, slices, version=1, batch_size=10, workers=3, sink=None,
+        ch_client=None, database="zakaz", job="t",
+    )
+
+    assert result["orders"] == 3
+    assert result["order_slices"] == 3
+    assert len(client.calls) == 3
+    daily = result["rollup"].daily_rows(1)
+    assert sorted(row["sales_date"].day for row in daily) == [1, 2, 3]
+
+
+def test_stream_sales_sliced_reraises_after_other_slices_finish():
+    slices = build_slices(_msk("2025-01-01T00:00:00"), _msk("2025-01-03T00:00:00"), 24)
+    client = _FakeClient(fail_on=slices[0][0])
+
+    with pytest.raises(RuntimeError, match="boom"):
+        _stream_sales_sliced(
+            client, slices, version=1, batch_size=10, workers=2, sink=None,
+            ch_client=None, database="zakaz", job="t",
+        )
+
+    assert len(client.calls) == 2
+
+
+class _Result:
+    def __init__(self, rows):
+        self.result_rows = rows
+
+
+class _FakeCH:
+    def __init__(self, done=(), missing=False):
+        self.done = list(done)
+        self.missing = missing
+        self.queries = []
+        self.inserted = []
+
+    def execute(self, sql, params=None):
+        self.queries.append((sql, params))
+        if self.missing:
+            raise RuntimeError("Table zakaz.meta_qtickets_backfill_slices doesn't exist")
+        if "meta_qtickets_backfill_slices" in sql:
+            return _Result(self.done)
+        return _Result([])
+
+    def insert(self, table, rows):
+        if self.missing:
+            raise RuntimeError("Table zakaz.meta_qtickets_backfill_slices doesn't exist")
+        self.inserted.extend(rows)
+
+
+def test_stream_sales_sliced_ignores_checkpoints_outside_backfill():
+    slices = build_slices(_msk("2025-01-01T00:00:00"), _msk("2025-01-03T00:00:00"), 24)
+    ch = _FakeCH(done=[slice_key(slices[0])])
+    client = _FakeClient()
+
+    result = _stream_sales_sliced(
+        client, slices, version=1, batch_size=10, workers=2, sink=None,
+        ch_client=ch, database="zakaz", job="t",
+    )
+
+    assert len(client.calls) == 2
+    assert result["order_slices_replayed"] == 0
+    assert ch.inserted == []
+    assert not any("meta_qtickets_backfill_slices" in sql for sql, _ in ch.queries)
+
+
+def test_stream_sales_sliced_resumes_same_backfill():
+    slices = build_slices(_msk("2025-01-01T00:00:00"), _msk("2025-01-03T00:00:00"), 24)
+    ch = _FakeCH(done=[slice_key(slices[0])])
+    client = _FakeClient()
+
+    result = _stream_sales_sliced(
+        client, slices, version=1, batch_size=10, workers=2, sink=None,
+        ch_client=ch, database="zakaz", job="t", backfill_id="initial:48h:20250101",
+    )
+
+    assert client.calls == [slices[1]]
+    assert result["order_slices_replayed"] == 1
+    assert ch.queries[0][1]["backfill_id"] == "initial:48h:20250101"
+    assert [row["backfill_id"] for row in ch.inserted] == ["initial:48h:20250101"]
+
+
+def test_slice_checkpoints_degrade_when_table_missing():
+    slices = build_slices(_msk("2025-01-01T00:00:00"), _msk("2025-01-03T00:00:00"), 24)
+    checkpoints = SliceCheckpoints(_FakeCH(missing=True), "zakaz.meta_qtickets_backfill_slices", "t", "b")
+
+    assert checkpoints.completed(slices) == set()
+    assert checkpoints.available is False
+    checkpoints.mark(slices[0], status="ok")
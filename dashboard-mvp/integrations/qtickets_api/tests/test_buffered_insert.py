@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from integrations.common.buffered_insert import BufferedInserter, BufferedInsertError
+
+
+class _RecordingClient:
+    def __init__(self, fail_table=None):
+        self.fail_table = fail_table
+        self.calls = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def insert_columns(self, table, columns, settings=None):
+        if table == self.fail_table:
+            raise RuntimeError("boom")
+        with self.lock:
+            self.calls.append((table, {k: list(v) for k, v in columns.items()}, settings))
+
+    def close(self):
+        self.closed = True
+
+
+def test_flush_writes_pending_rows_per_table_in_chunks():
+    client = _RecordingClient()
+    inserter = BufferedInserter(client, max_rows=2, max_delay_seconds=60)
+
+    inserter.add("a", [{"x": 1}, {"x": 2}, {"x": 3}])
+    inserter.add_columns("b", {"y": ["p"]})
+    inserter.flush()
+
+    written = sorted((table, cols[next(iter(cols))]) for table, cols, _ in client.calls)
+    assert written == [("a", [1, 2]), ("a", [3]), ("b", ["p"])]
+    stats = inserter.stats()
+    assert stats["a"]["rows"] == 3 and stats["a"]["batches"] == 2
+    inserter.close()
+
+
+def test_close_flushes_and_passes_async_insert_settings():
+    client = _RecordingClient()
+    with BufferedInserter(client, max_rows=100, max_delay_seconds=60, async_insert=True) as inserter:
+        inserter.add("a", [{"x": 1}])
+
+    assert client.calls == [
+        ("a", {"x": [1]}, {"async_insert": 1, "wait_for_async_insert": 1})
+    ]
+
+
+def test_failed_insert_is_raised_on_flush_and_blocks_further_adds():
+    inserter = BufferedInserter(_RecordingClient(fail_table="a"), max_rows=10)
+    inserter.add("a", [{"x": 1}])
+
+    with pytest.raises(BufferedInsertError, match="Buffered insert into a failed"):
+        inserter.flush()
+    with pytest.raises(BufferedInsertError):
+        inserter.add("a", [{"x": 2}])
+    assert inserter.stats()["a"]["failed_rows"] == 1
+    with pytest.raises(BufferedInsertError):
+        inserter.close()
+
+
+def test_add_blocks_while_max_buffered_rows_are_pending():
+    release = threading.Event()
+
+    class _SlowClient(_RecordingClient):
+        def insert_columns(self, table, columns, settings=None):
+            release.wait(5)
+            super().insert_columns(table, columns, settings)
+
+    client = _SlowClient()
+    inserter = BufferedInserter(client, max_rows=2, max_delay_seconds=60, max_buffered_rows=2)
+    inserter.add("a", [{"x": 1}, {"x": 2}])
+
+    added = threading.Event()
+    producer = threading.Thread(
+        target=lambda: (inserter.add("a", [{"x": 3}]), added.set()), daemon=True
+    )
+    producer.start()
+
+    assert not added.wait(0.2)
+    release.set()
+    assert added.wait(5)
+    inserter.close()
+    assert sum(len(cols["x"]) for _, cols, _ in client.calls) == 3
+
+
+def test_close_releases_an_owned_client_only():
+    shared, owned = _RecordingClient(), _RecordingClient()
+    BufferedInserter(shared, max_rows=10).close()
+    with BufferedInserter(owned, max_rows=10, close_client=True) as inserter:
+        inserter.add("a", [{"x": 1}])
+
+    assert not shared.closed
+    assert owned.closed and owned.calls
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from integrations.common.ch import ClickHouseClient, ColumnBatch
+from integrations.qtickets_api.loader import (
+    ClickHouseLoadError,
+    _load_clickhouse,
+    _stream_sales,
+)
+
+
+def _client() -> ClickHouseClient:
+    ch_client = ClickHouseClient.__new__(ClickHouseClient)
+    ch_client.client = MagicMock()
+    ch_client.max_retries = 1
+    ch_client.retry_delay = 0
+    return ch_client
+
+
+def test_insert_sends_dict_rows_column_oriented():
+    ch_client = _client()
+
+    ch_client.insert("t", [{"a": 1, "b": "x"}, {"b": "y", "a": 2, "extra": 0}])
+
+    args, kwargs = ch_client.client.insert.call_args
+    assert args == ("t", [[1, 2], ["x", "y"]])
+    assert kwargs == {"column_names": ["a", "b"], "column_oriented": True}
+
+
+def test_insert_reports_missing_keys():
+    with pytest.raises(ValueError, match="Row 1 is missing keys"):
+        _client().insert("t", [{"a": 1, "b": 2}, {"a": 3}])
+
+
+def test_insert_columns_accepts_mappings_and_rejects_ragged_columns():
+    ch_client = _client()
+
+    ch_client.insert_columns("t", {"a": (1, 2), "b": ["x", "y"]})
+    args, kwargs = ch_client.client.insert.call_args
+    assert args == ("t", [(1, 2), ["x", "y"]])
+    assert kwargs["column_oriented"] is True
+
+    with pytest.raises(ValueError, match="different lengths"):
+        ch_client.insert_columns("t", {"a": [1], "b": []})
+
+
+def test_column_batch_rolls_back_incomplete_row():
+    batch = ColumnBatch()
+    batch.append({"a": 1, "b": 2})
+    with pytest.raises(ValueError, match="missing key: b"):
+        batch.append({"a": 3})
+
+    assert len(batch) == 1
+    assert batch.columns == {"a": [1], "b": [2]}
+
+
+def test_stream_sales_hands_columns_to_sink():
+    orders = [
+        {
+            "id": order_id,
+            "payed": 1,
+            "payed_at": "2025-01-01T10:00:00+03:00",
+            "event_id": 10,
+            "baskets": [{"price": 100, "quantity": 1}],
+        }
+        for order_id in (1, 2, 3)
+    ]
+    batches = []
+
+    result = _stream_sales(orders, version=1, batch_size=2, sink=batches.append)
+
+    assert [batch["order_id"] for batch in batches] == [["1", "2"], ["3"]]
+    assert result["sales_rows"] == 3
+
+
+class _PoolClient:
+    def __init__(self, registry):
+        self.registry = registry
+        self.inserted = []
+
+    def clone(self):
+        clone = _PoolClient(self.registry)
+        self.registry.append(clone)
+        return clone
+
+    def insert(self, table, rows):
+        if table.endswith("dim_events"):
+            raise RuntimeError("boom")
+        self.inserted.append((table, len(rows)))
+
+    def close(self):
+        self.registry.remove(self)
+
+
+def test_load_clickhouse_attempts_every_table_and_reports_failures():
+    registry = []
+    base = _PoolClient(registry)
+    row = {"x": 1}
+
+    with pytest.raises(ClickHouseLoadError) as excinfo:
+        _load_clickhouse(
+            ch_client=base,
+            database="zakaz",
+            inventory_stage_rows=[],
+            events_rows=[row],
+            sales_daily_rows=[row, row],
+            sales_utm_daily_rows=[row],
+            clients_rows=[row],
+            price_shades_rows=[],
+            discounts_rows=[],
+            promo_code_rows=[],
+            barcode_rows=[],
+            partner_ticket_rows=[row],
+            max_workers=3,
+        )
+
+    assert list(excinfo.value.failures) == ["zakaz.dim_events"]
+    assert sorted(excinfo.value.loaded) == [
+        "zakaz.fact_qtickets_sales_daily",
+        "zakaz.fact_qtickets_sales_utm_daily",
+        "zakaz.stg_qtickets_api_clients_raw",
+        "zakaz.stg_qtickets_api_partner_tickets_raw",
+    ]
+    assert registry == []  # pooled clones are closed again
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from integrations.qtickets_api import change_detection
+from integrations.qtickets_api.change_detection import (
+    CHANGE_SPECS,
+    _fingerprint_sql,
+    filter_changed_rows,
+    row_fingerprint,
+    skip_unchanged,
+)
+
+
+def test_skip_unchanged_drops_rows_matching_latest_fingerprint():
+    spec = CHANGE_SPECS["stg_qtickets_api_clients_raw"]
+    same = {"client_id": "1", "payload_json": '{"id": 1}', "_ver": 2}
+    changed = {"client_id": "2", "payload_json": '{"id": 2, "x": 1}', "_ver": 2}
+    new = {"client_id": "3", "payload_json": '{"id": 3}', "_ver": 2}
+
+    ch_client = MagicMock()
+    ch_client.execute.return_value = SimpleNamespace(
+        result_rows=[
+            ("1", row_fingerprint(same, spec)),
+            ("2", row_fingerprint({"payload_json": '{"id": 2}'}, spec)),
+        ]
+    )
+
+    filtered, stats = skip_unchanged(
+        ch_client, "zakaz", {"stg_qtickets_api_clients_raw": [same, changed, new]}
+    )
+
+    assert filtered["stg_qtickets_api_clients_raw"] == [changed, new]
+    assert stats == {"stg_qtickets_api_clients_raw": {"changed": 2, "skipped": 1}}
+    query, params = ch_client.execute.call_args.args
+    assert "FROM zakaz.stg_qtickets_api_clients_raw" in query
+    assert params == {"keys": ["1", "2", "3"]}
+
+
+def test_skip_unchanged_keeps_all_rows_when_lookup_fails():
+    rows = [{"event_id": "10", "event_name": "Show", "city": "msk"}]
+    ch_client = MagicMock()
+    ch_client.execute.side_effect = RuntimeError("boom")
+
+    filtered, stats = skip_unchanged(ch_client, "zakaz", {"dim_events": rows})
+
+    assert filtered["dim_events"] == rows
+    assert stats == {"dim_events": {"changed": 1, "skipped": 0}}
+
+
+def test_filter_changed_rows_looks_up_keys_in_chunks(monkeypatch):
+    monkeypatch.setattr(change_detection, "KEY_CHUNK_SIZE", 2)
+    spec = CHANGE_SPECS["stg_qtickets_api_clients_raw"]
+    rows = [{"client_id": str(i), "payload_json": f'{{"id": {i}}}'} for i in range(5)]
+
+    def lookup(query, params):
+        return SimpleNamespace(
+            result_rows=[
+                (key, row_fingerprint({"payload_json": f'{{"id": {key}}}'}, spec))
+                for key in params["keys"]
+            ]
+        )
+
+    ch_client = MagicMock()
+    ch_client.execute.side_effect = lookup
+
+    changed, skipped = filter_changed_rows(ch_client, "zakaz.t", rows, spec)
+
+    assert (changed, skipped) == ([], 5)
+    assert [call.args[1]["keys"] for call in ch_client.execute.call_args_list] == [
+        ["0", "1"],
+        ["2", "3"],
+        ["4"],
+    ]
+
+
+def _clickhouse_fingerprint(*values: bytes) -> str:
+    # concatWithSeparator('\x1F', ifNull(toString(col), '')) over raw String bytes.
+    return hashlib.md5(b"\x1f".join(values)).hexdigest()
+
+
+def test_row_fingerprint_hashes_compressed_payload_bytes_as_stored():
+    spec = CHANGE_SPECS["stg_qtickets_api_clients_raw"]
+    # PAYLOAD_MODE=zstd stores the frame as is; it is not valid UTF-8.
+    frame = b"\x28\xb5\x2f\xfd\x20\x0b\x59\x00\x00\xff"
+
+    assert "concatWithSeparator('\\x1F'" in _fingerprint_sql(spec)
+    assert row_fingerprint({"payload_json": frame}, spec) == _clickhouse_fingerprint(frame)
+    assert row_fingerprint({"payload_json": '{"id": "ё"}'}, spec) == _clickhouse_fingerprint(
+        '{"id": "ё"}'.encode("utf-8")
+    )
+
+
+def test_row_fingerprint_joins_columns_like_clickhouse():
+    spec = CHANGE_SPECS["dim_events"]
+    row = {"event_name": "Show", "city": None, "start_date": "2025-01-02", "end_date": None}
+
+    assert row_fingerprint(row, spec) == _clickhouse_fingerprint(
+        b"Show", b"", b"2025-01-02", b""
+    )
@@ -11,7 +11,9 @@ from unittest.mock import MagicMock
 import pytest
 import requests
 
+from integrations.common.http_cache import HttpCache
 from integrations.common.time import now_msk
+from integrations.qtickets_api import client as client_module
 from integrations.qtickets_api.client import QticketsApiClient, QticketsApiError
 
 
@@ -254,3 +256,208 @@ def test_partners_event_seats_requires_config(monkeypatch):
     result = client.partners_event_seats(event_id=1, show_id=2)
     assert result == {}
     mocked_request.assert_not_called()
+
+
+def test_collect_paginated_prefetches_pages_concurrently_in_order(monkeypatch):
+    client = QticketsApiClient(
+        base_url="https://qtickets.test",
+        token="secret",
+        org_name="test-org",
+        page_concurrency=3,
+    )
+    total_pages = 5
+
+    def fake_request(method, url, **kwargs):
+        page = kwargs["json"]["page"]
+        return _make_response(
+            200,
+            {
+                "data": [{"id": page * 10}, {"id": page * 10 + 1}],
+                "meta": {"page": page, "total_pages": total_pages},
+            },
+        )
+
+    mocked_request = MagicMock(side_effect=fake_request)
+    monkeypatch.setattr(client.session, "request", mocked_request)
+
+    items = client._collect_paginated("orders", json_body={"per_page": 2})
+
+    assert [item["id"] for item in items] == [
+        value for page in range(1, total_pages + 1) for value in (page * 10, page * 10 + 1)
+    ]
+    requested_pages = sorted(call[1]["json"]["page"] for call in mocked_request.call_args_list)
+    assert requested_pages == [1, 2, 3, 4, 5]
+
+
+def test_collect_paginated_stops_prefetch_on_empty_page(monkeypatch):
+    client = QticketsApiClient(
+        base_url="https://qtickets.test",
+        token="secret",
+        org_name="test-org",
+        page_concurrency=2,
+    )
+
+    def fake_request(method, url, **kwargs):
+        page = kwargs["json"]["page"]
+        data = [{"id": page}] if page <= 2 else []
+        return _make_response(200, {"data": data, "meta": {"page": page, "total_pages": 4}})
+
+    monkeypatch.setattr(client.session, "request", MagicMock(side_effect=fake_request))
+
+    items = client._collect_paginated("orders", json_body={})
+
+    assert [item["id"] for item in items] == [1, 2]
+
+
+def test_iter_orders_yields_window_page_by_page(monkeypatch):
+    client = QticketsApiClient(base_url="https://qtickets.test", token="secret", org_name="test-org")
+    date_to = now_msk()
+    date_from = date_to - timedelta(days=1)
+    inside = (date_to - timedelta(hours=1)).isoformat()
+    pages = {
+        1: [{"id": 1, "payed_at": inside}, {"id": 2, "payed_at": "2021-01-01T10:00:00+03:00"}],
+        2: [{"id": 3, "payed_at": inside}],
+    }
+
+    def fake_request(method, url, **kwargs):
+        page = kwargs["json"]["page"]
+        return _make_response(200, {"data": pages[page], "meta": {"page": page, "total_pages": 2}})
+
+    mocked_request = MagicMock(side_effect=fake_request)
+    monkeypatch.setattr(client.session, "request", mocked_request)
+
+    stream = client.iter_orders(date_from, date_to)
+    assert next(stream)["id"] == 1
+    assert mocked_request.call_count == 1  # page 2 is not requested until needed
+    assert [order["id"] for order in stream] == [3]
+    assert mocked_request.call_count == 2
+
+
+def test_iter_orders_falls_back_to_post_before_first_order(monkeypatch):
+    client = QticketsApiClient(
+        base_url="https://qtickets.test", token="secret", org_name="test-org", max_retries=1
+    )
+    inside = now_msk().isoformat()
+
+    def fake_request(method, url, **kwargs):
+        if method == "GET":
+            return _make_response(403, {"code": "forbidden"})
+        return _make_response(200, {"data": [{"id": 7, "payed_at": inside}]})
+
+    monkeypatch.setattr(client.session, "request", MagicMock(side_effect=fake_request))
+
+    orders = list(client.iter_orders(now_msk() - timedelta(hours=1), now_msk() + timedelta(hours=1)))
+
+    assert [order["id"] for order in orders] == [7]
+
+
+def test_cacheable_request_revalidates_with_etag(monkeypatch, tmp_path):
+    cache = HttpCache(tmp_path, ttl_seconds=0)
+    client = QticketsApiClient(
+        base_url="https://qtickets.test", token="secret", org_name="test-org", http_cache=cache
+    )
+    first = _make_response(200, {"data": [{"id": 1}]})
+    first.headers["ETag"] = '"v1"'
+    not_modified = _make_response(304)
+
+    mocked_request = MagicMock(side_effect=[first, not_modified])
+    monkeypatch.setattr(client.session, "request", mocked_request)
+
+    assert client.list_discounts() == [{"id": 1}]
+    assert client.list_discounts() == [{"id": 1}]
+
+    assert mocked_request.call_args_list[1][1]["headers"]["If-None-Match"] == '"v1"'
+    assert cache.snapshot_stats() == {"hits": 0, "revalidated": 1, "misses": 1}
+
+
+def test_fresh_cache_entry_skips_request(monkeypatch, tmp_path):
+    cache = HttpCache(tmp_path, ttl_seconds=3600)
+    client = QticketsApiClient(
+        base_url="https://qtickets.test", token="secret", org_name="test-org", http_cache=cache
+    )
+    mocked_request = MagicMock(return_value=_make_response(200, {"data": [{"id": 5}]}))
+    monkeypatch.setattr(client.session, "request", mocked_request)
+
+    client.list_price_shades()
+    assert client.list_price_shades() == [{"id": 5}]
+
+    assert mocked_request.call_count == 1
+    assert cache.snapshot_stats()["hits"] == 1
+
+
+def test_paginated_catalogue_is_cached_as_a_unit(monkeypatch, tmp_path):
+    cache = HttpCache(tmp_path, ttl_seconds=0)
+    client = QticketsApiClient(
+        base_url="https://qtickets.test", token="secret", org_name="test-org", http_cache=cache
+    )
+
+    def page(number: int, etag: str) -> requests.Response:
+        response = _make_response(
+            200, {"data": [{"id": number}], "meta": {"page": number, "total_pages": 2}}
+        )
+        response.headers["ETag"] = etag
+        return response
+
+    mocked_request = MagicMock(
+        side_effect=[
+            page(1, '"v1"'),
+            page(2, '"p2"'),
+            _make_response(304),
+            page(1, '"v2"'),
+            page(2, '"p2b"'),
+        ]
+    )
+    monkeypatch.setattr(client.session, "request", mocked_request)
+
+    assert client.list_discounts() == [{"id": 1}, {"id": 2}]
+    # Page 1 unchanged: the whole cached catalogue is reused, page 2 is not requested.
+    assert client.list_discounts() == [{"id": 1}, {"id": 2}]
+    assert mocked_request.call_count == 3
+    # Page 1 changed: every page is refetched and stored together.
+    assert client.list_discounts() == [{"id": 1}, {"id": 2}]
+    assert mocked_request.call_count == 5
+    assert mocked_request.call_args_list[3][1]["headers"]["If-None-Match"] == '"v1"'
+    assert cache.snapshot_stats() == {"hits": 0, "revalidated": 1, "misses": 2}
+    assert "If-None-Match" not in mocked_request.call_args_list[4][1]["headers"]
+
+
+def test_rate_limited_request_honours_retry_after_and_slows_down(monkeypatch):
+    client = QticketsApiClient(
+        base_url="https://qtickets.test",
+        token="secret",
+        org_name="test-org",
+        max_requests_per_second=8,
+    )
+    throttled = _make_response(429, {"code": "too_many_requests"})
+    throttled.headers["Retry-After"] = "2"
+    success = _make_response(200, {"data": []})
+    monkeypatch.setattr(client.session, "request", MagicMock(side_effect=[throttled, success]))
+    sleeps: List[float] = []
+    monkeypatch.setattr(client_module.time, "sleep", sleeps.append)
+
+    assert client.fetch_orders_get(now_msk(), now_msk()) == []
+
+    assert sleeps[0] == 2.0
+    stats = client.rate_limit_stats()["qtickets.test"]
+    assert stats["throttled"] == 1 and stats["requests"] == 2
+    # Halved to 4/s on the 429, then one additive step after the success.
+    assert stats["rate_per_second"] == pytest.approx(4.25)
+
+
+def test_rate_limiter_aimd_respects_floor_and_ceiling(monkeypatch):
+    monkeypatch.setattr(client_module.time, "sleep", lambda _: None)
+    limiter = client_module._AdaptiveRateLimiter(2.0, min_per_second=0.5)
+
+    for _ in range(3):
+        limiter.record_throttle("api")
+    assert limiter.stats()["api"]["rate_per_second"] == 0.5
+
+    for _ in range(20):
+        limiter.record_success("api")
+    assert limiter.stats()["api"]["rate_per_second"] == 2.0
+
+    unlimited = client_module._AdaptiveRateLimiter(None)
+    assert unlimited.acquire("api") == 0.0
+    unlimited.record_success("api")
+    assert unlimited.stats()["api"]["rate_per_second"] is None
+    assert unlimited.record_throttle("api") >= 0.5
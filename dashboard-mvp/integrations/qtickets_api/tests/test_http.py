@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from integrations.common.http import build_session
+from integrations.qtickets_api.client import QticketsApiClient
+
+
+class _GzipHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body = gzip.compress(b'{"data": [' + b'{"id": 1},' * 500 + b'{"id": 2}]}')
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _GzipHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_reuses_connections_and_counts_wire_bytes(server_url):
+    session = build_session(pool_size=2)
+
+    for _ in range(3):
+        assert len(session.get(f"{server_url}/orders").json()["data"]) == 501
+
+    stats = session.http_stats()["127.0.0.1"]
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 2
+    assert stats["bytes_wire"] == 3 * len(_GzipHandler.body)
+    assert stats["bytes_decoded"] > stats["bytes_wire"]
+    assert "gzip" in session.headers["Accept-Encoding"]
+
+
+def test_client_pool_matches_page_concurrency():
+    client = QticketsApiClient(
+        base_url="https://qtickets.test/api/rest/v1",
+        token="token",
+        org_name="org",
+        page_concurrency=6,
+    )
+
+    adapter = client.session.get_adapter("https://qtickets.test/")
+    assert adapter._pool_maxsize == 6  # pylint: disable=protected-access
+    assert client.http_stats() == {}
@@ -74,3 +74,33 @@ def test_summarize_seat_payload_deduplicates_and_counts():
 
     assert total == 3  # X-1 counted once despite duplication
     assert available == 2
+
+
+def test_build_inventory_snapshot_parallel_keeps_event_order():
+    client = Mock()
+    client.stub_mode = False
+    client.partners_ready = False
+
+    def event_seats(event_id):
+        if event_id == "E2":
+            return {}
+        return {"seats": [{"seat_id": f"{event_id}-{n}", "available": True} for n in range(3)]}
+
+    client.list_event_seats.side_effect = event_seats
+    client.get_event_show_seats.side_effect = lambda event_id, show_id: {
+        "seats": [{"seat_id": f"{show_id}-1", "available": False}]
+    }
+    events = [
+        {"id": "E1", "name": "One"},
+        {"id": "E2", "name": "Two", "shows": [{"show_id": "S1"}, {"show_id": "S2"}]},
+        {"id": "E3", "name": "Three"},
+    ]
+
+    rows = build_inventory_snapshot(
+        events, client, snapshot_ts=datetime(2025, 1, 1), max_workers=4
+    )
+
+    assert [row["event_id"] for row in rows] == ["E1", "E2", "E3"]
+    assert [row["tickets_total"] for row in rows] == [3, 2, 3]
+    assert rows[1]["tickets_left"] is None
+    assert client.get_event_show_seats.call_count == 2
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import json
+import logging
+
+from integrations.common import logging as structured
+from integrations.common.logging import JsonLinesFormatter, log_suppressed_summary
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _logger(name):
+    logger = structured.get_logger(name)
+    handler = _Records()
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    return logger, handler
+
+
+def test_metrics_are_not_built_for_disabled_levels():
+    logger, handler = _logger("test.lazy")
+    calls = []
+
+    logger.debug("hidden", metrics=lambda: calls.append(1) or {"x": 1})
+    logger.info("shown %s", "here", metrics=lambda: {"x": 1})
+
+    assert calls == []
+    assert [record.getMessage() for record in handler.records] == [
+        'shown here | metrics={"x": 1}'
+    ]
+
+
+def test_throttled_messages_are_counted_and_summarised(monkeypatch):
+    monkeypatch.setattr(structured._THROTTLE, "limit", 2)  # pylint: disable=protected-access
+    log_suppressed_summary()
+    logger, handler = _logger("test.throttle")
+
+    for index in range(5):
+        logger.warning("Skipping order", throttle=True, metrics={"i": index})
+
+    assert len(handler.records) == 2
+    assert log_suppressed_summary() == {"Skipping order": 3}
+    assert handler.records[-1].getMessage().endswith(
+        '| metrics={"message": "Skipping order", "suppressed": 3}'
+    )
+
+
+def test_repeat_limit_is_read_from_env_on_first_use(monkeypatch):
+    throttle = structured._Throttle()  # pylint: disable=protected-access
+    # Set after the module was imported, as an --envfile would be.
+    monkeypatch.setenv("LOG_REPEAT_LIMIT", "1")
+
+    assert [throttle.allow(("t", 30, "m")) for _ in range(3)] == [True, False, False]
+    assert throttle.drain_suppressed() == {("t", 30, "m"): 2}
+
+
+def test_json_lines_formatter_keeps_metrics_nested():
+    logger, handler = _logger("test.json")
+    logger.info("Loaded %d rows", 3, metrics={"table": "t"})
+
+    line = json.loads(JsonLinesFormatter().format(handler.records[0]))
+
+    assert line["message"] == "Loaded 3 rows"
+    assert line["metrics"] == {"table": "t"}
+    assert line["level"] == "INFO" and line["logger"] == "test.json"
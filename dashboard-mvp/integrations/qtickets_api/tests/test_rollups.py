@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from integrations.qtickets_api.rollups import (
+    ROLLUP_TABLES,
+    backfill_rollups,
+    compact_rollups,
+)
+
+
+class _FakeClient:
+    def __init__(self, months):
+        self.months = months
+        self.commands = []
+
+    def execute(self, query, parameters=None):
+        return SimpleNamespace(result_rows=[(month,) for month in self.months])
+
+    def command(self, query, parameters=None):
+        self.commands.append((query, parameters))
+
+
+def test_backfill_rollups_inserts_each_month_per_table():
+    client = _FakeClient([202501, 202502])
+
+    stats = backfill_rollups(client, "zakaz", 7)
+
+    assert stats == {table: 2 for table in ROLLUP_TABLES}
+    assert [params for _, params in client.commands] == [
+        {"month": 202501},
+        {"month": 202501, "ver": 7},
+        {"month": 202502},
+        {"month": 202502, "ver": 7},
+    ] * len(ROLLUP_TABLES)
+    daily_sql = client.commands[0][0]
+    assert daily_sql.startswith("INSERT INTO zakaz.agg_qtickets_sales_daily ")
+    assert "groupUniqArrayState((_dedup_key, tickets_sold, revenue))" in daily_sql
+    assert "FROM zakaz.stg_qtickets_api_orders_raw" in daily_sql
+    assert "toDate(sale_ts) >= today() - 45" in daily_sql
+    history_sql = client.commands[1][0]
+    assert history_sql.startswith("INSERT INTO zakaz.fact_qtickets_sales_daily ")
+    assert "FROM zakaz.stg_qtickets_api_orders_raw FINAL" in history_sql
+    assert "toDate(sale_ts) < today() - 35" in history_sql
+
+
+def test_compact_rollups_writes_closed_days_into_facts():
+    client = _FakeClient([])
+
+    compact_rollups(client, "zakaz", 9)
+
+    assert [params for _, params in client.commands] == [{"ver": 9}] * len(ROLLUP_TABLES)
+    daily_sql, utm_sql = (query for query, _ in client.commands)
+    assert daily_sql.startswith("INSERT INTO zakaz.fact_qtickets_sales_daily ")
+    assert "FROM zakaz.agg_qtickets_sales_daily" in daily_sql
+    assert "sales_date < today() - 28" in daily_sql
+    assert utm_sql.startswith("INSERT INTO zakaz.fact_qtickets_sales_utm_daily ")
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from integrations.qtickets_api.sales_agg import UTM_FIELDS, SalesRollup
+
+
+def _row(event_id, day, tickets, revenue, **utm):
+    return {
+        "event_id": event_id,
+        "city": "moscow",
+        "sale_ts": datetime(2025, 1, day, 12),
+        "tickets_sold": tickets,
+        "revenue": revenue,
+        **utm,
+    }
+
+
+def test_rollup_sums_daily_and_utm_groups_in_first_seen_order():
+    rollup = SalesRollup()
+    rollup.add_rows(
+        [
+            _row("e1", 1, 2, 0.1, utm_source="vk"),
+            _row("e2", 1, 1, 5.0),
+            _row("e1", 1, 1, 0.2),
+            {"event_id": "e1", "sale_ts": None, "tickets_sold": 9},
+        ]
+    )
+
+    assert [(r["event_id"], r["tickets_sold"], r["revenue"]) for r in rollup.daily_rows(3)] == [
+        ("e1", 3, 0.1 + 0.2),
+        ("e2", 1, 5.0),
+    ]
+    utm = rollup.utm_rows(3)
+    assert [(r["event_id"], r["utm_source"], r["tickets_sold"]) for r in utm] == [
+        ("e1", "vk", 2),
+        ("e2", "", 1),
+        ("e1", "", 1),
+    ]
+    assert utm[0]["utm_term"] == "" and utm[0]["_ver"] == 3
+
+
+def test_rollup_merges_partials_and_drops_a_day():
+    left, right = SalesRollup(), SalesRollup()
+    left.add(_row("e1", 1, 1, 10.0))
+    left.add(_row("e1", 2, 1, 10.0))
+    right.add(_row("e1", 1, 2, 20.0))
+
+    left.merge(right)
+    assert [(r["sales_date"], r["tickets_sold"]) for r in left.daily_rows(1)] == [
+        (date(2025, 1, 1), 3),
+        (date(2025, 1, 2), 1),
+    ]
+
+    left.drop_day(date(2025, 1, 1))
+    left.add(_row("e1", 1, 7, 70.0))
+    assert [(r["sales_date"], r["revenue"]) for r in left.daily_rows(1)] == [
+        (date(2025, 1, 2), 10.0),
+        (date(2025, 1, 1), 70.0),
+    ]
+    assert len(left.utm_rows(1)) == 2
+
+
+def test_rollup_add_columns_matches_add_rows():
+    rows = [
+        _row("e1", 1, 2, 0.1, utm_source="vk"),
+        _row("e2", 1, 1, 5.0),
+        _row("e1", 1, 1, 0.2),
+        {"event_id": "e1", "city": "", "sale_ts": None, "tickets_sold": 9, "revenue": 1.0},
+    ]
+    names = ("sale_ts", "event_id", "city", "tickets_sold", "revenue") + UTM_FIELDS
+    by_rows, by_columns = SalesRollup(), SalesRollup()
+
+    by_rows.add_rows(rows)
+    by_columns.add_columns({name: [row.get(name) for row in rows] for name in names})
+
+    assert by_columns.daily_rows(1) == by_rows.daily_rows(1)
+    assert by_columns.utm_rows(1) == by_rows.utm_rows(1)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from integrations.common import serialize
+from integrations.common.serialize import PayloadSerializer, dumps
+
+
+PAYLOAD = {
+    "id": 1,
+    "b": [1.5, "Москва", None, True],
+    "a": {"when": datetime(2025, 1, 1, 10)},
+    "c": {2: "x"},
+    "big": 2**70,
+}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_is_compact_and_independent_of_orjson(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialize, "orjson", None)
+
+    assert dumps(PAYLOAD, sort_keys=True) == (
+        '{"a":{"when":"2025-01-01 10:00:00"},"b":[1.5,"Москва",null,true],'
+        '"big":1180591620717411303424,"c":{"2":"x"},"id":1}'
+    )
+
+
+def test_hash_mode_strips_keys_and_hands_out_each_payload_once():
+    serializer = PayloadSerializer("hash", drop_keys=["phone"])
+    order = {"id": 1, "client": {"phone": "+7", "name": "A"}}
+
+    digest = serializer(order)
+    assert serializer(dict(order)) == digest and len(digest) == 32
+
+    rows = serializer.drain_side_rows(5)
+    assert rows == [
+        {"payload_hash": digest, "payload_json": '{"client":{"name":"A"},"id":1}', "_ver": 5}
+    ]
+    assert serializer.drain_side_rows(6) == []
+    assert serializer.stats()["payloads"] == 2
+
+
+def test_unknown_payload_mode_is_rejected():
+    with pytest.raises(ValueError, match="Unknown payload mode"):
+        PayloadSerializer("xml")
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from integrations.common.time import to_msk
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("2025-01-01T10:00:00+03:00", datetime(2025, 1, 1, 10, 0)),
+        ("2025-01-01T10:00:00+0300", datetime(2025, 1, 1, 10, 0)),
+        ("2025-01-01T07:00:00.250Z", datetime(2025, 1, 1, 10, 0, 0, 250000)),
+        ("2025-01-01 07:00:00", datetime(2025, 1, 1, 10, 0)),
+        ("2025-1-5 1:2:3", datetime(2025, 1, 5, 4, 2, 3)),
+        ("01.02.2025 07:00:00", datetime(2025, 2, 1, 10, 0)),
+        ("01.02.2025", datetime(2025, 2, 1, 3, 0)),
+    ],
+)
+def test_to_msk_accepts_iso_and_legacy_formats(value, expected):
+    # Repeat to exercise the memoised and remembered-pattern paths.
+    for _ in range(2):
+        assert to_msk(value).replace(tzinfo=None) == expected
+
+
+def test_to_msk_rejects_unknown_strings():
+    with pytest.raises(ValueError, match="Unsupported datetime string"):
+        to_msk("not a date")
+
+
+def test_to_msk_remembers_the_last_pattern_per_hint():
+    from integrations.common import time as msk_time
+
+    to_msk("02.03.2025", hint="test.a")
+    to_msk("2025-3-2 1:2:3", hint="test.b")
+
+    assert msk_time._last_patterns["test.a"] == "%d.%m.%Y"  # pylint: disable=protected-access
+    assert msk_time._last_patterns["test.b"] == "%Y-%m-%d %H:%M:%S"  # pylint: disable=protected-access
@@ -3,7 +3,13 @@ from __future__ import annotations
 from datetime import datetime
 
 from integrations.qtickets_api.transform import (
+    SALES_ROW_COLUMNS,
+    OrderSchema,
+    iter_sales_column_batches,
+    iter_sales_rows,
+    resolve_order_schema,
     transform_clients,
+    transform_orders_to_sales_rows,
     transform_partner_tickets,
 )
 
@@ -34,3 +40,117 @@ def test_transform_partner_tickets_casts_paid_flag():
     assert rows[0]["paid"] == 1
     assert rows[0]["price"] == 123.45
     assert rows[1]["paid"] == 0
+
+
+def test_iter_sales_rows_consumes_orders_lazily():
+    consumed = []
+
+    def orders():
+        for order_id in (1, 2):
+            consumed.append(order_id)
+            yield {
+                "id": order_id,
+                "payed": 1,
+                "payed_at": "2025-01-01T10:00:00+03:00",
+                "event_id": 10,
+                "baskets": [{"price": 100, "quantity": 2}],
+            }
+
+    stream = iter_sales_rows(orders(), version=5)
+    first = next(stream)
+    assert consumed == [1]
+    assert first["order_id"] == "1"
+    assert first["tickets_sold"] == 2
+    assert [row["order_id"] for row in stream] == ["2"]
+    assert transform_orders_to_sales_rows(list(orders()), version=5)[0] == first
+
+
+def _mixed_orders():
+    return [
+        {
+            "id": 1,
+            "payed": 1,
+            "payed_at": "2025-01-01T10:00:00+03:00",
+            "event_id": 10,
+            "city": " Moscow ",
+            "utm": {"utm_source": "vk"},
+            "baskets": [
+                {"price": "100.10", "quantity": 3},
+                {"price": 50, "quantity": 1, "status": "refund"},
+                {"cost": 0.1, "count": "x"},
+                {"amount": 2},
+                "not-a-basket",
+            ],
+        },
+        {"id": 2, "paid": "1", "created_at": "2025-01-02 07:00:00", "items": [
+            {"price": 10, "event": {"id": 20, "city": "Kazan"}},
+        ]},
+        {"id": 3, "payed": 0, "payed_at": "2025-01-01T10:00:00+03:00", "event_id": 1},
+        {"id": 4, "payed": 1, "payed_at": "2025-01-01T10:00:00+03:00"},
+        {"id": 5, "payed": 1, "payed_at": "2025-01-01T11:00:00+03:00", "show_id": 7},
+        {},
+    ]
+
+
+def _tenant_orders(count):
+    # A tenant on the "paid"/"items"/"cost"/"count" aliases.
+    return [
+        {
+            "id": 100 + index,
+            "paid": True,
+            "paid_at": "2025-01-03T12:00:00+03:00",
+            "items": [
+                {"cost": "10.5", "count": index % 3 + 1, "event": {"id": 30}},
+                {"cost": 5, "count": 1, "status": "cancelled"},
+                {"cost": 7, "venue": {"city": "Perm"}},
+            ],
+        }
+        for index in range(count)
+    ]
+
+
+def test_resolve_order_schema_picks_tenant_aliases():
+    schema = resolve_order_schema(_tenant_orders(3))
+
+    assert schema == OrderSchema(
+        paid_key="paid", baskets_key="items", price_key="cost", quantity_key="count"
+    )
+    assert resolve_order_schema([]) == OrderSchema()
+
+
+def test_schema_walker_matches_generic_path():
+    orders = _tenant_orders(6) + _mixed_orders() + [
+        # Basket-level event/city from a refunded item, and an amount-only line.
+        {
+            "id": 200,
+            "paid": 1,
+            "paid_at": "2025-01-04T09:00:00+03:00",
+            "items": [
+                {"cost": 1, "status": "refund", "show_id": 40, "show": {"city": "Omsk"}},
+                {"amount": 4},
+            ],
+        },
+    ]
+
+    generic = list(iter_sales_rows(orders, version=7, schema_sample_size=0))
+    walked = list(iter_sales_rows(orders, version=7, schema_sample_size=3))
+
+    assert walked == generic
+    assert [row["order_id"] for row in walked][-1] == "200"
+
+
+def test_sales_column_batches_match_rows():
+    orders = _tenant_orders(7) + _mixed_orders() + [{"id": 300, "payed": 0}]
+
+    rows = list(iter_sales_rows(orders, version=7, schema_sample_size=3))
+    batches = list(
+        iter_sales_column_batches(orders, version=7, batch_size=4, schema_sample_size=3)
+    )
+
+    assert [len(batch["order_id"]) for batch in batches][:-1] == [4] * (len(batches) - 1)
+    assert all(tuple(batch) == SALES_ROW_COLUMNS for batch in batches)
+    columns = {
+        name: [value for batch in batches for value in batch[name]]
+        for name in SALES_ROW_COLUMNS
+    }
+    assert columns == {name: [row[name] for row in rows] for name in SALES_ROW_COLUMNS}
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from integrations.common import utm
+
+
+def _legacy_extract(params):
+    """extract_utm_params without caching, as it was before memoisation."""
+    result = {}
+    for name in utm.UTM_PARAMS:
+        value = params.get(name, "").strip()
+        if value:
+            result[name] = value
+    if "utm_content" in result:
+        parsed = utm._parse_utm_content.__wrapped__(result["utm_content"])  # pylint: disable=protected-access
+        if parsed:
+            result.update(parsed)
+    return result
+
+
+def test_cached_extract_returns_fresh_equal_dicts():
+    params = {"utm_source": " vk ", "utm_content": "MSK_01_02", "utm_term": ""}
+
+    first = utm.extract_utm_params(params)
+    first["utm_city"] = "changed"
+    second = utm.extract_utm_params(params)
+
+    assert second == _legacy_extract(params)
+    assert second["utm_city"] == "москва"
+
+
+def test_repeated_utm_values_hit_the_cache():
+    values = [
+        {"utm_source": "vk", "utm_medium": "cpc", "utm_content": f"{city}_{day:02d}_05"}
+        for city in ("msk", "spb", "kazan", "ekb")
+        for day in range(1, 11)
+    ] * 250
+    before = utm.utm_cache_stats()["extract_utm_params"]
+
+    cached = [utm.extract_utm_params(params) for params in values]
+
+    assert cached == [_legacy_extract(params) for params in values]
+    stats = utm.utm_cache_stats()["extract_utm_params"]
+    assert stats["hits"] - before["hits"] >= len(values) - 40
+    assert 0 < stats["hit_rate"] <= 1
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from integrations.common.time import localize_msk
+from integrations.qtickets_api.watermark import (
+    next_watermark,
+    read_watermark,
+    resume_window_start,
+    write_watermark,
+)
+
+
+def test_read_watermark_parses_stored_value():
+    ch_client = MagicMock()
+    ch_client.execute.return_value = SimpleNamespace(
+        result_rows=[("2025-01-02T10:15:00+03:00",)]
+    )
+
+    value = read_watermark(ch_client)
+
+    assert value is not None
+    assert value.replace(tzinfo=None) == datetime(2025, 1, 2, 10, 15)
+    params = ch_client.execute.call_args[0][1]
+    assert params == {"source": "qtickets_api", "stream": "orders", "wm_type": "payed_at"}
+
+
+def test_read_watermark_returns_none_when_missing():
+    ch_client = MagicMock()
+    ch_client.execute.return_value = SimpleNamespace(result_rows=[])
+
+    assert read_watermark(ch_client) is None
+
+
+def test_write_watermark_stores_naive_msk_value_with_offset():
+    ch_client = MagicMock()
+
+    write_watermark(ch_client, datetime(2025, 1, 2, 10, 15))
+
+    table, rows = ch_client.insert.call_args[0]
+    assert table == "meta.watermarks"
+    assert rows[0]["wm_value_s"] == "2025-01-02T10:15:00+03:00"
+
+
+def test_resume_window_start_subtracts_overlap():
+    end = localize_msk(datetime(2025, 1, 2, 12, 0))
+
+    start = resume_window_start(
+        datetime(2025, 1, 2, 10, 0), end,
+        overlap=timedelta(minutes=30), max_lookback=timedelta(hours=168),
+    )
+
+    assert start == localize_msk(datetime(2025, 1, 2, 9, 30))
+
+
+def test_resume_window_start_clamps_stale_mark():
+    end = localize_msk(datetime(2025, 3, 1, 12, 0))
+
+    start = resume_window_start(
+        datetime(2025, 1, 1), end,
+        overlap=timedelta(minutes=30), max_lookback=timedelta(hours=24),
+    )
+
+    assert start == end - timedelta(hours=24)
+
+
+def test_next_watermark_advances_without_orders():
+    end = localize_msk(datetime(2025, 1, 2, 12, 0))
+    overlap = timedelta(minutes=30)
+
+    assert next_watermark(None, end, overlap) == end - overlap
+    assert next_watermark(datetime(2025, 1, 2, 8, 0), end, overlap) == end - overlap
+    assert next_watermark(datetime(2025, 1, 2, 11, 50), end, overlap) == localize_msk(
+        datetime(2025, 1, 2, 11, 50)
+    )
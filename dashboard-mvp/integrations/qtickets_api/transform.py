@@ -9,20 +9,59 @@ from all outputs for GDPR compliance.
 from __future__ import annotations
 
 import hashlib
-import json
 import time
+from collections import Counter
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from integrations.common.logging import setup_integrations_logger
+from integrations.common.serialize import PayloadSerializer
 from integrations.common.time import now_msk, to_msk
-from integrations.common.utm import extract_utm_params
+from integrations.common.utm import extract_utm_params, utm_cache_stats
 
 logger = setup_integrations_logger("qtickets_api")
 
+# Orders processed generically before the field aliases are compiled.
+SCHEMA_SAMPLE_SIZE = 50
+
+# Produces every payload_json value; the loader swaps it per configuration.
+_payload_serializer = PayloadSerializer()
+
+# Columns of a sales row, in the order of ``stg_qtickets_api_orders_raw``.
+SALES_ROW_COLUMNS = (
+    "order_id",
+    "event_id",
+    "city",
+    "utm_source",
+    "utm_medium",
+    "utm_campaign",
+    "utm_content",
+    "utm_term",
+    "sale_ts",
+    "tickets_sold",
+    "revenue",
+    "currency",
+    "payload_json",
+    "_ver",
+    "_dedup_key",
+)
+
 
 def transform_orders_to_sales_rows(
-    orders: Sequence[Dict[str, Any]] | None,
+    orders: Iterable[Dict[str, Any]] | None,
     *,
     version: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
@@ -46,120 +85,322 @@ def transform_orders_to_sales_rows(
         )
         return []
 
+    return list(iter_sales_rows(orders, version=version))
+
+
+def iter_sales_rows(
+    orders: Iterable[Dict[str, Any]],
+    *,
+    version: Optional[int] = None,
+    schema_sample_size: int = SCHEMA_SAMPLE_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily convert orders into sales rows.
+
+    Accepts any iterable (e.g. :meth:`QticketsApiClient.iter_orders`) so the
+    caller can batch rows to ClickHouse without holding the whole window.
+    The first ``schema_sample_size`` orders go through the generic path; the
+    field aliases they use are then compiled into an :class:`OrderSchema`
+    and the remaining orders take the single-pass basket walker
+    (``schema_sample_size=0`` keeps the generic path throughout).
+    """
     run_version = version or int(time.time())
-    rows: List[Dict[str, Any]] = []
+    stats: Dict[str, Any] = {}
+    rows_emitted = 0
+    for order, header, tickets_sold, revenue in _iter_order_headers(
+        orders, schema_sample_size, stats
+    ):
+        rows_emitted += 1
+        yield _sales_record(order, header, tickets_sold, revenue, run_version)
+
+    _log_transform("Transformed orders into sales rows", stats, rows_emitted, run_version)
+
+
+def iter_sales_column_batches(
+    orders: Iterable[Dict[str, Any]],
+    *,
+    version: Optional[int] = None,
+    batch_size: int = 5000,
+    schema_sample_size: int = SCHEMA_SAMPLE_SIZE,
+) -> Iterator[Dict[str, List[Any]]]:
+    """
+    Columnar counterpart of :func:`iter_sales_rows`.
+
+    Yields blocks of at most ``batch_size`` rows as :data:`SALES_ROW_COLUMNS`
+    lists, ready for :meth:`ClickHouseClient.insert_columns`, without building
+    a dict per row.  Orders are resolved by the same header/basket walk, so
+    the columns equal the rows of :func:`iter_sales_rows` value for value.
+    """
+    run_version = version or int(time.time())
+    stats: Dict[str, Any] = {}
+    rows_emitted = 0
+    pending: List[Tuple[Dict[str, Any], _OrderHeader, int, float]] = []
+    for item in _iter_order_headers(orders, schema_sample_size, stats):
+        pending.append(item)
+        if len(pending) >= batch_size:
+            rows_emitted += len(pending)
+            yield _sales_columns(pending, run_version)
+            pending = []
+    if pending:
+        rows_emitted += len(pending)
+        yield _sales_columns(pending, run_version)
+
+    _log_transform("Transformed orders into sales columns", stats, rows_emitted, run_version)
+
+
+def _iter_order_headers(
+    orders: Iterable[Dict[str, Any]],
+    schema_sample_size: int,
+    stats: Dict[str, Any],
+) -> Iterator[Tuple[Dict[str, Any], "_OrderHeader", int, float]]:
+    """
+    Yield ``(order, header, tickets_sold, revenue)`` for every accepted order.
+
+    The first ``schema_sample_size`` orders go through the generic path; the
+    field aliases they use are then compiled into an :class:`OrderSchema` for
+    the single-pass basket walker.  ``stats`` receives the order count, the
+    schema and the walker fallbacks once the orders are exhausted.
+    """
+    orders_seen = 0
+    sample: List[Dict[str, Any]] = []
+    schema: Optional[OrderSchema] = None
+    walk_stats = {"fallback_orders": 0, "fallback_items": 0}
 
     for order in orders:
+        orders_seen += 1
         if not order:
             continue
-
-        # Check if order is paid - support both boolean and integer representations
-        is_paid = order.get("payed") or order.get("paid")
-        if is_paid not in [1, True, "1", "true"]:
+        if schema is None and schema_sample_size > 0:
+            sample.append(order)
+            if len(sample) >= schema_sample_size:
+                schema = resolve_order_schema(sample)
+                sample = []
+        header = _order_header(order, schema, walk_stats)
+        if header is None:
             continue
+        if header.totals is not None:
+            tickets_sold, revenue = header.totals
+        else:
+            # Calculate tickets sold and revenue
+            tickets_sold = _count_tickets(header.baskets)
+            revenue = _sum_revenue(header.baskets)
+        yield order, header, tickets_sold, revenue
+
+    stats["orders"] = orders_seen
+    if schema is not None:
+        stats["order_schema"] = schema.describe()
+        stats.update(walk_stats)
+
+
+def _log_transform(
+    message: str, stats: Dict[str, Any], rows: int, run_version: int
+) -> None:
+    metrics: Dict[str, Any] = {
+        "orders": stats.get("orders", 0),
+        "rows": rows,
+        "_ver": run_version,
+    }
+    metrics.update((key, value) for key, value in stats.items() if key != "orders")
+    metrics["utm_cache"] = utm_cache_stats()["extract_utm_params"]
+    logger.info(message, metrics=metrics)
+
+
+class _OrderHeader(NamedTuple):
+    """Order-level fields of a sales row, resolved before the basket sums."""
+
+    order_id: Any
+    event_id: Any
+    baskets: Iterable[Dict[str, Any]]
+    sale_ts: datetime
+    city: str
+    utm: Dict[str, str]
+    currency: str
+    # (tickets, revenue) when the schema walker already summed the baskets
+    totals: Optional[Tuple[int, float]] = None
+
+
+def _order_header(
+    order: Dict[str, Any],
+    schema: Optional[OrderSchema] = None,
+    walk_stats: Optional[Dict[str, int]] = None,
+) -> Optional[_OrderHeader]:
+    """Validate an order and resolve its order-level fields, or ``None`` to skip it."""
+    # With no competing alias present, the schema keys are exactly what the
+    # generic ``or`` chains below would pick.
+    direct = schema is not None and order.keys().isdisjoint(schema.foreign_order_keys)
+    if schema is not None and not direct and walk_stats is not None:
+        walk_stats["fallback_orders"] += 1
+
+    # Check if order is paid - support both boolean and integer representations
+    if direct:
+        is_paid = order.get(schema.paid_key)
+    else:
+        is_paid = order.get("payed") or order.get("paid")
+    if is_paid not in [1, True, "1", "true"]:
+        return None
 
-        # Extract order ID - support multiple field names
-        order_id = order.get("id") or order.get("order_id")
-        if not order_id:
-            logger.warning(
-                "Skipping order without order_id",
-                metrics={"order": str(order)[:100]},  # Truncate for logging
-            )
-            continue
+    # Extract order ID - support multiple field names
+    order_id = order.get("id") or order.get("order_id")
+    if not order_id:
+        logger.warning(
+            "Skipping order without order_id",
+            throttle=True,
+            metrics=lambda: {"order": str(order)[:100]},  # Truncate for logging
+        )
+        return None
 
-        # Extract basket/order items - support multiple field names
+    # Extract basket/order items - support multiple field names
+    if direct:
+        baskets = order.get(schema.baskets_key) or []
+    else:
         baskets = (
             order.get("baskets") or order.get("items") or order.get("order_items") or []
         )
-        if not isinstance(baskets, Iterable):
-            baskets = []
+    if not isinstance(baskets, Iterable):
+        baskets = []
 
-        # Calculate tickets sold and revenue
-        tickets_sold = _count_tickets(baskets)
-        revenue = _sum_revenue(baskets)
-
-        # Extract payment timestamp - support multiple field names
-        sale_ts_raw = (
-            order.get("payed_at") or order.get("paid_at") or order.get("created_at")
+    # Extract payment timestamp - support multiple field names
+    sale_ts_raw = (
+        order.get("payed_at") or order.get("paid_at") or order.get("created_at")
+    )
+    if not sale_ts_raw:
+        logger.warning(
+            "Skipping order without payment timestamp",
+            throttle=True,
+            metrics={"order_id": order_id},
         )
-        if not sale_ts_raw:
-            logger.warning(
-                "Skipping order without payment timestamp",
-                metrics={"order_id": order_id},
-            )
-            continue
+        return None
 
-        try:
-            sale_ts = to_msk(sale_ts_raw).replace(tzinfo=None)
-        except Exception as e:
-            logger.warning(
-                "Skipping order with unparsable payment timestamp",
-                metrics={
-                    "order_id": order_id,
-                    "sale_ts_raw": str(sale_ts_raw)[:50],
-                    "error": str(e),
-                },
-            )
-            continue
+    try:
+        sale_ts = to_msk(sale_ts_raw, hint="qtickets_api.sale_ts").replace(tzinfo=None)
+    except Exception as e:
+        logger.warning(
+            "Skipping order with unparsable payment timestamp",
+            throttle=True,
+            metrics={
+                "order_id": order_id,
+                "sale_ts_raw": str(sale_ts_raw)[:50],
+                "error": str(e),
+            },
+        )
+        return None
 
+    totals: Optional[Tuple[int, float]] = None
+    if schema is not None:
+        # One pass over the baskets for the sums and the basket-level
+        # event/city fallbacks, which are only needed when the order lacks them.
+        event_id = _order_event_id(order)
+        event_block = order.get("event")
+        need_city = not order.get("city") and (
+            not event_block
+            or (isinstance(event_block, dict) and not event_block.get("city"))
+        )
+        tickets, revenue, basket_event_id, basket_city = _walk_baskets(
+            baskets, schema, need_event=not event_id, need_city=need_city,
+            walk_stats=walk_stats,
+        )
+        event_id = event_id or basket_event_id
+        totals = (tickets, revenue)
+    else:
         # Extract event ID with enhanced logic
         event_id = _extract_event_id(order, baskets)
-        if not event_id:
-            logger.warning(
-                "Skipping order without event_id",
-                metrics={"order_id": order_id},
-            )
-            continue
+    if not event_id:
+        logger.warning(
+            "Skipping order without event_id",
+            throttle=True,
+            metrics={"order_id": order_id},
+        )
+        return None
 
-        utm = _extract_utm(order)
+    utm = _extract_utm(order)
 
-        # Extract city with enhanced logic
-        city = (
-            (
-                order.get("city")
-                or (order.get("event") or {}).get("city")
-                or _extract_city(baskets)
-                or ""
-            )
-            .strip()
-            .lower()
+    # Extract city with enhanced logic
+    city = (
+        (
+            order.get("city")
+            or (order.get("event") or {}).get("city")
+            or (basket_city if schema is not None else _extract_city(baskets))
+            or ""
         )
+        .strip()
+        .lower()
+    )
 
-        # Create the record for ClickHouse
-        record = {
-            "order_id": str(order_id),
-            "event_id": str(event_id),
-            "city": city,
-            "utm_source": utm.get("utm_source", ""),
-            "utm_medium": utm.get("utm_medium", ""),
-            "utm_campaign": utm.get("utm_campaign", ""),
-            "utm_content": utm.get("utm_content", ""),
-            "utm_term": utm.get("utm_term", ""),
-            "sale_ts": sale_ts,
-            "tickets_sold": int(tickets_sold),
-            "revenue": float(revenue),
-            "currency": (order.get("currency") or "RUB").upper(),
-            "payload_json": _payload_json(order),
-            "_ver": int(run_version),
-            "_dedup_key": _dedup_key(
-                order_id=order_id,
-                event_id=event_id,
-                sale_ts=sale_ts,
-                revenue=revenue,
-            ),
-        }
+    return _OrderHeader(
+        order_id=order_id,
+        event_id=event_id,
+        baskets=baskets,
+        sale_ts=sale_ts,
+        city=city,
+        utm=utm,
+        currency=(order.get("currency") or "RUB").upper(),
+        totals=totals,
+    )
 
-        rows.append(record)
 
-    logger.info(
-        "Transformed orders into sales rows",
-        metrics={
-            "orders": len(orders),
-            "rows": len(rows),
-            "_ver": run_version,
-        },
-    )
-    return rows
+def _sales_record(
+    order: Dict[str, Any],
+    header: _OrderHeader,
+    tickets_sold: int,
+    revenue: float,
+    run_version: int,
+) -> Dict[str, Any]:
+    """Assemble the ClickHouse row for ``stg_qtickets_api_orders_raw``."""
+    utm = header.utm
+    return {
+        "order_id": str(header.order_id),
+        "event_id": str(header.event_id),
+        "city": header.city,
+        "utm_source": utm.get("utm_source", ""),
+        "utm_medium": utm.get("utm_medium", ""),
+        "utm_campaign": utm.get("utm_campaign", ""),
+        "utm_content": utm.get("utm_content", ""),
+        "utm_term": utm.get("utm_term", ""),
+        "sale_ts": header.sale_ts,
+        "tickets_sold": int(tickets_sold),
+        "revenue": float(revenue),
+        "currency": header.currency,
+        "payload_json": _payload_json(order),
+        "_ver": int(run_version),
+        "_dedup_key": _dedup_key(
+            order_id=header.order_id,
+            event_id=header.event_id,
+            sale_ts=header.sale_ts,
+            revenue=revenue,
+        ),
+    }
+
+
+def _sales_columns(
+    accepted: Sequence[Tuple[Dict[str, Any], _OrderHeader, int, float]],
+    run_version: int,
+) -> Dict[str, List[Any]]:
+    """Column-wise :func:`_sales_record` for a block of accepted orders."""
+    headers = [header for _, header, _, _ in accepted]
+    revenues = [revenue for _, _, _, revenue in accepted]
+    columns: Dict[str, List[Any]] = {
+        "order_id": [str(header.order_id) for header in headers],
+        "event_id": [str(header.event_id) for header in headers],
+        "city": [header.city for header in headers],
+    }
+    for name in ("utm_source", "utm_medium", "utm_campaign", "utm_content", "utm_term"):
+        columns[name] = [header.utm.get(name, "") for header in headers]
+    columns["sale_ts"] = [header.sale_ts for header in headers]
+    columns["tickets_sold"] = [int(tickets) for _, _, tickets, _ in accepted]
+    columns["revenue"] = [float(revenue) for revenue in revenues]
+    columns["currency"] = [header.currency for header in headers]
+    columns["payload_json"] = [_payload_json(order) for order, _, _, _ in accepted]
+    columns["_ver"] = [int(run_version)] * len(accepted)
+    columns["_dedup_key"] = [
+        _dedup_key(
+            order_id=header.order_id,
+            event_id=header.event_id,
+            sale_ts=header.sale_ts,
+            revenue=revenue,
+        )
+        for header, revenue in zip(headers, revenues)
+    ]
+    return columns
 
 
 # --------------------------------------------------------------------- #
@@ -232,6 +473,23 @@ def _extract_event_id(
     order: Dict[str, Any], baskets: Iterable[Dict[str, Any]]
 ) -> Optional[Any]:
     """Derive the event identifier from the order or basket payload."""
+    event_id = _order_event_id(order)
+    if event_id:
+        return event_id
+
+    # Extract from basket items
+    for item in baskets:
+        if not isinstance(item, dict):
+            continue
+        event_id = _basket_event_id(item)
+        if event_id:
+            return event_id
+
+    return None
+
+
+def _order_event_id(order: Dict[str, Any]) -> Optional[Any]:
+    """Event identifier stored on the order itself."""
     # Direct fields in order
     if order.get("event_id"):
         return order["event_id"]
@@ -247,26 +505,25 @@ def _extract_event_id(
             return event["event_id"]
         if event.get("show_id"):
             return event["show_id"]
+    return None
 
-    # Extract from basket items
-    for item in baskets:
-        if not isinstance(item, dict):
-            continue
-        if item.get("event_id"):
-            return item["event_id"]
-        if item.get("show_id"):
-            return item["show_id"]
-
-        # Nested event in basket
-        event_info = item.get("event") or item.get("show")
-        if isinstance(event_info, dict):
-            if event_info.get("id"):
-                return event_info["id"]
-            if event_info.get("event_id"):
-                return event_info["event_id"]
-            if event_info.get("show_id"):
-                return event_info["show_id"]
 
+def _basket_event_id(item: Dict[str, Any]) -> Optional[Any]:
+    """Event identifier stored on a single basket item."""
+    if item.get("event_id"):
+        return item["event_id"]
+    if item.get("show_id"):
+        return item["show_id"]
+
+    # Nested event in basket
+    event_info = item.get("event") or item.get("show")
+    if isinstance(event_info, dict):
+        if event_info.get("id"):
+            return event_info["id"]
+        if event_info.get("event_id"):
+            return event_info["event_id"]
+        if event_info.get("show_id"):
+            return event_info["show_id"]
     return None
 
 
@@ -275,23 +532,186 @@ def _extract_city(baskets: Iterable[Dict[str, Any]]) -> Optional[str]:
     for item in baskets:
         if not isinstance(item, dict):
             continue
-        # Support multiple nested structures
-        event_info = item.get("event") or item.get("show") or {}
-        if isinstance(event_info, dict):
-            city = event_info.get("city")
-            if city:
-                return str(city).strip()
-
-        # Also check venue/place info
-        venue = item.get("venue") or item.get("place") or {}
-        if isinstance(venue, dict):
-            city = venue.get("city")
-            if city:
-                return str(city).strip()
+        city = _basket_city(item)
+        if city is not None:
+            return city
+
+    return None
+
 
+def _basket_city(item: Dict[str, Any]) -> Optional[str]:
+    """City of a single basket item (``None`` when it carries none)."""
+    # Support multiple nested structures
+    event_info = item.get("event") or item.get("show") or {}
+    if isinstance(event_info, dict):
+        city = event_info.get("city")
+        if city:
+            return str(city).strip()
+
+    # Also check venue/place info
+    venue = item.get("venue") or item.get("place") or {}
+    if isinstance(venue, dict):
+        city = venue.get("city")
+        if city:
+            return str(city).strip()
     return None
 
 
+# --------------------------------------------------------------------- #
+# Order schema resolver
+# --------------------------------------------------------------------- #
+_PAID_ALIASES = ("payed", "paid")
+_BASKET_ALIASES = ("baskets", "items", "order_items")
+_PRICE_ALIASES = ("price", "cost", "amount", "total")
+_QUANTITY_ALIASES = ("quantity", "count")
+
+
+@dataclass(frozen=True)
+class OrderSchema:
+    """
+    Field aliases one tenant actually uses, picked from a sample of orders.
+
+    An order or basket item that carries none of the *other* aliases is read
+    with direct key access; anything else (an anomaly for this tenant) takes
+    the generic ``or``-chain path, so the output never depends on the sample.
+    """
+
+    paid_key: str = "payed"
+    baskets_key: str = "baskets"
+    price_key: str = "price"
+    quantity_key: str = "quantity"
+    foreign_order_keys: FrozenSet[str] = field(init=False, repr=False)
+    foreign_item_keys: FrozenSet[str] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self,
+            "foreign_order_keys",
+            frozenset(_PAID_ALIASES + _BASKET_ALIASES) - {self.paid_key, self.baskets_key},
+        )
+        object.__setattr__(
+            self,
+            "foreign_item_keys",
+            frozenset(_PRICE_ALIASES + _QUANTITY_ALIASES)
+            - {self.price_key, self.quantity_key},
+        )
+
+    def describe(self) -> Dict[str, str]:
+        return {
+            "paid": self.paid_key,
+            "baskets": self.baskets_key,
+            "price": self.price_key,
+            "quantity": self.quantity_key,
+        }
+
+
+def _most_used(counter: Counter, aliases: Sequence[str]) -> str:
+    # Ties (including "never seen") go to the alias the generic chain tries first.
+    return max(aliases, key=lambda alias: (counter[alias], -aliases.index(alias)))
+
+
+def resolve_order_schema(orders: Iterable[Dict[str, Any]]) -> OrderSchema:
+    """Pick the most used alias of every field group from sample ``orders``."""
+    order_keys: Counter = Counter()
+    item_keys: Counter = Counter()
+    for order in orders:
+        if not isinstance(order, dict):
+            continue
+        for alias in _PAID_ALIASES + _BASKET_ALIASES:
+            if order.get(alias):
+                order_keys[alias] += 1
+        for alias in _BASKET_ALIASES:
+            baskets = order.get(alias)
+            if not isinstance(baskets, list):
+                continue
+            for item in baskets:
+                if not isinstance(item, dict):
+                    continue
+                for key in _PRICE_ALIASES + _QUANTITY_ALIASES:
+                    if item.get(key):
+                        item_keys[key] += 1
+    return OrderSchema(
+        paid_key=_most_used(order_keys, _PAID_ALIASES),
+        baskets_key=_most_used(order_keys, _BASKET_ALIASES),
+        price_key=_most_used(item_keys, _PRICE_ALIASES),
+        quantity_key=_most_used(item_keys, _QUANTITY_ALIASES),
+    )
+
+
+def _walk_baskets(
+    baskets: Iterable[Dict[str, Any]],
+    schema: OrderSchema,
+    *,
+    need_event: bool,
+    need_city: bool,
+    walk_stats: Optional[Dict[str, int]] = None,
+) -> Tuple[int, float, Optional[Any], Optional[str]]:
+    """
+    Single pass equivalent of ``_count_tickets``, ``_sum_revenue`` and the
+    basket fallbacks of ``_extract_event_id``/``_extract_city``.
+    """
+    tickets = 0
+    revenue = 0.0
+    event_id: Optional[Any] = None
+    city: Optional[str] = None
+    foreign_keys = schema.foreign_item_keys
+    price_key = schema.price_key
+    quantity_key = schema.quantity_key
+    # "amount" doubles as a ticket count when it is this tenant's price field.
+    amount_is_price = price_key == "amount"
+
+    for item in baskets:
+        if not isinstance(item, dict):
+            continue
+
+        # Event/city fallbacks consider refunded items too, like the generic path.
+        if need_event and not event_id:
+            event_id = _basket_event_id(item)
+        if need_city and city is None:
+            city = _basket_city(item)
+
+        # Skip refunds and cancellations
+        status = item.get("status")
+        if (
+            status == "refund"
+            or item.get("is_refund")
+            or status == "cancelled"
+            or item.get("cancelled_at")
+        ):
+            continue
+
+        if item.keys().isdisjoint(foreign_keys):
+            quantity = item.get(quantity_key)
+            ticket_quantity = (
+                quantity or (item.get("amount") if amount_is_price else None) or 1
+            )
+            price = item.get(price_key) or 0
+        else:
+            if walk_stats is not None:
+                walk_stats["fallback_items"] += 1
+            quantity = item.get("quantity") or item.get("count")
+            ticket_quantity = quantity or item.get("amount") or 1
+            price = (
+                item.get("price")
+                or item.get("cost")
+                or item.get("amount")
+                or item.get("total")
+                or 0
+            )
+
+        try:
+            tickets += int(ticket_quantity)
+        except (ValueError, TypeError):
+            # Default to 1 if quantity is not parseable
+            tickets += 1
+        try:
+            revenue += float(price) * float(quantity or 1)
+        except (TypeError, ValueError):
+            continue
+
+    return tickets, revenue, event_id, city
+
+
 def _extract_utm(order: Dict[str, Any]) -> Dict[str, str]:
     """Extract and normalize UTM parameters from heterogeneous order payloads."""
     if not isinstance(order, dict):
@@ -352,8 +772,18 @@ def _resolve_ingest_ts(ingested_at: Optional[datetime] = None) -> datetime:
     return ts.replace(tzinfo=None)
 
 
-def _payload_json(item: Dict[str, Any]) -> str:
-    return json.dumps(item or {}, ensure_ascii=False, sort_keys=True)
+def configure_payload_serializer(serializer: PayloadSerializer) -> None:
+    """Select how ``payload_json`` columns are produced (see :class:`PayloadSerializer`)."""
+    global _payload_serializer  # pylint: disable=global-statement
+    _payload_serializer = serializer
+
+
+def payload_serializer() -> PayloadSerializer:
+    return _payload_serializer
+
+
+def _payload_json(item: Dict[str, Any]) -> Union[str, bytes]:
+    return _payload_serializer(item)
 
 
 def _safe_str(value: Any) -> str:
@@ -0,0 +1,111 @@
+"""
+High-water mark of ``payed_at`` for incremental QTickets API runs.
+
+The mark lives in ``meta.watermarks`` next to the CDC loaders' marks
+(``ch-python/loader/qtickets_cdc.py``) under its own ``source`` so the two
+pipelines never overwrite each other.  A run resumes from the mark minus an
+overlap, capped at a maximum lookback, and moves the mark to the window end
+(minus the overlap) even when it saw no orders, so quiet periods do not keep
+widening later windows.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from integrations.common.ch import ClickHouseClient
+from integrations.common.logging import setup_integrations_logger
+from integrations.common.time import localize_msk, to_msk
+
+logger = setup_integrations_logger("qtickets_api")
+
+WATERMARK_TABLE = "meta.watermarks"
+WATERMARK_SOURCE = "qtickets_api"
+WATERMARK_STREAM = "orders"
+WATERMARK_TYPE = "payed_at"
+
+
+def read_watermark(ch_client: ClickHouseClient) -> Optional[datetime]:
+    """Return the stored ``payed_at`` mark (MSK) or ``None`` when absent."""
+    result = ch_client.execute(
+        f"SELECT wm_value_s FROM {WATERMARK_TABLE} "
+        "WHERE source = %(source)s AND stream = %(stream)s AND wm_type = %(wm_type)s "
+        "ORDER BY updated_at DESC LIMIT 1",
+        {
+            "source": WATERMARK_SOURCE,
+            "stream": WATERMARK_STREAM,
+            "wm_type": WATERMARK_TYPE,
+        },
+    )
+    rows = getattr(result, "result_rows", None) or []
+    if not rows or not rows[0][0]:
+        return None
+    try:
+        return to_msk(rows[0][0])
+    except ValueError:
+        logger.warning(
+            "Ignoring unparsable watermark",
+            metrics={"source": WATERMARK_SOURCE, "value": rows[0][0]},
+        )
+        return None
+
+
+def write_watermark(ch_client: ClickHouseClient, value: datetime) -> None:
+    """Persist ``value`` (naive values are taken as MSK) as the new mark."""
+    ch_client.insert(
+        WATERMARK_TABLE,
+        [
+            {
+                "source": WATERMARK_SOURCE,
+                "stream": WATERMARK_STREAM,
+                "wm_type": WATERMARK_TYPE,
+                "wm_value_s": localize_msk(value).isoformat(),
+            }
+        ],
+    )
+
+
+def resume_window_start(
+    mark: datetime,
+    window_end: datetime,
+    *,
+    overlap: timedelta,
+    max_lookback: timedelta,
+) -> datetime:
+    """
+    Return where an incremental run ending at ``window_end`` starts.
+
+    The run resumes from ``mark`` minus ``overlap`` (late-indexed orders); an
+    old mark widens the window to close the gap, but never beyond
+    ``max_lookback`` so a stale mark cannot trigger an unbounded scan.
+    """
+    window_end = localize_msk(window_end)
+    start = min(localize_msk(mark), window_end) - overlap
+    floor = window_end - max_lookback
+    if start < floor:
+        logger.warning(
+            "Watermark is older than the maximum lookback; clamping the window",
+            metrics={
+                "source": WATERMARK_SOURCE,
+                "watermark": localize_msk(mark).isoformat(),
+                "window_start": floor.isoformat(),
+            },
+        )
+        return floor
+    return start
+
+
+def next_watermark(
+    max_sale_ts: Optional[datetime], window_end: datetime, overlap: timedelta
+) -> datetime:
+    """
+    Return the mark to store after a successful run over ``window_end``.
+
+    Every order paid before ``window_end`` was fetched, so the mark moves at
+    least to ``window_end - overlap`` even when the window had no orders.
+    """
+    floor = localize_msk(window_end) - overlap
+    if max_sale_ts is None:
+        return floor
+    return max(localize_msk(max_sale_ts), floor)
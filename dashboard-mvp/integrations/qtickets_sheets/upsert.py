@@ -8,6 +8,8 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
+from integrations.common.serialize import dumps
+
 # Настройка логгера
 logger = logging.getLogger(__name__)
 
@@ -51,7 +53,7 @@ class ClickHouseUpsert:
                     'source': source,
                     'sheet_id': sheet_id,
                     'tab': tab,
-                    'payload_json': json.dumps(row, ensure_ascii=False),
+                    'payload_json': dumps(row),
                     '_ver': int(now.timestamp()),
                     '_ingest_ts': now,
                     'hash_low_card': row.get('hash_low_card', '')
@@ -11,8 +11,6 @@ from datetime import datetime, date, timedelta
 from typing import Dict, List, Any, Optional, Iterable
 from urllib.parse import parse_qs, urlparse
 
-import httpx
-
 # Добавляем корень проекта в путь для импорта общих модулей
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
@@ -22,6 +20,7 @@ from integrations.common import (
     setup_integrations_logger, log_data_operation,
     parse_utm_content, extract_utm_params
 )
+from integrations.common.http import build_httpx_client
 
 # Настройка логгера
 logger = setup_integrations_logger('vk_ads')
@@ -48,13 +47,17 @@ class VkAdsClient:
             timeout: таймаут запросов
             base_url: базовый URL API
         """
-        self._client = httpx.Client(base_url=base_url, timeout=timeout)
+        self._client = build_httpx_client(retries=3, base_url=base_url, timeout=timeout)
         self._token = access_token
         self._version = api_version
     
     def close(self):
         """Закрытие клиента."""
         self._client.close()
+
+    def http_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Метрики HTTP-транспорта по хостам (переиспользование соединений, тайминги, байты)."""
+        return self._client.telemetry.snapshot()
     
     def __enter__(self):
         return self
@@ -611,6 +614,7 @@ def main():
             )
             
             logger.info(f"Загрузка успешно завершена, загружено строк: {rows_count}")
+            logger.info("HTTP-транспорт VK Ads", metrics=api_client.http_stats())
     
     except Exception as e:
         logger.error(f"Ошибка при выполнении загрузчика: {e}")
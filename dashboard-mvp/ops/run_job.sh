@@ -98,6 +98,12 @@ case "$JOB_NAME" in
     ROWS_WRITTEN=${ROWS_WRITTEN:-0}
     ;;
 
+  "orchestrate")
+    cd ch-python
+    python cli.py orchestrate "$@"
+    ROWS_WRITTEN=${ROWS_WRITTEN:-0}
+    ;;
+
   "backfill_all")
     python ops/backfill.py "$@"
     ROWS_WRITTEN=${ROWS_WRITTEN:-0}
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark the row and columnar qtickets_api sales transform engines.
+
+Builds N synthetic orders (1-4 basket lines, refunds, UTM blocks) and runs
+the staging path of the loader both ways on the same payload: rows from
+``iter_sales_rows`` appended to a ``ColumnBatch`` and folded into a
+``SalesRollup`` one by one, and blocks from ``iter_sales_column_batches``
+handed over as columns.  Checks that both produce the same columns and
+rollup, then prints the timings.
+
+Usage:
+    python scripts/bench_sales_transform.py [--orders 100000] [--batch-size 5000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from integrations.common.ch import ColumnBatch  # noqa: E402
+from integrations.qtickets_api.sales_agg import SalesRollup  # noqa: E402
+from integrations.qtickets_api.transform import (  # noqa: E402
+    SALES_ROW_COLUMNS,
+    iter_sales_column_batches,
+    iter_sales_rows,
+)
+
+
+def synthetic_orders(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    orders = []
+    for index in range(count):
+        baskets = []
+        for line in range(rng.randint(1, 4)):
+            basket: Dict[str, Any] = {
+                "id": f"{index}-{line}",
+                "price": rng.choice([500, 750.5, "1200", 990.99]),
+                "quantity": rng.randint(1, 3),
+                "event": {"id": 100 + index % 50, "city": "Москва"},
+            }
+            if rng.random() < 0.05:
+                basket["status"] = "refund"
+            baskets.append(basket)
+        orders.append(
+            {
+                "id": 1_000_000 + index,
+                "payed": 1 if rng.random() < 0.95 else 0,
+                "payed_at": (start + timedelta(seconds=41 * index)).strftime(
+                    "%Y-%m-%dT%H:%M:%S+03:00"
+                ),
+                "currency": "rub",
+                "baskets": baskets,
+                "utm": {"utm_source": rng.choice(["vk", "yandex", ""]), "utm_medium": "cpc"},
+            }
+        )
+    return orders
+
+
+def run_rows(orders, batch_size):
+    rollup = SalesRollup()
+    blocks = []
+    batch = ColumnBatch()
+    for row in iter_sales_rows(orders, version=1):
+        rollup.add(row)
+        batch.append(row)
+        if len(batch) >= batch_size:
+            blocks.append(batch.columns)
+            batch = ColumnBatch()
+    if len(batch):
+        blocks.append(batch.columns)
+    return blocks, rollup
+
+
+def run_columns(orders, batch_size):
+    rollup = SalesRollup()
+    blocks = []
+    for columns in iter_sales_column_batches(orders, version=1, batch_size=batch_size):
+        rollup.add_columns(columns)
+        blocks.append(columns)
+    return blocks, rollup
+
+
+def _concat(blocks):
+    return {name: [value for block in blocks for value in block[name]] for name in SALES_ROW_COLUMNS}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    orders = synthetic_orders(args.orders)
+    timings = {}
+    results = {}
+    for name, engine in (("rows", run_rows), ("columnar", run_columns)):
+        best = None
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            results[name] = engine(orders, args.batch_size)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best
+
+    (row_blocks, row_rollup), (col_blocks, col_rollup) = results["rows"], results["columnar"]
+    assert _concat(col_blocks) == _concat(row_blocks), "columnar output differs from row output"
+    assert col_rollup.utm_rows(1) == row_rollup.utm_rows(1), "rollups differ"
+
+    print(f"orders      {len(orders):>10,}  rows {sum(len(b['order_id']) for b in row_blocks):,}")
+    print(f"rows        {timings['rows']:10.3f}s")
+    print(f"columnar    {timings['columnar']:10.3f}s")
+    print(f"speedup     {timings['rows'] / timings['columnar']:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
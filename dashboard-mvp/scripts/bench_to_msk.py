@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark ``integrations.common.time.to_msk`` on order-like timestamps.
+
+Compares the current parser with the previous strptime-cascade implementation
+on N ``payed_at`` strings, each converted twice (client window filter, then
+the sales transformer) as in the qtickets_api loader.
+
+Usage:
+    python scripts/bench_to_msk.py [--orders 100000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from integrations.common import time as msk_time  # noqa: E402
+
+_LEGACY_PATTERNS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%fZ",
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%d",
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y",
+)
+
+
+def legacy_to_msk(value: str) -> datetime:
+    """The parser as it was before the ISO fast path and memoisation."""
+    value = value.strip()
+    for pattern in _LEGACY_PATTERNS:
+        try:
+            dt = datetime.strptime(value, pattern)
+            break
+        except ValueError:
+            continue
+    else:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = pytz.UTC.localize(dt)
+    return dt.astimezone(msk_time._current_timezone())  # pylint: disable=protected-access
+
+
+def _timestamps(count: int) -> list[str]:
+    start = datetime(2025, 1, 1)
+    return [
+        (start + timedelta(seconds=37 * index)).strftime("%Y-%m-%dT%H:%M:%S+03:00")
+        for index in range(count)
+    ]
+
+
+def _run(label: str, parse, values: list[str]) -> float:
+    started = time.perf_counter()
+    for value in values:
+        parse(value)  # client window filter
+        parse(value)  # sales transformer
+    elapsed = time.perf_counter() - started
+    print(f"{label:<8} {elapsed:8.3f}s  {2 * len(values) / elapsed:12,.0f} parses/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=100_000)
+    args = parser.parse_args()
+
+    values = _timestamps(args.orders)
+    for value in values[:100]:
+        assert legacy_to_msk(value) == msk_time.to_msk(value)
+
+    legacy = _run("legacy", legacy_to_msk, values)
+    msk_time._parse_string.cache_clear()  # pylint: disable=protected-access
+    current = _run("current", msk_time.to_msk, values)
+    print(f"speedup  {legacy / current:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
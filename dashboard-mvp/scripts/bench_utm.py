@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark ``integrations.common.utm.extract_utm_params`` on repeating UTM tags.
+
+Compares the memoised normaliser with the previous uncached implementation
+on N UTM blocks drawn from a small set of campaigns, as in a loader run, and
+prints the cache hit rates.
+
+Usage:
+    python scripts/bench_utm.py [--orders 100000] [--distinct 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from integrations.common import utm  # noqa: E402
+
+
+def _legacy_normalize_city(city: str) -> str:
+    city_clean = re.sub(r"[^\wа-я\-]", "", city.lower().strip())
+    return utm.CITY_NORMALIZATION.get(city_clean, city_clean)
+
+
+def _legacy_parse(utm_content: str) -> Optional[Dict[str, Any]]:
+    match = utm.UTM_CONTENT_PATTERN.match(utm_content.strip())
+    if not match:
+        return {"utm_content": utm_content, "utm_city": "", "utm_day": 0, "utm_month": 0}
+    day, month = int(match.group("dd")), int(match.group("mm"))
+    if not 1 <= day <= 31 or not 1 <= month <= 12:
+        return None
+    return {
+        "utm_content": utm_content,
+        "utm_city": _legacy_normalize_city(match.group("city")),
+        "utm_day": day,
+        "utm_month": month,
+    }
+
+
+def legacy_extract(params: Dict[str, str]) -> Dict[str, Any]:
+    """extract_utm_params as it was before memoisation."""
+    result: Dict[str, Any] = {}
+    for name in utm.UTM_PARAMS:
+        value = params.get(name, "").strip()
+        if value:
+            result[name] = value
+    if "utm_content" in result:
+        parsed = _legacy_parse(result["utm_content"])
+        if parsed:
+            result.update(parsed)
+    return result
+
+
+def _params(count: int, distinct: int, seed: int = 7) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    cities = list(utm.CITY_NORMALIZATION)[:40]
+    pool = [
+        {
+            "utm_source": rng.choice(["vk", "yandex", "tg"]),
+            "utm_medium": "cpc",
+            "utm_campaign": f"campaign_{index % 17}",
+            "utm_content": f"{rng.choice(cities)}_{rng.randint(1, 28):02d}_{rng.randint(1, 12):02d}",
+        }
+        for index in range(distinct)
+    ]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def _run(label: str, extract, values: List[Dict[str, str]]) -> float:
+    started = time.perf_counter()
+    for params in values:
+        extract(params)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<8} {elapsed:8.3f}s  {len(values) / elapsed:12,.0f} calls/s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--distinct", type=int, default=200)
+    args = parser.parse_args()
+
+    values = _params(args.orders, args.distinct)
+    for params in values[:1000]:
+        assert legacy_extract(params) == utm.extract_utm_params(params)
+
+    legacy = _run("legacy", legacy_extract, values)
+    current = _run("current", utm.extract_utm_params, values)
+    print(f"speedup  {legacy / current:8.1f}x")
+    for name, stats in utm.utm_cache_stats().items():
+        print(f"{name:<20} hit_rate {stats['hit_rate']:.4f}  size {stats['size']}")
+
+
+if __name__ == "__main__":
+    main()